@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""Generate a large question bank and time importing and exporting it in each format.
+
+    python benchmarks/import_benchmark.py --questions 100000 --json bench_import.json
+
+Runs against a throwaway SQLite database. For each format it reports the import and
+export wall time and questions per second. With --trace-memory it also reports the peak
+Python memory during the import (which should stay flat as --questions grows); tracing
+slows the import down several times, so timings from such a run are not comparable.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_import_bench.sqlite3')
+    parser.add_argument('--workdir', default='/tmp', help='Where the generated bank files are written')
+    parser.add_argument('--questions', type=int, default=100_000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'json', 'gift'])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--trace-memory', action='store_true', help='Measure peak memory with tracemalloc')
+    parser.add_argument('--json', help='Also write the report to this file')
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+
+
+def generate_rows(count, rng):
+    for n in range(count):
+        kind = rng.choice(('mcq', 'true_false', 'short_answer', 'numeric', 'multi_answer'))
+        row = {'question_text': f'Generated question {n}: {"lorem ipsum " * rng.randint(1, 8)}'.strip(),
+               'question_type': kind, 'points': rng.randint(1, 5)}
+        if kind == 'mcq':
+            row.update(option_a=f'Option A{n}', option_b=f'Option B{n}', option_c=f'Option C{n}',
+                       option_d=f'Option D{n}', correct_option=rng.choice('abcd'))
+        elif kind == 'true_false':
+            row['correct_option'] = rng.choice('ab')
+        elif kind == 'numeric':
+            row.update(correct_answer=str(rng.randint(0, 1000)), tolerance=rng.choice((0, 0.5, 1)))
+        elif kind == 'multi_answer':
+            row['correct_answer'] = f'answer {n}\nalternative {n}\n/ans\\d+/'
+        else:
+            row['correct_answer'] = f'answer {n}'
+        yield row
+
+
+def write_bank(quiz, fmt, path):
+    """Write the seed quiz out with the exporter under test"""
+    from quizzes.bank import EXPORTERS
+
+    stream, _ = EXPORTERS[fmt]
+    start = time.perf_counter()
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        fh.writelines(stream(quiz.id))
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    db_path = Path(args.db)
+    if db_path.exists():
+        db_path.unlink()
+    setup_django(db_path)
+
+    from django.core.management import call_command
+    from quizzes.bank import PARSERS, import_questions, parse_json
+    from quizzes.models import Quiz
+    from users.models import CustomUser
+
+    print(f'Migrating {db_path}...')
+    call_command('migrate', verbosity=0)
+    owner = CustomUser.objects.create_user(username='bench-author', password='!')
+    rng = random.Random(args.seed)
+
+    # Seed one quiz through the JSON Lines importer, then use it as the export source
+    seed = Quiz.objects.create(title='Seed', duration=30, created_by=owner)
+    lines = io.StringIO(''.join(json.dumps(row) + '\n' for row in generate_rows(args.questions, rng)))
+    start = time.perf_counter()
+    import_questions(seed, parse_json(lines), batch_size=args.batch_size)
+    print(f'Seeded {args.questions:,} questions in {time.perf_counter() - start:.1f}s')
+
+    report = {'questions': args.questions, 'formats': {}}
+    for fmt in args.formats:
+        path = Path(args.workdir) / f'brainquest_bank.{fmt}'
+        export_seconds = write_bank(seed, fmt, path)
+
+        quiz = Quiz.objects.create(title=f'Imported {fmt}', duration=30, created_by=owner)
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with open(path, encoding='utf-8', newline='') as stream:
+            created = import_questions(quiz, PARSERS[fmt](stream), batch_size=args.batch_size)
+        import_seconds = time.perf_counter() - start
+        peak = None
+        if args.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        report['formats'][fmt] = {
+            'file_mb': round(path.stat().st_size / 2**20, 1),
+            'imported': created,
+            'import_seconds': round(import_seconds, 2),
+            'questions_per_second': round(created / import_seconds),
+            'import_peak_mb': round(peak / 2**20, 1) if peak is not None else None,
+            'export_seconds': round(export_seconds, 2),
+        }
+        result = report['formats'][fmt]
+        print(f"{fmt:>5}: {result['file_mb']:>6} MB, import {result['import_seconds']:>6}s "
+              f"({result['questions_per_second']:,}/s, peak {result['import_peak_mb'] or '-'} MB), "
+              f"export {result['export_seconds']}s")
+        path.unlink()
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
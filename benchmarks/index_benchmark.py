@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+"""Seed a throwaway SQLite database with ~1M answers and compare the submission/answer
+access patterns before and after the results 0006 index migration.
+
+    python benchmarks/index_benchmark.py --answers 1000000 --json bench_indexes.json
+
+For each query it reports SQLite's query plan and the median/p95 latency. Seeding and
+querying go through the historical models of the migrated schema, so later migrations
+that add columns don't break the run.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+BEFORE = '0005_quiz_stats_rollups'
+AFTER = '0006_submission_answer_indexes'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_index_bench.sqlite3')
+    parser.add_argument('--answers', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--quizzes', type=int, default=50)
+    parser.add_argument('--questions', type=int, default=20, help='Questions per quiz')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed runs per query')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Also write the report to this file')
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+
+
+def historical_apps():
+    """The app registry as of the migrations applied to the benchmark database"""
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    loader = MigrationExecutor(connection).loader
+    return loader.project_state(list(loader.applied_migrations)).apps
+
+
+def seed(args, rng, apps):
+    from django.db import connection, transaction
+
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    Question = apps.get_model('quizzes', 'Question')
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    UserAnswer = apps.get_model('results', 'UserAnswer')
+    CustomUser = apps.get_model('users', 'CustomUser')
+
+    batch = 5000
+    with transaction.atomic():
+        CustomUser.objects.bulk_create(
+            [CustomUser(username=f'bench{i}', password='!') for i in range(args.users)], batch_size=batch
+        )
+        user_ids = list(CustomUser.objects.values_list('id', flat=True))
+        Quiz.objects.bulk_create(
+            [Quiz(title=f'Quiz {i}', duration=30, created_by_id=user_ids[0]) for i in range(args.quizzes)]
+        )
+        quiz_ids = list(Quiz.objects.values_list('id', flat=True))
+        Question.objects.bulk_create(
+            [
+                Question(quiz_id=quiz_id, question_text=f'Q{n}', question_type='true_false', correct_option='a')
+                for quiz_id in quiz_ids for n in range(args.questions)
+            ],
+            batch_size=batch,
+        )
+    questions = {}
+    for question_id, quiz_id in Question.objects.values_list('id', 'quiz_id'):
+        questions.setdefault(quiz_id, []).append(question_id)
+
+    submissions_needed = args.answers // args.questions
+    created = 0
+    while created < submissions_needed:
+        count = min(batch, submissions_needed - created)
+        with transaction.atomic():
+            submissions = QuizSubmission.objects.bulk_create([
+                QuizSubmission(
+                    user_id=rng.choice(user_ids),
+                    quiz_id=rng.choice(quiz_ids),
+                    is_completed=rng.random() < 0.9,
+                    score=round(rng.betavariate(5, 2) * 100, 1),
+                )
+                for _ in range(count)
+            ])
+            answers = [
+                UserAnswer(submission_id=submission.id, question_id=question_id, chosen_option='a',
+                           is_correct=rng.random() < 0.7)
+                for submission in submissions
+                for question_id in questions[submission.quiz_id]
+            ]
+            UserAnswer.objects.bulk_create(answers, batch_size=batch)
+        created += count
+        print(f'  seeded {created * args.questions:,} answers', end='\r', flush=True)
+    print()
+
+    with connection.cursor() as cursor:
+        # auto_now_add stamps every row with the same time; spread them out like real history
+        cursor.execute(
+            "UPDATE results_quizsubmission SET started_at = datetime('now', '-' || (abs(random()) % 525600) || ' minutes')"
+        )
+    return user_ids, quiz_ids, questions
+
+
+def workloads(user_ids, quiz_ids, questions, rng, apps):
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    UserAnswer = apps.get_model('results', 'UserAnswer')
+
+    user_id = rng.choice(user_ids)
+    quiz_id = rng.choice(quiz_ids)
+    question_id = rng.choice(questions[quiz_id])
+    submission_id = QuizSubmission.objects.filter(quiz_id=quiz_id).values_list('id', flat=True).first()
+    return {
+        'start_quiz: active submission': QuizSubmission.objects.filter(
+            user_id=user_id, quiz_id=quiz_id, is_completed=False
+        )[:1],
+        'submission_history: by user, newest first': QuizSubmission.objects.filter(
+            user_id=user_id
+        ).order_by('-started_at')[:20],
+        'quiz_analytics: top completed scores': QuizSubmission.objects.filter(
+            quiz_id=quiz_id, is_completed=True
+        ).order_by('-score')[:10],
+        'answer lookup by (submission, question)': UserAnswer.objects.filter(
+            submission_id=submission_id, question_id=question_id
+        )[:1],
+        'question accuracy: correct answers': UserAnswer.objects.filter(
+            question_id=question_id, is_correct=True
+        ).values('id'),
+    }
+
+
+def measure(queries, repeat):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    report = {}
+    for name, queryset in queries.items():
+        plan = queryset.explain()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        report[name] = {
+            'plan': plan,
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        }
+    return report
+
+
+def main():
+    args = parse_args()
+    db_path = Path(args.db)
+    if db_path.exists():
+        db_path.unlink()
+    setup_django(db_path)
+
+    from django.core.management import call_command
+
+    rng = random.Random(args.seed)
+    print(f'Migrating {db_path} to results {BEFORE}...')
+    call_command('migrate', 'results', BEFORE, verbosity=0)
+    call_command('migrate', 'users', verbosity=0)
+    # 0006 only adds indexes and a constraint, so these models fit both sides of it
+    apps = historical_apps()
+    print(f'Seeding {args.answers:,} answers...')
+    start = time.perf_counter()
+    user_ids, quiz_ids, questions = seed(args, rng, apps)
+    print(f'  done in {time.perf_counter() - start:.1f}s')
+
+    queries = workloads(user_ids, quiz_ids, questions, rng, apps)
+    before = measure(queries, args.repeat)
+
+    print(f'Applying results {AFTER}...')
+    start = time.perf_counter()
+    call_command('migrate', 'results', AFTER, verbosity=0)
+    migration_seconds = round(time.perf_counter() - start, 2)
+    after = measure(queries, args.repeat)
+
+    for name in queries:
+        print(f'\n{name}')
+        print(f"  before: {before[name]['median_ms']:>9.3f} ms median, {before[name]['p95_ms']:>9.3f} ms p95")
+        print(f"          {before[name]['plan']}")
+        print(f"  after:  {after[name]['median_ms']:>9.3f} ms median, {after[name]['p95_ms']:>9.3f} ms p95")
+        print(f"          {after[name]['plan']}")
+    print(f'\nIndex migration took {migration_seconds}s')
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({
+                'answers': args.answers,
+                'migration_seconds': migration_seconds,
+                'before': before,
+                'after': after,
+            }, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""Simulate concurrent students taking quizzes and report per-endpoint latency and queries.
+
+    python benchmarks/load_benchmark.py --students 16 --attempts 5 --json bench_load.json
+    python benchmarks/load_benchmark.py --baseline bench_load.json   # fail on regressions
+
+Seeds a throwaway database with the seed_quizdata generator, then each of --students
+threads logs in with its own Django test client and repeats start_quiz -> take_quiz
+(GET + POST per question) -> quiz_result --attempts times. The report has overall throughput and, per endpoint, p50/p95/p99
+latency and queries per request. With --baseline the run is compared against an earlier
+report, and the script exits non-zero if any endpoint's p95 latency or query count got
+worse by more than the tolerance.
+
+Threads share one process (and the GIL), so absolute numbers are lower than a real
+deployment; compare runs made with the same arguments on the same machine. An attempt
+that raises is abandoned and counted under "failures" in the report. SQLite runs use the
+tuned SQLITE_PROFILE (WAL, busy timeout), without which concurrent students mostly fail
+with "database is locked". --database-url points the run at another empty database,
+e.g. PostgreSQL.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+QUESTION_ID = re.compile(r'name="question_id" value="(\d+)"')
+CHOICE = re.compile(r'name="answer" value="([^"]*)"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_load_bench.sqlite3')
+    parser.add_argument('--database-url', help='Run against this (empty) database instead of a scratch SQLite file')
+    parser.add_argument('--students', type=int, default=8, help='Concurrent simulated students')
+    parser.add_argument('--attempts', type=int, default=3, help='Quizzes each student takes')
+    parser.add_argument('--quizzes', type=int, default=5)
+    parser.add_argument('--questions', type=int, default=10, help='Average questions per quiz')
+    parser.add_argument('--history', type=int, default=2000, help='Completed submissions seeded beforehand')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Write the report to this file')
+    parser.add_argument('--baseline', help='Compare against an earlier --json report')
+    parser.add_argument('--tolerance', type=float, default=20, help='Allowed p95 regression in percent')
+    return parser.parse_args()
+
+
+def setup_django(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    # Concurrent writers on SQLite's default journal mostly fail with "database is locked";
+    # WAL with a busy timeout lets them queue (the profile only applies to SQLite)
+    os.environ['SQLITE_PROFILE'] = 'tuned'
+    # DEBUG would log every query in memory and skew the numbers
+    os.environ['DEBUG'] = 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    settings.ALLOWED_HOSTS.append('localhost')
+
+
+def seed(args):
+    from quizzes.models import Quiz
+    from results.synthetic import generate
+    from users.models import CustomUser
+
+    generate(users=args.students, quizzes=args.quizzes, questions=args.questions, submissions=args.history,
+             seed=args.seed)
+    students = list(CustomUser.objects.filter(role='user').order_by('id'))
+    return students, list(Quiz.objects.filter(is_active=True).values_list('id', flat=True))
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+        self.failures = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, latency, queries, ok):
+        with self.lock:
+            self.samples.append((endpoint, latency, queries, ok))
+
+    def fail(self, exc):
+        with self.lock:
+            self.failures[f'{type(exc).__name__}: {exc}'] += 1
+
+
+def timed(client, recorder, endpoint, method, url, data=None):
+    from core.metrics import QueryTimer
+
+    timer = QueryTimer()
+    start = time.perf_counter()
+    with timer.wrap():
+        response = getattr(client, method)(url, data)
+    recorder.add(endpoint, time.perf_counter() - start, timer.count, response.status_code < 400)
+    return response
+
+
+def take_attempt(client, recorder, quiz_id, rng):
+    from django.urls import reverse
+
+    response = timed(client, recorder, 'start_quiz', 'get', reverse('quizzes:start_quiz', args=[quiz_id]))
+    url = response['Location']
+    while True:
+        response = timed(client, recorder, 'take_quiz GET', 'get', url)
+        if response.status_code == 302:
+            break
+        page = response.content.decode()
+        question_id = QUESTION_ID.search(page).group(1)
+        choices = CHOICE.findall(page)
+        answer = rng.choice(choices) if choices else 'benchmark'
+        response = timed(client, recorder, 'take_quiz POST', 'post', url, {'question_id': question_id, 'answer': answer})
+        if response['Location'] != url:
+            break
+    timed(client, recorder, 'quiz_result', 'get', response['Location'])
+
+
+def student(user, quiz_ids, args, recorder, barrier, completed):
+    from django.db import connections
+    from django.test import Client
+
+    rng = random.Random(f'{args.seed}:{user.id}')
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(user)
+    barrier.wait()
+    try:
+        for _ in range(args.attempts):
+            try:
+                take_attempt(client, recorder, rng.choice(quiz_ids), rng)
+            except Exception as exc:
+                # The attempt is abandoned; the student moves on to the next one
+                recorder.fail(exc)
+            else:
+                completed.append(1)
+    finally:
+        connections.close_all()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(recorder, wall_seconds, attempts):
+    by_endpoint = defaultdict(list)
+    for endpoint, latency, queries, ok in recorder.samples:
+        by_endpoint[endpoint].append((latency, queries, ok))
+
+    endpoints = {}
+    for endpoint, samples in sorted(by_endpoint.items()):
+        latencies = sorted(latency * 1000 for latency, _, _ in samples)
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, _, ok in samples if not ok),
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'queries_per_request': round(sum(queries for _, queries, _ in samples) / len(samples), 2),
+        }
+    requests = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'totals': {
+            'requests': requests,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+            'attempts_completed': attempts,
+            'attempts_failed': sum(recorder.failures.values()),
+            'wall_seconds': round(wall_seconds, 2),
+            'requests_per_second': round(requests / wall_seconds, 1),
+            'attempts_per_second': round(attempts / wall_seconds, 2),
+        },
+        'endpoints': endpoints,
+        'failures': dict(recorder.failures.most_common()),
+    }
+
+
+def metadata(args):
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'args': {key: value for key, value in vars(args).items() if key not in ('json', 'baseline', 'database_url')},
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Print per-endpoint deltas; return the endpoints that regressed"""
+    regressions = []
+    print(f"\n{'endpoint':<16}{'p95 ms':>10}{'baseline':>10}{'change':>9}{'queries':>9}{'baseline':>10}")
+    for endpoint, current in report['endpoints'].items():
+        previous = baseline['endpoints'].get(endpoint)
+        if previous is None:
+            continue
+        change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+        print(f"{endpoint:<16}{current['p95_ms']:>10}{previous['p95_ms']:>10}{change:>8.1f}%"
+              f"{current['queries_per_request']:>9}{previous['queries_per_request']:>10}")
+        if change > tolerance or current['queries_per_request'] > previous['queries_per_request'] + 0.5:
+            regressions.append(endpoint)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url
+    if not database_url:
+        db_path = Path(args.db)
+        if db_path.exists():
+            db_path.unlink()
+        database_url = f'sqlite:///{db_path}'
+    setup_django(database_url)
+
+    from django.core.management import call_command
+    from django.db import connections
+
+    print('Migrating...')
+    call_command('migrate', verbosity=0)
+    students, quiz_ids = seed(args)
+    connections.close_all()
+
+    recorder = Recorder()
+    completed = []
+    barrier = threading.Barrier(args.students + 1)
+    threads = [
+        threading.Thread(target=student, args=(user, quiz_ids, args, recorder, barrier, completed))
+        for user in students
+    ]
+    for thread in threads:
+        thread.start()
+    print(f'Running {args.students} students x {args.attempts} attempts...')
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start
+
+    report = {'meta': metadata(args), **summarize(recorder, wall_seconds, len(completed))}
+    totals = report['totals']
+    print(f"{totals['requests']} requests in {totals['wall_seconds']}s: {totals['requests_per_second']} req/s, "
+          f"{totals['attempts_completed']} attempts completed, {totals['attempts_failed']} failed, "
+          f"{totals['errors']} error responses")
+    for failure, count in report['failures'].items():
+        print(f'  {count} x {failure}')
+    print(f"\n{'endpoint':<16}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:<16}{stats['requests']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+              f"{stats['queries_per_request']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
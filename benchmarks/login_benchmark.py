@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""Simulate an exam-start login storm and compare session/user-cache profiles.
+
+    python benchmarks/login_benchmark.py --users 200 --threads 16 --json bench_login.json
+
+Every user logs in once per scenario (POST to users:login with the real password hasher),
+then makes --follow-up authenticated requests. Scenarios run one after another in the
+same process:
+
+    baseline        database sessions, user loaded from the database on every request
+    db              database sessions, cached user
+    cached_db       cache-backed database sessions, cached user
+    signed_cookies  cookie sessions, cached user
+
+For each one the report has login throughput and latency percentiles, plus SQL queries
+per login and per follow-up request. Login cost is dominated by password hashing, which
+none of the profiles change; they differ in what every request after the login costs.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+SCENARIOS = {
+    'baseline': ('db', 0),
+    'db': ('db', 300),
+    'cached_db': ('cached_db', 300),
+    'signed_cookies': ('signed_cookies', 300),
+}
+PASSWORD = 'storm-pass-123'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_login_bench.sqlite3')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--follow-up', type=int, default=5, help='Authenticated requests after each login')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--json', help='Write the report to this file')
+    return parser.parse_args()
+
+
+def setup_django(db_path):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['DEBUG'] = 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    settings.ALLOWED_HOSTS.append('localhost')
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def storm(usernames, args):
+    """Log every user in from --threads workers; returns per-login and follow-up samples"""
+    from django.db import connections
+    from django.test import Client
+    from django.urls import reverse
+    from core.metrics import QueryTimer
+
+    login_url = reverse('users:login')
+    follow_up_url = reverse('users:profile')
+    pending = list(usernames)
+    lock = threading.Lock()
+    logins, follow_ups, failures = [], [], []
+    barrier = threading.Barrier(args.threads + 1)
+
+    def worker():
+        barrier.wait()
+        try:
+            while True:
+                with lock:
+                    if not pending:
+                        return
+                    username = pending.pop()
+                client = Client(HTTP_HOST='localhost')
+                timer = QueryTimer()
+                start = time.perf_counter()
+                with timer.wrap():
+                    response = client.post(login_url, {'username': username, 'password': PASSWORD})
+                latency = time.perf_counter() - start
+                if response.status_code != 302:
+                    failures.append(username)
+                    continue
+                login_queries = timer.count
+                samples = []
+                for _ in range(args.follow_up):
+                    follow_up_timer = QueryTimer()
+                    with follow_up_timer.wrap():
+                        client.get(follow_up_url)
+                    samples.append(follow_up_timer.count)
+                with lock:
+                    logins.append((latency, login_queries))
+                    follow_ups.extend(samples)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, logins, follow_ups, failures
+
+
+def run_scenario(name, usernames, args):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test.utils import override_settings
+
+    profile, user_cache_timeout = SCENARIOS[name]
+    cache.clear()
+    with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[profile], USER_CACHE_TIMEOUT=user_cache_timeout):
+        wall, logins, follow_ups, failures = storm(usernames, args)
+    latencies = sorted(latency * 1000 for latency, _ in logins)
+    return {
+        'session_profile': profile,
+        'user_cache': bool(user_cache_timeout),
+        'logins': len(logins),
+        'failures': len(failures),
+        'wall_seconds': round(wall, 2),
+        'logins_per_second': round(len(logins) / wall, 1),
+        'login_p50_ms': round(percentile(latencies, 0.5), 1),
+        'login_p95_ms': round(percentile(latencies, 0.95), 1),
+        'queries_per_login': round(sum(queries for _, queries in logins) / len(logins), 2),
+        'queries_per_follow_up': round(sum(follow_ups) / len(follow_ups), 2) if follow_ups else None,
+    }
+
+
+def main():
+    args = parse_args()
+    db_path = Path(args.db)
+    if db_path.exists():
+        db_path.unlink()
+    setup_django(db_path)
+
+    from django.core.management import call_command
+    from results.synthetic import generate
+    from users.models import CustomUser
+
+    print('Migrating...')
+    call_command('migrate', verbosity=0)
+    generate(users=args.users, quizzes=1, questions=1, submissions=0, password=PASSWORD)
+    usernames = list(CustomUser.objects.filter(role='user').values_list('username', flat=True))
+
+    report = {'users': args.users, 'threads': args.threads, 'follow_up': args.follow_up, 'scenarios': {}}
+    print(f"{'scenario':<16}{'logins/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'q/login':>9}{'q/request':>11}")
+    for name in args.scenarios:
+        result = report['scenarios'][name] = run_scenario(name, usernames, args)
+        print(f"{name:<16}{result['logins_per_second']:>10}{result['login_p50_ms']:>9}{result['login_p95_ms']:>9}"
+              f"{result['queries_per_login']:>9}{result['queries_per_follow_up']:>11}")
+        if result['failures']:
+            print(f"  {result['failures']} logins failed")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""Seed a throwaway database with a large question bank and compare full-text search
+against the ``icontains`` scan it replaces.
+
+    python benchmarks/search_benchmark.py --questions 1000000 --json bench_search.json
+
+Question texts are drawn from a Zipf-distributed synthetic vocabulary, so there are
+common, mid-frequency and rare terms to search for. For each query the report has the
+number of matches and the median/p95 latency of fetching the first admin page (count plus
+the first --page-size rows) both ways, plus the bulk load and index rebuild times.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from itertools import accumulate
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+SYLLABLES = [c + v for c in 'bcdfghklmnprstvz' for v in 'aeiou']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_search_bench.sqlite3')
+    parser.add_argument('--database-url', help='Benchmark this database instead of a throwaway SQLite file')
+    parser.add_argument('--questions', type=int, default=1_000_000)
+    parser.add_argument('--quizzes', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=100, help='Rows fetched per search, as on an admin page')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed runs per query')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Also write the report to this file')
+    return parser.parse_args()
+
+
+def setup_django(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+
+
+def make_vocabulary(rng, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def seed(args, rng, vocabulary):
+    from django.db import transaction
+    from quizzes.models import Quiz, Question
+    from users.models import CustomUser
+
+    weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def words(count):
+        return ' '.join(rng.choices(vocabulary, cum_weights=weights, k=count))
+
+    author = CustomUser.objects.create(username='search-bench', password='!', role='admin')
+    Quiz.objects.bulk_create([
+        Quiz(title=words(3).title(), description=words(12), duration=30, created_by=author)
+        for _ in range(args.quizzes)
+    ])
+    quiz_ids = list(Quiz.objects.values_list('id', flat=True))
+
+    batch = 5000
+    start = time.perf_counter()
+    for offset in range(0, args.questions, batch):
+        with transaction.atomic():
+            Question.objects.bulk_create([
+                Question(
+                    quiz_id=rng.choice(quiz_ids), question_text=words(rng.randint(8, 16)) + '?',
+                    option_a=words(2), option_b=words(2), option_c=words(2), option_d=words(2), correct_option='a',
+                )
+                for _ in range(min(batch, args.questions - offset))
+            ])
+        print(f'  {min(offset + batch, args.questions):,} questions', end='\r', flush=True)
+    print()
+    return time.perf_counter() - start
+
+
+def timed(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, {
+        'median_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 2),
+    }
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        db_path = Path(args.db)
+        if db_path.exists():
+            db_path.unlink()
+        database_url = f'sqlite:///{db_path}'
+    setup_django(database_url)
+
+    from django.core.management import call_command
+    from django.db import connection
+    from django.db.models import Q
+    from quizzes.models import Question
+    from quizzes.search import rebuild_index, search
+
+    rng = random.Random(args.seed)
+    print('Migrating...')
+    call_command('migrate', verbosity=0)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    print(f'Seeding {args.questions:,} questions...')
+    load_seconds = seed(args, rng, vocabulary)
+    start = time.perf_counter()
+    rebuild_index()
+    rebuild_seconds = time.perf_counter() - start
+
+    queries = {
+        'common term': vocabulary[0],
+        'mid-frequency term': vocabulary[100],
+        'rare term': vocabulary[-1],
+        'two terms': f'{vocabulary[3]} {vocabulary[40]}',
+        'prefix': vocabulary[100][:4],
+    }
+    columns = ('question_text', 'option_a', 'option_b', 'option_c', 'option_d')
+    report = {
+        'database': connection.vendor,
+        'questions': args.questions,
+        'load_seconds': round(load_seconds, 1),
+        'rebuild_seconds': round(rebuild_seconds, 1),
+        'queries': {},
+    }
+    print(f"Loaded in {load_seconds:.1f}s (triggers on), rebuilt the index in {rebuild_seconds:.1f}s\n")
+    print(f"{'query':<20}{'matches':>10}{'fts median':>12}{'fts p95':>10}{'scan median':>13}{'scan p95':>10}")
+    for name, query in queries.items():
+        ranked = search(Question.objects.all(), query)
+        terms = query.split()
+        scanned = Question.objects.filter(*(
+            Q(*(Q(**{f'{column}__icontains': term}) for column in columns), _connector=Q.OR) for term in terms
+        )).order_by('-pk')
+        matches, fts = timed(lambda: (ranked.count(), list(ranked[:args.page_size]))[0], args.repeat)
+        # The scan is the old admin search; a couple of runs are enough to see its cost
+        _, scan = timed(lambda: (scanned.count(), list(scanned[:args.page_size]))[0], min(args.repeat, 3))
+        report['queries'][name] = {'query': query, 'matches': matches, 'search': fts, 'icontains': scan}
+        print(f"{name:<20}{matches:>10}{fts['median_ms']:>12}{fts['p95_ms']:>10}{scan['median_ms']:>13}{scan['p95_ms']:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
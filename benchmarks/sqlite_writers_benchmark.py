@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""Measure sustained answer writes from concurrent worker processes on one SQLite file.
+
+    python benchmarks/sqlite_writers_benchmark.py --workers 8 --seconds 15 --json bench_sqlite.json
+
+Each SQLITE_PROFILE under test gets a fresh copy of the same seeded database. N worker
+processes (like gunicorn workers) then answer questions for their own students through
+the same model calls as take_quiz: load the submission, record one answer, and complete
+the attempt after its last question. The report has answers/sec, per-answer latency
+percentiles and the number of "database is locked" failures for each profile.
+
+The ``buffered`` profile is ``tuned`` plus the write-behind answer buffer
+(ANSWER_BUFFER_DIR), with one extra process flushing it every second like the
+``flush_answer_buffer --interval`` sidecar.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+PROFILES = ('default', 'tuned', 'buffered')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='/tmp/brainquest_sqlite_bench.sqlite3')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--students', type=int, default=25, help='Students per worker')
+    parser.add_argument('--quizzes', type=int, default=10)
+    parser.add_argument('--questions', type=int, default=100, help='Questions per quiz')
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=PROFILES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Also write the report to this file')
+    return parser.parse_args()
+
+
+def setup_django(db_path, profile):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    if profile == 'buffered':
+        os.environ['ANSWER_BUFFER_DIR'] = f'{db_path}.buffer'
+        profile = 'tuned'
+    os.environ['SQLITE_PROFILE'] = profile
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_app.settings')
+    import django
+    django.setup()
+
+
+def seed(db_path, args):
+    """Build the template database: students, all-MCQ quizzes and one open attempt per student"""
+    setup_django(db_path, 'default')
+    from django.core.management import call_command
+    from quizzes.models import Quiz
+    from results.models import QuizSubmission
+    from results.synthetic import generate
+    from users.models import CustomUser
+
+    call_command('migrate', verbosity=0)
+    generate(users=args.workers * args.students, quizzes=args.quizzes, questions=args.questions, submissions=0)
+    Quiz.objects.update(duration=24 * 60)
+    rng = random.Random(args.seed)
+    quizzes = list(Quiz.objects.filter(is_active=True))
+    for user in CustomUser.objects.filter(role='user'):
+        QuizSubmission.resume_or_start(user, rng.choice(quizzes))
+    return list(QuizSubmission.objects.order_by('id').values_list('id', flat=True))
+
+
+def worker(db_path, profile, submission_ids, start_at, stop_at, results):
+    setup_django(db_path, profile)
+    from django.db import OperationalError, close_old_connections, connection
+    from quizzes.paper import get_paper
+    from results.models import QuizSubmission
+
+    # Connect (and switch the file to WAL, for the tuned profile) before the clock runs
+    connection.ensure_connection()
+    time.sleep(max(0, start_at - time.time()))
+    answers, locked, latencies = 0, 0, []
+    pending = list(submission_ids)
+    while pending and time.time() < stop_at:
+        submission_id = pending.pop(0)
+        start = time.perf_counter()
+        try:
+            submission = QuizSubmission.objects.select_related('quiz').get(pk=submission_id)
+            questions = submission.questions_for(get_paper(submission.quiz_id))
+            question = submission.next_question(questions)
+            if question is not None and submission.record_answer(question, 'a' if question.question_type in ('mcq', 'true_false') else '1'):
+                answers += 1
+                latencies.append(time.perf_counter() - start)
+            if submission.next_question(questions) is None:
+                submission.complete(questions)
+                continue
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+            close_old_connections()
+        pending.append(submission_id)
+    results.put({'answers': answers, 'locked': locked, 'latencies': latencies})
+
+
+def flusher(db_path, profile, stop_at):
+    setup_django(db_path, profile)
+    from results import buffer
+
+    while time.time() < stop_at:
+        time.sleep(1)
+        buffer.flush()
+
+
+def run_profile(template, args, profile, submission_ids):
+    db_path = Path(args.db).with_name(f'{Path(args.db).stem}-{profile}.sqlite3')
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{db_path}{suffix}').unlink(missing_ok=True)
+    shutil.rmtree(f'{db_path}.buffer', ignore_errors=True)
+    shutil.copy(template, db_path)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    # Leave time for the workers to start up before the clock runs
+    start_at = time.time() + 5
+    stop_at = start_at + args.seconds
+    shares = [submission_ids[index::args.workers] for index in range(args.workers)]
+    processes = [
+        context.Process(target=worker, args=(db_path, profile, share, start_at, stop_at, results))
+        for share in shares
+    ]
+    if profile == 'buffered':
+        processes.append(context.Process(target=flusher, args=(db_path, profile, stop_at)))
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in shares]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency * 1000 for outcome in outcomes for latency in outcome['latencies'])
+    answers = sum(outcome['answers'] for outcome in outcomes)
+    return {
+        'answers': answers,
+        'answers_per_second': round(answers / args.seconds, 1),
+        'locked_errors': sum(outcome['locked'] for outcome in outcomes),
+        'p50_ms': round(latencies[len(latencies) // 2], 2) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)], 2) if latencies else None,
+    }
+
+
+def main():
+    args = parse_args()
+    template = Path(args.db)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{template}{suffix}').unlink(missing_ok=True)
+    print('Seeding...')
+    submission_ids = seed(template, args)
+    from django.db import connections
+    connections.close_all()
+
+    report = {'workers': args.workers, 'students': len(submission_ids), 'seconds': args.seconds, 'profiles': {}}
+    print(f"{'profile':<10}{'answers/s':>11}{'locked':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for profile in args.profiles:
+        result = report['profiles'][profile] = run_profile(template, args, profile, submission_ids)
+        print(f"{profile:<10}{result['answers_per_second']:>11}{result['locked_errors']:>8}"
+              f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""In-process per-view request metrics.
+
+``RequestMetricsMiddleware`` records one sample per request (latency, SQL query count, SQL
+time) under the resolved URL name. Each view keeps a rolling window of recent samples for
+percentiles plus lifetime sums and counts, rendered in the Prometheus text format by
+``render_prometheus``. Numbers are per process: with several workers each one reports its
+own, and Prometheus aggregates across them.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+QUANTILES = (0.5, 0.9, 0.99)
+METRICS = (
+    # name, sample index, help text
+    ('request_latency_seconds', 0, 'Request latency by URL name'),
+    ('request_queries', 1, 'SQL queries per request by URL name'),
+    ('request_sql_seconds', 2, 'Time spent in SQL per request by URL name'),
+)
+UNRESOLVED = '<unresolved>'
+
+
+class QueryTimer:
+    """``execute_wrapper`` hook counting and timing every query on the wrapped connections"""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def wrap(self):
+        """Context manager installing the timer on every configured database"""
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+
+class ViewSeries:
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sums = [0.0, 0, 0.0]
+
+    def add(self, sample):
+        self.samples.append(sample)
+        self.count += 1
+        for index, value in enumerate(sample):
+            self.sums[index] += value
+
+    def quantiles(self, index):
+        values = sorted(sample[index] for sample in self.samples)
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    def __init__(self, window=None):
+        self.window = window
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, view_name, latency, queries, sql_time):
+        window = self.window or getattr(settings, 'REQUEST_METRICS_WINDOW', 1000)
+        with self._lock:
+            series = self._series.get(view_name)
+            if series is None:
+                series = self._series[view_name] = ViewSeries(window)
+            series.add((latency, queries, sql_time))
+
+    def snapshot(self):
+        """``{view_name: {metric: {'quantiles': {...}, 'sum': ..., 'count': ...}}}``"""
+        with self._lock:
+            return {
+                view_name: {
+                    name: {'quantiles': series.quantiles(index), 'sum': series.sums[index], 'count': series.count}
+                    for name, index, _ in METRICS
+                }
+                for view_name, series in sorted(self._series.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot, prefix='brainquest'):
+    lines = []
+    for name, _, help_text in METRICS:
+        metric = f'{prefix}_{name}'
+        lines.append(f'# HELP {metric} {help_text} (quantiles over the last requests in this process)')
+        lines.append(f'# TYPE {metric} summary')
+        for view_name, metrics in snapshot.items():
+            view = _label(view_name)
+            values = metrics[name]
+            for quantile, value in values['quantiles'].items():
+                lines.append(f'{metric}{{view="{view}",quantile="{quantile}"}} {value:.6g}')
+            lines.append(f'{metric}_sum{{view="{view}"}} {values["sum"]:.6g}')
+            lines.append(f'{metric}_count{{view="{view}"}} {values["count"]}')
+    return '\n'.join(lines) + '\n'
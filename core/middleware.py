@@ -0,0 +1,64 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import UNRESOLVED, QueryTimer, registry
+from .routers import PIN_COOKIE, replica_configured
+
+logger = logging.getLogger('core.metrics')
+
+
+class RequestMetricsMiddleware:
+    """Record latency, query count and SQL time per URL name (opt in with REQUEST_METRICS_ENABLED).
+
+    Requests over REQUEST_QUERY_BUDGET queries or REQUEST_LATENCY_BUDGET_MS milliseconds are
+    logged as warnings.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', None)
+        self.latency_budget = getattr(settings, 'REQUEST_LATENCY_BUDGET_MS', None)
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with timer.wrap():
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match and match.view_name else UNRESOLVED
+        registry.record(view_name, latency, timer.count, timer.duration)
+
+        over_queries = self.query_budget is not None and timer.count > self.query_budget
+        over_latency = self.latency_budget is not None and latency * 1000 > self.latency_budget
+        if over_queries or over_latency:
+            logger.warning(
+                'Request over budget: %s %s %s took %.1f ms with %d queries (%.1f ms SQL)',
+                view_name, request.method, request.path, latency * 1000, timer.count, timer.duration * 1000,
+            )
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Keep a client's reads on the primary for REPLICA_PIN_SECONDS after it writes.
+
+    Any non-safe request counts as a write. Only active when a replica is configured.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,102 @@
+import base64
+from datetime import datetime
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min, Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(value, pk):
+    raw = f'{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(datetime, pk)`` for a cursor, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.split('|')
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, field, cursor=None, page_size=20):
+    """Fetch one newest-first page ordered by ``(field, pk)`` without OFFSET.
+
+    Returns ``(items, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        value, pk = position
+        # The leading range keeps the (field, pk) index usable; the OR breaks ties
+        queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(pk__lt=pk)
+        )
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return items, next_cursor
+
+
+def offset_page(queryset, page=None, page_size=20):
+    """Fetch page ``page`` (1-based, as sent in the query string) of an ordered queryset.
+
+    For orderings that have no usable keyset, such as search rank. Returns
+    ``(items, page, has_next)`` without counting the whole result.
+    """
+    try:
+        page = max(int(page), 1)
+    except (TypeError, ValueError):
+        page = 1
+    start = (page - 1) * page_size
+    items = list(queryset[start:start + page_size + 1])
+    return items[:page_size], page, len(items) > page_size
+
+
+def estimate_count(model, using='default'):
+    """A cheap row count for ``model``'s table, or None if there is no estimate.
+
+    PostgreSQL's planner statistics where available; elsewhere the span of the primary
+    key, which is two index lookups and overestimates by the rows deleted.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table has been vacuumed or analyzed
+        return row[0] if row and row[0] >= 0 else None
+    if model._meta.pk.get_internal_type() not in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+        return None
+    # Separate queries: SQLite only answers a lone MIN or MAX from the index
+    manager = model._default_manager.using(using)
+    high = manager.aggregate(value=Max('pk'))['value']
+    if high is None:
+        return 0
+    return high - manager.aggregate(value=Min('pk'))['value'] + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator for changelists of very large tables that avoids a full ``COUNT(*)``.
+
+    An unfiltered listing uses ``estimate_count`` once the table is past
+    ``exact_count_limit`` rows; filtered listings are counted exactly but only up to
+    ``exact_count_limit``, so later pages of a huge match are not reachable by number.
+    """
+    exact_count_limit = 100_000
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.exact_count_limit:
+                return estimate
+            return queryset.count()
+        return queryset.order_by()[:self.exact_count_limit].count()
@@ -0,0 +1,64 @@
+"""Send the reads of analytics, history and export views to a read replica.
+
+The replica is the optional ``replica`` database alias (``DATABASE_REPLICA_URL``). Views
+opt in with ``replica_view``; everything else, and every write, uses ``default``. Inside
+an opted-in view only quiz and result models are read from the replica, so sessions and
+the logged-in user still come from the primary.
+
+A replica trails the primary, so after a user's write ``ReplicaPinMiddleware`` sets a
+short-lived cookie that keeps their reads on the primary; a student who has just
+finished a quiz sees it in their history straight away. Without a replica configured
+all of this is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA = 'replica'
+REPLICA_APPS = {'quizzes', 'results'}
+PIN_COOKIE = 'pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Read quiz and result models from the replica inside this block (if one is configured)"""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_view(view):
+    """Run a read-only view against the replica unless the user was pinned to the primary"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with use_replica(PIN_COOKIE not in request.COOKIES):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label in REPLICA_APPS and replica_configured():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so objects read from the replica are never saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
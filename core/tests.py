@@ -1,3 +1,180 @@
-from django.test import TestCase
+import os
+import tempfile
+from django.conf import settings
+from unittest import skipUnless
+from django.db import connection, connections, router
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from quizzes.models import Question, Quiz
+from results.models import QuizSubmission, UserAnswer
+from users.models import CustomUser
+from .metrics import registry
+from .routers import PIN_COOKIE, REPLICA, use_replica
 
-# Create your tests here.
+
+@override_settings(REQUEST_METRICS_ENABLED=True, METRICS_TOKEN='scrape-me')
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(username='ops', password='pass12345', is_staff=True)
+        cls.student = CustomUser.objects.create_user(username='student', password='pass12345')
+
+    def setUp(self):
+        registry.reset()
+
+    def test_records_samples_per_url_name(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('quizzes:quiz_list'))
+        self.client.get(reverse('quizzes:quiz_list'))
+        self.client.get('/no-such-page/')
+        self.client.post(reverse('quizzes_api:start', args=[999]))
+
+        snapshot = registry.snapshot()
+        quiz_list = snapshot['quizzes:quiz_list']
+        self.assertEqual(quiz_list['request_queries']['count'], 2)
+        self.assertGreater(quiz_list['request_queries']['sum'], 0)
+        self.assertGreater(quiz_list['request_latency_seconds']['quantiles'][0.99], 0)
+        self.assertIn('<unresolved>', snapshot)
+        self.assertGreater(snapshot['quizzes_api:start']['request_queries']['sum'], 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse('quizzes:quiz_list'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.client.force_login(self.staff)
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE brainquest_request_queries summary', body)
+        self.assertIn('brainquest_request_queries_count{view="quizzes:quiz_list"} 1', body)
+        self.assertIn('brainquest_request_sql_seconds{view="quizzes:quiz_list",quantile="0.5"}', body)
+
+        self.client.logout()
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        for header in ('scrape-me', 'Basic scrape-me', 'Bearer scrap\u00e9-me'):
+            with self.subTest(header):
+                self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION=header).status_code, 403)
+
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_requests_over_budget_are_logged(self):
+        self.client.force_login(self.student)
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(reverse('quizzes:quiz_list'))
+        self.assertIn('quizzes:quiz_list GET /quizzes/', logs.output[0])
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.client.get(reverse('home'))
+        self.assertEqual(registry.snapshot(), {})
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """The test database is the primary; a separate SQLite file stands in for the replica.
+
+    The replica is registered after the test runner has created its databases (it has no
+    test database of its own), and ``replicate`` overwrites it with a copy of the primary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        replica = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.replica_path}
+        settings.DATABASES[REPLICA] = replica
+        connections.settings[REPLICA] = connections.configure_settings(
+            {'default': connections.settings['default'], REPLICA: replica}
+        )[REPLICA]
+        cls.databases = {'default', REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        # Usually the same dict as settings.DATABASES
+        connections.settings.pop(REPLICA)
+        settings.DATABASES.pop(REPLICA, None)
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(username='student', password='pass12345')
+        self.quiz = Quiz.objects.create(title='Replicated', duration=10, created_by=self.student)
+        Question.objects.create(quiz=self.quiz, question_text='Q?', option_a='Yes', option_b='No', correct_option='a')
+        self.replicate()
+        self.client.force_login(self.student)
+
+    def replicate(self):
+        primary, replica = connections['default'], connections[REPLICA]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def history(self):
+        response = self.client.get(reverse('results:submission_history'))
+        return [submission.id for submission in response.context['submissions']]
+
+    def test_history_reads_the_replica(self):
+        submission = QuizSubmission.objects.create(user=self.student, quiz=self.quiz, is_completed=True, score=100)
+        self.assertEqual(self.history(), [])
+        self.replicate()
+        self.assertEqual(self.history(), [submission.id])
+
+    def test_quiz_flow_stays_on_the_primary_and_pins_reads(self):
+        response = self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        submission = QuizSubmission.objects.get()
+        self.assertRedirects(response, reverse('quizzes:take_quiz', args=[submission.id]))
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+        question = self.quiz.questions.get()
+        self.client.post(reverse('quizzes:take_quiz', args=[submission.id]), {'answer': 'a', 'question_id': question.id})
+        self.assertTrue(UserAnswer.objects.filter(submission=submission, question=question).exists())
+        submission.refresh_from_db()
+        self.assertTrue(submission.is_completed)
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+        # Not replicated yet, but this client just wrote, so it reads the primary
+        self.assertEqual(self.history(), [submission.id])
+
+    def test_dashboard_summary_is_built_from_the_primary(self):
+        # start_quiz is a GET, so it writes without pinning the client
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+        response = self.client.get(reverse('results:dashboard'))
+        self.assertEqual(len(response.context['summary']['recent_submissions']), 1)
+
+    def test_writes_always_go_to_the_primary(self):
+        with use_replica():
+            self.assertEqual(router.db_for_read(QuizSubmission), REPLICA)
+            self.assertEqual(router.db_for_read(CustomUser), 'default')
+            self.assertEqual(router.db_for_write(QuizSubmission), 'default')
+        self.assertEqual(router.db_for_read(QuizSubmission), 'default')
+
+
+class ReplicaFallbackTests(TestCase):
+    def test_reads_stay_on_the_primary_without_a_replica(self):
+        with use_replica():
+            self.assertEqual(router.db_for_read(QuizSubmission), 'default')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite profile')
+class SqliteProfileTests(TestCase):
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_tuned_profile(self):
+        # Built explicitly rather than from SQLITE_PROFILE, which the environment may override;
+        # on a file, since the in-memory test database has no WAL
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = type(connections['default'])({
+                **connection.settings_dict,
+                'NAME': os.path.join(directory, 'tuned.sqlite3'),
+                'OPTIONS': settings.SQLITE_PROFILES['tuned'],
+            }, 'tuned-check')
+            try:
+                self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+                self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+                self.assertEqual(self.pragma(wrapper, 'busy_timeout'), settings.SQLITE_BUSY_TIMEOUT_MS)
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
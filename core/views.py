@@ -1,4 +1,22 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from .metrics import registry, render_prometheus
 
 def home(request):
-    return render(request, 'core/home.html')
\ No newline at end of file
+    return render(request, 'core/home.html')
+
+def metrics(request):
+    """Per-view request metrics in Prometheus text format (staff or METRICS_TOKEN bearer only)"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, bearer = request.headers.get('Authorization', '').partition(' ')
+    authorized = request.user.is_authenticated and (
+        request.user.is_staff or getattr(request.user, 'role', None) == 'admin'
+    )
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str
+    bearer_ok = token and scheme == 'Bearer' and hmac.compare_digest(bearer.encode(), token.encode())
+    if not authorized and not bearer_ok:
+        return HttpResponseForbidden("You don't have permission to view metrics.")
+    
+    return HttpResponse(render_prometheus(registry.snapshot()), content_type='text/plain; version=0.0.4')
@@ -41,10 +41,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -92,6 +94,107 @@ else:
         }
     }
 
+# SQLite tuning (SQLITE_PROFILE), applied whenever the default database is SQLite:
+#   tuned    WAL journal, so readers never block the writer; synchronous=NORMAL, which
+#            survives application crashes but may lose the last commits on power loss;
+#            a busy timeout so writers queue instead of failing with "database is locked";
+#            a larger page cache and memory-mapped reads; and BEGIN IMMEDIATE, so a write
+#            transaction takes the write lock up front instead of failing to upgrade to it
+#   default  SQLite's own settings
+# tuned is opt-in: WAL is a persistent property of the file (and leaves -wal/-shm files
+# next to it), and requires all workers to share the file on one host's local filesystem
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+            'PRAGMA mmap_size=268435456',  # 256 MiB
+            'PRAGMA cache_size=-32768',  # 32 MiB per connection
+        ]),
+        'transaction_mode': 'IMMEDIATE',
+    },
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).update(SQLITE_PROFILES[SQLITE_PROFILE])
+
+# Optional read replica for analytics, history and export views (see core.routers)
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.config(
+        default=DATABASE_REPLICA_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    # Test runs have no replication, so the replica alias shares the test database
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# How long a client's reads stay on the primary after it writes, to hide replication lag
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '10'))
+
+# Cache configuration
+# Local-memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared cache in production
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'brainquest'),
+    }
+}
+
+# Cached quiz papers (ordered questions and prebuilt choices) used by take_quiz
+QUIZ_PAPER_CACHE = 'default'
+QUIZ_PAPER_CACHE_TIMEOUT = int(os.environ.get('QUIZ_PAPER_CACHE_TIMEOUT', 3600))
+
+# Cached dashboard summaries and fragments; versioned, so the timeout only bounds how long
+# time-based figures (e.g. "last 7 days") can lag
+DASHBOARD_CACHE = 'default'
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+
+# Per-view latency/query metrics served at /metrics; off unless REQUEST_METRICS_ENABLED=True.
+# Requests over either budget are logged as warnings by the core.metrics logger
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'False').lower() == 'true'
+REQUEST_METRICS_WINDOW = int(os.environ.get('REQUEST_METRICS_WINDOW', 1000))
+REQUEST_QUERY_BUDGET = int(os.environ['REQUEST_QUERY_BUDGET']) if os.environ.get('REQUEST_QUERY_BUDGET') else None
+REQUEST_LATENCY_BUDGET_MS = float(os.environ['REQUEST_LATENCY_BUDGET_MS']) if os.environ.get('REQUEST_LATENCY_BUDGET_MS') else None
+# Lets a Prometheus scraper read /metrics with "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Write-behind answer buffer (see results/buffer.py): when set, answers are logged to an
+# append-only file in this directory and inserted in batches by
+# `manage.py flush_answer_buffer --interval N`, run on each host. The directory must be on
+# local disk and shared by every worker process of the host, and all requests of an
+# attempt must reach the same host
+ANSWER_BUFFER_DIR = os.environ.get('ANSWER_BUFFER_DIR', '')
+ANSWER_BUFFER_BATCH_SIZE = int(os.environ.get('ANSWER_BUFFER_BATCH_SIZE', 1000))
+
+# Session storage profile (SESSION_PROFILE):
+#   db              every request reads the session row (Django's default)
+#   cached_db       reads from the cache, falling back to the database; writes go to both
+#   signed_cookies  no server-side storage at all; sessions can't be revoked server-side
+#                   before they expire, so keep SESSION_COOKIE_AGE short
+# cached_db needs a cache shared by all workers (see CACHE_BACKEND) to help across processes
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+SESSION_COOKIE_AGE = int(os.environ.get('SESSION_COOKIE_AGE', 60 * 60 * 24 * 14))
+
+# Logged-in users are loaded from this cache instead of the database on each request
+# (users.backends.CachedModelBackend); USER_CACHE_TIMEOUT=0 turns the cache off. Off by
+# default with a per-process cache, which would let other workers keep serving a
+# deactivated or changed user until the entry expires
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE = 'default'
+USER_CACHE_TIMEOUT = int(os.environ.get(
+    'USER_CACHE_TIMEOUT', 0 if CACHES[USER_CACHE]['BACKEND'].endswith('LocMemCache') else 300
+))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
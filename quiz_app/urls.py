@@ -2,13 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from core.views import home
+from core.views import home, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', home, name='home'),
+    path('metrics', metrics, name='metrics'),
     path('users/', include('users.urls')),
     path('quizzes/', include('quizzes.urls')),
+    path('api/quizzes/', include('quizzes.api_urls')),
     path('results/', include('results.urls')),
 ]  
 
@@ -1,14 +1,126 @@
-from django.contrib import admin
+import io
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from core.pagination import EstimatedCountPaginator
+from results.scoring import regrade_quiz
+from .bank import EXPORTERS, PARSERS, QuestionImportError, guess_format, import_questions
+from .forms import QuestionImportForm
 from .models import Quiz, Question
+from .search import search
+
+class RankedSearchMixin:
+    """Admin search through the full-text index, best matches first unless a column is sorted"""
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        results = search(queryset, search_term)
+        if ORDER_VAR in request.GET:
+            # Keep the changelist's column ordering instead of the rank
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
+
+class RecentQuizFilter(admin.SimpleListFilter):
+    """Quiz filter that offers the newest quizzes instead of loading the whole catalogue"""
+    title = 'quiz'
+    parameter_name = 'quiz'
+    limit = 20
+    
+    def lookups(self, request, model_admin):
+        choices = list(Quiz.objects.order_by('-created_at', '-id').values_list('id', 'title')[:self.limit])
+        selected = self.value()
+        if selected and selected.isdigit() and int(selected) not in dict(choices):
+            choices += list(Quiz.objects.filter(pk=selected).values_list('id', 'title'))
+        return choices
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            if not self.value().isdigit():
+                raise IncorrectLookupParameters(f'Invalid quiz id {self.value()!r}')
+            return queryset.filter(quiz_id=self.value())
+        return queryset
 
 @admin.register(Quiz)
-class QuizAdmin(admin.ModelAdmin):
+class QuizAdmin(RankedSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'created_by', 'duration', 'created_at', 'is_active')
     list_filter = ('is_active', 'created_at')
     search_fields = ('title', 'description')
+    list_select_related = ('created_by',)
+    autocomplete_fields = ('created_by',)
+    actions = ['regrade_answers']
+    
+    @admin.action(description='Re-grade stored answers against the current answer key')
+    def regrade_answers(self, request, queryset):
+        changed = sum(regrade_quiz(quiz) for quiz in queryset)
+        self.message_user(request, f'Re-graded {queryset.count()} quizzes; {changed} answers changed.')
+    
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_questions_view), name='quizzes_quiz_import'),
+            path('<int:quiz_id>/export/<str:fmt>/', self.admin_site.admin_view(self.export_questions_view),
+                 name='quizzes_quiz_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_questions_view(self, request):
+        """Upload a CSV/JSON/GIFT question bank into a new or existing quiz"""
+        if not self.has_add_permission(request):
+            return redirect('admin:quizzes_quiz_changelist')
+        
+        form = QuestionImportForm(request.POST or None, request.FILES or None)
+        errors = []
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            parse = PARSERS[form.cleaned_data['format'] or guess_format(upload.name)]
+            # Decode the upload lazily so large banks are parsed as they are read
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                with transaction.atomic():
+                    quiz = form.cleaned_data['quiz'] or Quiz.objects.create(
+                        title=form.cleaned_data['title'],
+                        duration=form.cleaned_data['duration'],
+                        created_by=request.user,
+                    )
+                    created = import_questions(quiz, parse(stream))
+            except (QuestionImportError, UnicodeDecodeError) as exc:
+                errors = getattr(exc, 'errors', [str(exc)])
+                self.message_user(request, 'Import aborted; nothing was saved.', messages.ERROR)
+            else:
+                self.message_user(request, f'Imported {created} questions into "{quiz.title}".')
+                return redirect('admin:quizzes_quiz_change', quiz.id)
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import questions',
+            'form': form,
+            'errors': errors,
+        }
+        return TemplateResponse(request, 'admin/quizzes/quiz/import_questions.html', context)
+    
+    def export_questions_view(self, request, quiz_id, fmt):
+        quiz = get_object_or_404(Quiz, pk=quiz_id)
+        if fmt not in EXPORTERS or not self.has_view_permission(request, quiz):
+            return redirect('admin:quizzes_quiz_changelist')
+        stream, content_type = EXPORTERS[fmt]
+        response = StreamingHttpResponse(stream(quiz.id), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="quiz-{quiz.id}-questions.{fmt}"'
+        return response
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(RankedSearchMixin, admin.ModelAdmin):
     list_display = ('question_text', 'quiz', 'question_type', 'points', 'created_at')
-    list_filter = ('question_type', 'quiz')
-    search_fields = ('question_text',)
\ No newline at end of file
+    list_filter = ('question_type', RecentQuizFilter)
+    search_fields = ('question_text', 'option_a', 'option_b', 'option_c', 'option_d')
+    list_select_related = ('quiz',)
+    autocomplete_fields = ('quiz',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Newest first along the primary key instead of sorting the bank by created_at
+    ordering = ('-pk',)
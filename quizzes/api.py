@@ -0,0 +1,205 @@
+"""JSON API for taking a quiz without a page round-trip per question.
+
+A client fetches the whole paper (without answer keys) in one request, starts or resumes
+an attempt (which returns the attempt's own questions for randomized quizzes), then posts
+answers one at a time or all at once; each batch is graded and stored with one bulk
+INSERT and one progress UPDATE (see ``QuizSubmission.record_answers``).
+
+The views are plain sync views: each does a few short queries, and the app is served by
+gunicorn over WSGI, where async views would only add an event loop per request.
+"""
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from results.forms import QuizAnswerForm
+from results.models import QuizSubmission
+from .models import Quiz
+from .paper import get_paper
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _progress(submission, paper, include_questions=False):
+    questions = submission.questions_for(paper)
+    data = {
+        'submission_id': submission.id,
+        'quiz_id': submission.quiz_id,
+        'answered_question_ids': submission.answered_question_ids,
+        'answered_count': submission.answered_count,
+        'total_questions': len(questions),
+        'is_completed': submission.is_completed,
+        'seconds_remaining': 0 if submission.is_completed else int(submission.seconds_remaining()),
+    }
+    if submission.is_completed:
+        data['score'] = round(submission.score, 1)
+        data['correct_answers'] = submission.correct_answers
+    if include_questions:
+        data['questions'] = _attempt_questions(submission, paper, questions)
+    return data
+
+
+def _attempt_questions(submission, paper, questions):
+    """The public question dicts in this attempt's order, with its option order applied"""
+    public = {question['id']: question for question in paper.public_questions}
+    result = []
+    for question in questions:
+        choices = submission.choices_for(question, paper.choices[question.id])
+        if choices is paper.choices[question.id]:
+            result.append(public[question.id])
+        else:
+            result.append({
+                **public[question.id],
+                'choices': [{'value': value, 'label': label} for value, label in choices],
+            })
+    return result
+
+
+def _parse_answers(body):
+    """Accept ``{"question_id": 1, "answer": "a"}`` or ``{"answers": [{...}, ...]}``"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    items = payload['answers'] if 'answers' in payload else [payload]
+    if not isinstance(items, list) or not items:
+        return None
+    for item in items:
+        if not isinstance(item, dict) or type(item.get('question_id')) is not int:
+            return None
+    return items
+
+
+def _start(user, quiz_id):
+    quiz = Quiz.objects.filter(id=quiz_id, is_active=True).first()
+    if quiz is None:
+        return 404, {'error': 'Quiz not found'}
+    submission, created = QuizSubmission.resume_or_start(user, quiz)
+    return 201 if created else 200, _progress(submission, get_paper(quiz_id), include_questions=True)
+
+
+def _load(user, submission_id):
+    submission = QuizSubmission.objects.select_related('quiz').filter(id=submission_id, user=user).first()
+    if submission is None:
+        return None, None
+    return submission, get_paper(submission.quiz_id)
+
+
+def _attempt_progress(user, submission_id):
+    submission, paper = _load(user, submission_id)
+    if submission is None:
+        return 404, {'error': 'Submission not found'}
+    return 200, _progress(submission, paper, include_questions=True)
+
+
+def _submit_answers(user, submission_id, items):
+    submission, paper = _load(user, submission_id)
+    if submission is None:
+        return 404, {'error': 'Submission not found'}
+    if submission.is_completed:
+        return 409, {'error': 'This attempt is already completed', **_progress(submission, paper)}
+    attempt_questions = submission.questions_for(paper)
+    if submission.seconds_remaining() <= 0:
+        submission.complete(attempt_questions)
+        return 409, {'error': 'Time is up', **_progress(submission, paper)}
+
+    # Validate the whole batch before writing anything; only this attempt's questions count
+    questions = {question.id: question for question in attempt_questions}
+    responses = []
+    errors = {}
+    for item in items:
+        question = questions.get(item['question_id'])
+        if question is None:
+            errors[str(item['question_id'])] = ['Not a question in this quiz.']
+            continue
+        answer = item.get('answer')
+        form = QuizAnswerForm(
+            {'answer': '' if answer is None else str(answer)},
+            question=question,
+            choices=submission.choices_for(question, paper.choices[question.id]),
+        )
+        if form.is_valid():
+            responses.append((question, form.cleaned_data['answer']))
+        else:
+            errors[str(question.id)] = form.errors['answer']
+    if errors:
+        return 400, {'error': 'Invalid answers', 'errors': errors}
+
+    answered = set(submission.answered_question_ids)
+    pending = any(question.id not in answered for question, _ in responses)
+    recorded = submission.record_answers(responses)
+    if pending and not recorded:
+        # Nothing from this batch was stored: either the deadline passed or a concurrent
+        # request moved this attempt on first
+        if submission.seconds_remaining() <= 0:
+            submission.complete(attempt_questions)
+            return 409, {'error': 'Time is up', **_progress(submission, paper)}
+        submission, paper = _load(user, submission_id)
+        return 409, {'error': 'Attempt changed concurrently, retry', **_progress(submission, paper)}
+
+    if submission.next_question(attempt_questions) is None:
+        submission.complete(attempt_questions)
+
+    return 200, {
+        'recorded_question_ids': [user_answer.question_id for user_answer in recorded],
+        **_progress(submission, paper),
+    }
+
+
+@require_GET
+def quiz_paper(request, quiz_id):
+    if not request.user.is_authenticated:
+        return _error('Authentication required', 401)
+
+    quiz = Quiz.objects.filter(id=quiz_id, is_active=True).first()
+    if quiz is None:
+        return _error('Quiz not found', 404)
+
+    paper = get_paper(quiz_id)
+    data = {
+        'quiz': {'id': quiz.id, 'title': quiz.title, 'description': quiz.description, 'duration': quiz.duration},
+        'randomized': quiz.is_randomized,
+        'total_points': paper.total_points,
+        'questions': paper.public_questions,
+    }
+    if quiz.is_randomized:
+        # Each attempt draws its own questions; they come back from the start endpoint
+        data['total_points'] = None
+        data['questions'] = None
+    return JsonResponse(data)
+
+
+@require_POST
+def start_attempt(request, quiz_id):
+    if not request.user.is_authenticated:
+        return _error('Authentication required', 401)
+
+    status, payload = _start(request.user, quiz_id)
+    return JsonResponse(payload, status=status)
+
+
+@require_GET
+def attempt_progress(request, submission_id):
+    if not request.user.is_authenticated:
+        return _error('Authentication required', 401)
+
+    status, payload = _attempt_progress(request.user, submission_id)
+    return JsonResponse(payload, status=status)
+
+
+@require_POST
+def submit_answers(request, submission_id):
+    if not request.user.is_authenticated:
+        return _error('Authentication required', 401)
+
+    items = _parse_answers(request.body)
+    if items is None:
+        return _error('Expected {"question_id": ..., "answer": ...} or {"answers": [...]}', 400)
+
+    status, payload = _submit_answers(request.user, submission_id, items)
+    return JsonResponse(payload, status=status)
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import api
+
+app_name = 'quizzes_api'
+
+urlpatterns = [
+    path('<int:quiz_id>/', api.quiz_paper, name='paper'),
+    path('<int:quiz_id>/start/', api.start_attempt, name='start'),
+    path('submission/<int:submission_id>/', api.attempt_progress, name='progress'),
+    path('submission/<int:submission_id>/answers/', api.submit_answers, name='answers'),
+]
@@ -0,0 +1,344 @@
+"""Bulk import and export of question banks as CSV, JSON or GIFT.
+
+Parsers read the file incrementally and yield ``(location, row)`` pairs, where ``row`` is a
+dict of ``Question`` fields (or a ``ValidationError`` for an entry that could not be parsed
+into one). ``import_questions`` validates every row with the model's own rules and inserts
+them with batched ``bulk_create`` inside a single transaction, so a bank either loads
+completely or not at all. The ``stream_*`` exporters write the same formats back out.
+"""
+import csv
+import json
+import re
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from results.export import Echo
+from results.models import QuestionStats
+from .models import Question
+from .paper import invalidate_paper
+
+FIELDS = ['question_text', 'question_type', 'option_a', 'option_b', 'option_c', 'option_d',
+          'correct_option', 'correct_answer', 'tolerance', 'points']
+FORMATS = ('csv', 'json', 'gift')
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+JSON_READ_SIZE = 64 * 1024
+
+
+class QuestionImportError(ValueError):
+    """Raised when a bank contains invalid entries; nothing has been written"""
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} invalid entries; first: {errors[0]}')
+
+
+def guess_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('json', 'jsonl'):
+        return 'json'
+    if extension in ('gift', 'txt'):
+        return 'gift'
+    return 'csv'
+
+
+# --- Parsers -----------------------------------------------------------------------------
+
+def parse_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # DictReader puts surplus cells under the None key
+        if None in row:
+            row['(extra cells)'] = row.pop(None)
+        yield f'line {reader.line_num}', row
+
+
+def parse_json(stream):
+    """A JSON array of question objects, or JSON Lines with one object per line"""
+    buffer = stream.read(JSON_READ_SIZE).lstrip()
+    if buffer.startswith('['):
+        yield from _parse_json_array(stream, buffer[1:])
+        return
+    number = 0
+    for line in _lines(buffer, stream):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            raise QuestionImportError([f'line {number}: invalid JSON ({exc})'])
+        yield f'line {number}', item if isinstance(item, dict) else ValidationError('Expected a JSON object.')
+
+
+def _lines(buffer, stream):
+    pending = buffer
+    while True:
+        chunk = stream.read(JSON_READ_SIZE)
+        pending += chunk
+        *lines, pending = pending.split('\n')
+        yield from lines
+        if not chunk:
+            if pending:
+                yield pending
+            return
+
+
+def _parse_json_array(stream, buffer):
+    decoder = json.JSONDecoder()
+    number = 0
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if number and buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            # Items are objects, so a truncated one never decodes; read more and retry
+            item, end = decoder.raw_decode(buffer)
+        except ValueError as exc:
+            if eof:
+                raise QuestionImportError([f'item {number + 1}: invalid JSON ({exc})'])
+            chunk = stream.read(JSON_READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        number += 1
+        buffer = buffer[end:]
+        yield f'item {number}', item if isinstance(item, dict) else ValidationError('Expected a JSON object.')
+
+
+GIFT_SPECIAL = '~=#{}:'
+GIFT_TRUE = ('t', 'true')
+GIFT_FALSE = ('f', 'false')
+
+
+def parse_gift(stream):
+    """Moodle GIFT: multiple choice, true/false, short answer and numeric questions.
+
+    Questions are separated by blank lines; ``//`` comments, titles, feedback and answer
+    weights are ignored. GIFT has no notion of points, so every question is worth 1.
+    """
+    block = []
+    start = 0
+    for number, line in enumerate(stream, 1):
+        stripped = line.strip()
+        if stripped.startswith('//'):
+            continue
+        if stripped:
+            if not block:
+                start = number
+            block.append(line.rstrip('\r\n'))
+        elif block:
+            yield f'line {start}', _gift_question('\n'.join(block))
+            block = []
+    if block:
+        yield f'line {start}', _gift_question('\n'.join(block))
+
+
+def _gift_split(text, separators):
+    """Split on unescaped separator characters, keeping each separator with its part"""
+    parts = []
+    current = ''
+    escaped = False
+    for char in text:
+        if escaped:
+            current += char
+            escaped = False
+        elif char == '\\':
+            current += char
+            escaped = True
+        elif char in separators:
+            parts.append(current)
+            current = char
+        else:
+            current += char
+    parts.append(current)
+    return parts
+
+
+def _gift_unescape(text):
+    return re.sub(r'\\(.)', r'\1', text).strip()
+
+
+def _gift_strip_feedback(answer):
+    # "=Paris#Correct!" -> "Paris"; "~%50%Lyon" -> "Lyon"
+    answer = _gift_split(answer, '#')[0]
+    return re.sub(r'^%-?\d+(\.\d+)?%', '', answer)
+
+
+def _gift_question(block):
+    # Drop the optional ::title:: prefix
+    text = re.sub(r'^::(?:\\.|[^\\])*?::', '', block, flags=re.DOTALL)
+    text = re.sub(r'^\s*\[\w+\]', '', text)
+
+    pieces = _gift_split(text, '{}')
+    if len(pieces) != 3 or not pieces[1].startswith('{') or not pieces[2].startswith('}'):
+        return ValidationError('Expected exactly one {answers} section.')
+    before, answers, after = pieces[0], pieces[1][1:].strip(), pieces[2][1:]
+    question_text = _gift_unescape(before)
+    if after.strip():
+        question_text = f'{question_text} _____ {_gift_unescape(after)}'
+    row = {'question_text': question_text}
+
+    if not answers:
+        return ValidationError('Essay questions are not supported.')
+    if answers.startswith('#'):
+        value = _gift_strip_feedback(answers[1:])
+        if '..' in value:
+            low, high = value.split('..', 1)
+            try:
+                low, high = float(low), float(high)
+            except ValueError:
+                return ValidationError(f'Invalid numeric range "{value}".')
+            return {**row, 'question_type': 'numeric', 'correct_answer': str((low + high) / 2),
+                    'tolerance': (high - low) / 2}
+        target, _, tolerance = value.partition(':')
+        return {**row, 'question_type': 'numeric', 'correct_answer': target.strip(), 'tolerance': tolerance.strip()}
+
+    verdict = _gift_strip_feedback(answers).strip().lower()
+    if verdict in GIFT_TRUE or verdict in GIFT_FALSE:
+        return {**row, 'question_type': 'true_false', 'correct_option': 'a' if verdict in GIFT_TRUE else 'b'}
+
+    options = [part for part in _gift_split(answers, '=~') if part.strip()]
+    if any(not part.startswith(('=', '~')) for part in options):
+        return ValidationError('Answers must start with "=" or "~".')
+    if any('->' in part for part in options):
+        return ValidationError('Matching questions are not supported.')
+    values = [(part[0], _gift_unescape(_gift_strip_feedback(part[1:]))) for part in options]
+
+    if any(marker == '~' for marker, _ in values):
+        if len(values) > 4:
+            return ValidationError('Multiple choice questions can have at most four options.')
+        correct = [index for index, (marker, _) in enumerate(values) if marker == '=']
+        if len(correct) != 1:
+            return ValidationError('Multiple choice questions need exactly one "=" answer.')
+        for letter, (_, value) in zip('abcd', values):
+            row[f'option_{letter}'] = value
+        return {**row, 'question_type': 'mcq', 'correct_option': 'abcd'[correct[0]]}
+
+    accepted = [value for _, value in values]
+    if len(accepted) == 1 and not accepted[0].startswith('/'):
+        return {**row, 'question_type': 'short_answer', 'correct_answer': accepted[0]}
+    return {**row, 'question_type': 'multi_answer', 'correct_answer': '\n'.join(accepted)}
+
+
+PARSERS = {'csv': parse_csv, 'json': parse_json, 'gift': parse_gift}
+
+
+# --- Import ------------------------------------------------------------------------------
+
+def build_question(quiz, row):
+    """Turn a parsed row into an unsaved, fully validated Question"""
+    if isinstance(row, ValidationError):
+        raise row
+    unknown = set(row) - set(FIELDS)
+    if unknown:
+        raise ValidationError(f'Unknown fields: {", ".join(sorted(unknown))}.')
+    # Missing and empty cells fall back to the model defaults
+    values = {field: value for field, value in row.items() if value not in (None, '')}
+    question = Question(quiz=quiz, **values)
+    question.full_clean(exclude=['quiz'], validate_unique=False, validate_constraints=False)
+    return question
+
+
+def _describe(error):
+    if hasattr(error, 'error_dict'):
+        return '; '.join(f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items())
+    return ' '.join(error.messages)
+
+
+def import_questions(quiz, rows, batch_size=IMPORT_BATCH_SIZE, max_errors=50):
+    """Validate and insert parsed rows into ``quiz``; returns the number of questions created.
+
+    Raises ``QuestionImportError`` listing up to ``max_errors`` invalid rows, in which case
+    the transaction is rolled back and nothing is written.
+    """
+    errors = []
+    created = 0
+    batch = []
+    with transaction.atomic():
+        for location, row in rows:
+            try:
+                question = build_question(quiz, row)
+            except ValidationError as exc:
+                errors.append(f'{location}: {_describe(exc)}')
+                if len(errors) >= max_errors:
+                    break
+                continue
+            if errors:
+                # Keep validating to report every problem, but stop buffering rows
+                continue
+            batch.append(question)
+            if len(batch) >= batch_size:
+                created += _insert(batch)
+                batch = []
+        if errors:
+            raise QuestionImportError(errors)
+        if batch:
+            created += _insert(batch)
+
+    if created:
+        invalidate_paper(quiz.id)
+    return created
+
+
+def _insert(questions):
+    # bulk_create skips post_save, so create the stats rows the receiver would have
+    Question.objects.bulk_create(questions)
+    QuestionStats.objects.bulk_create([QuestionStats(question=question) for question in questions])
+    return len(questions)
+
+
+# --- Export ------------------------------------------------------------------------------
+
+def _questions(quiz_id):
+    return Question.objects.filter(quiz_id=quiz_id).values(*FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(quiz_id):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for question in _questions(quiz_id):
+        yield writer.writerow([question[field] for field in FIELDS])
+
+
+def stream_json(quiz_id):
+    """A JSON array written one question per line"""
+    yield '['
+    separator = '\n'
+    for question in _questions(quiz_id):
+        yield separator + json.dumps(question)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def _gift_escape(text):
+    return ''.join(f'\\{char}' if char in GIFT_SPECIAL else char for char in text)
+
+
+def stream_gift(quiz_id):
+    for number, question in enumerate(_questions(quiz_id), 1):
+        question_type = question['question_type']
+        if question_type == 'true_false':
+            answers = 'T' if question['correct_option'] == 'a' else 'F'
+        elif question_type == 'mcq':
+            answers = '\n'.join(
+                f"{'=' if question['correct_option'] == letter else '~'}{_gift_escape(question[f'option_{letter}'])}"
+                for letter in 'abcd' if question[f'option_{letter}']
+            )
+            answers = f'\n{answers}\n'
+        elif question_type == 'numeric':
+            answers = f"#{question['correct_answer']}:{question['tolerance']:g}"
+        else:
+            answers = ' '.join(
+                f'={_gift_escape(line.strip())}' for line in question['correct_answer'].splitlines() if line.strip()
+            )
+        yield f"::Q{number}:: {_gift_escape(question['question_text'])} {{{answers}}}\n\n"
+
+
+EXPORTERS = {
+    'csv': (stream_csv, 'text/csv'),
+    'json': (stream_json, 'application/json'),
+    'gift': (stream_gift, 'text/plain'),
+}
@@ -0,0 +1,18 @@
+from django.core import checks
+from django.db import connections
+from .search import missing_triggers
+
+
+@checks.register(checks.Tags.database)
+def check_search_triggers(app_configs, databases=None, **kwargs):
+    """Warn when a table-remaking migration dropped the SQLite search triggers"""
+    warnings = []
+    for alias in databases or []:
+        missing = missing_triggers(connections[alias])
+        if missing:
+            warnings.append(checks.Warning(
+                f'Full-text search triggers are missing: {", ".join(missing)}.',
+                hint='Run `manage.py rebuild_search_index` to recreate them and reindex.',
+                id='quizzes.W001',
+            ))
+    return warnings
@@ -4,17 +4,20 @@ from .models import Quiz, Question
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
-        fields = ['title', 'description', 'duration']
+        fields = ['title', 'description', 'duration', 'questions_per_attempt', 'shuffle_questions', 'shuffle_options']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'duration': forms.NumberInput(attrs={'class': 'form-control'}),
+            'questions_per_attempt': forms.NumberInput(attrs={'class': 'form-control'}),
+            'shuffle_questions': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+            'shuffle_options': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
 class QuestionForm(forms.ModelForm):
     class Meta:
         model = Question
-        fields = ['question_text', 'question_type', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option', 'correct_answer', 'points']
+        fields = ['question_text', 'question_type', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option', 'correct_answer', 'tolerance', 'points']
         widgets = {
             'question_text': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'question_type': forms.Select(attrs={'class': 'form-control', 'id': 'question-type'}),
@@ -24,5 +27,21 @@ class QuestionForm(forms.ModelForm):
             'option_d': forms.TextInput(attrs={'class': 'form-control'}),
             'correct_option': forms.Select(attrs={'class': 'form-control'}),
             'correct_answer': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
+            'tolerance': forms.NumberInput(attrs={'class': 'form-control', 'step': 'any'}),
             'points': forms.NumberInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+class QuestionImportForm(forms.Form):
+    FORMAT_CHOICES = [('', 'From file extension'), ('csv', 'CSV'), ('json', 'JSON'), ('gift', 'GIFT')]
+    
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    quiz = forms.ModelChoiceField(queryset=Quiz.objects.all(), required=False, help_text="Append to an existing quiz")
+    title = forms.CharField(max_length=200, required=False, help_text="...or create a new quiz with this title")
+    duration = forms.IntegerField(min_value=1, initial=30, help_text="Duration in minutes for a new quiz")
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if bool(cleaned_data.get('quiz')) == bool(cleaned_data.get('title')):
+            raise forms.ValidationError("Choose an existing quiz or enter a title for a new one.")
+        return cleaned_data
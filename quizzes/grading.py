@@ -0,0 +1,117 @@
+import re
+from functools import lru_cache
+
+GRADERS = {}
+
+
+def register(*question_types):
+    """Register a grader class for one or more question types"""
+    def decorator(grader_class):
+        for question_type in question_types:
+            GRADERS[question_type] = grader_class()
+        return grader_class
+    return decorator
+
+
+def normalize(text):
+    """Case-fold and collapse whitespace so trivially different answers compare equal"""
+    return ' '.join(text.split()).casefold()
+
+
+class Grader:
+    """Compiles a question's answer key once, then grades responses against it"""
+    # UserAnswer field the response is stored in
+    answer_field = 'answer_text'
+
+    def compile(self, correct_option, correct_answer, tolerance):
+        raise NotImplementedError
+
+    def grade(self, key, response):
+        raise NotImplementedError
+
+
+@register('mcq', 'true_false')
+class ChoiceGrader(Grader):
+    answer_field = 'chosen_option'
+
+    def compile(self, correct_option, correct_answer, tolerance):
+        return correct_option.lower()
+
+    def grade(self, key, response):
+        return response.lower() == key
+
+
+@register('short_answer')
+class ShortAnswerGrader(Grader):
+    def compile(self, correct_option, correct_answer, tolerance):
+        return normalize(correct_answer)
+
+    def grade(self, key, response):
+        return normalize(response) == key
+
+
+@register('numeric')
+class NumericGrader(Grader):
+    def compile(self, correct_option, correct_answer, tolerance):
+        try:
+            return float(correct_answer), abs(tolerance)
+        except ValueError:
+            raise ValueError(f"'{correct_answer}' is not a number")
+
+    def grade(self, key, response):
+        target, tolerance = key
+        try:
+            value = float(response.strip())
+        except ValueError:
+            return False
+        return abs(value - target) <= tolerance
+
+
+@register('multi_answer')
+class AcceptedAnswersGrader(Grader):
+    """One accepted answer per line; lines written as /pattern/ are regular expressions"""
+
+    def compile(self, correct_option, correct_answer, tolerance):
+        literals = set()
+        patterns = []
+        for line in correct_answer.splitlines():
+            line = line.strip()
+            if len(line) > 1 and line.startswith('/') and line.endswith('/'):
+                try:
+                    patterns.append(re.compile(line[1:-1], re.IGNORECASE))
+                except re.error as exc:
+                    raise ValueError(f"Invalid pattern {line}: {exc}")
+            elif line:
+                literals.add(normalize(line))
+        return frozenset(literals), tuple(patterns)
+
+    def grade(self, key, response):
+        literals, patterns = key
+        if normalize(response) in literals:
+            return True
+        response = response.strip()
+        return any(pattern.fullmatch(response) for pattern in patterns)
+
+
+def get_grader(question_type):
+    return GRADERS[question_type]
+
+
+@lru_cache(maxsize=4096)
+def _compiled_key(question_type, correct_option, correct_answer, tolerance):
+    # Keyed on the answer key itself, so editing a question naturally misses the cache
+    return GRADERS[question_type].compile(correct_option, correct_answer, tolerance)
+
+
+def compile_key(question):
+    """Return the precompiled answer key for a question, raising ValueError if it is malformed"""
+    return _compiled_key(question.question_type, question.correct_option, question.correct_answer, question.tolerance)
+
+
+def grade(question, response):
+    """Grade a raw response against the question's cached answer key"""
+    try:
+        key = compile_key(question)
+    except ValueError:
+        return False
+    return GRADERS[question.question_type].grade(key, response)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from quizzes.bank import EXPORTERS, FORMATS
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Stream a quiz's questions as CSV, JSON or GIFT"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='Write to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if not Quiz.objects.filter(pk=options['quiz_id']).exists():
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist")
+
+        stream, _ = EXPORTERS[options['format']]
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+                fh.writelines(stream(options['quiz_id']))
+        else:
+            for chunk in stream(options['quiz_id']):
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from quizzes.bank import FORMATS, PARSERS, QuestionImportError, guess_format, import_questions
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Import a question bank from a CSV, JSON or GIFT file into a new or existing quiz'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--quiz', type=int, help='Append to this quiz id')
+        parser.add_argument('--title', help='Create a new quiz with this title')
+        parser.add_argument('--duration', type=int, default=30, help='Duration in minutes for a new quiz')
+        parser.add_argument('--created-by', help='Username owning a new quiz')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if bool(options['quiz']) == bool(options['title']):
+            raise CommandError('Pass exactly one of --quiz or --title')
+        parse = PARSERS[options['format'] or guess_format(options['path'])]
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream, transaction.atomic():
+                quiz = self.get_quiz(options)
+                created = import_questions(quiz, parse(stream), batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except QuestionImportError as exc:
+            for error in exc.errors:
+                self.stderr.write(error)
+            raise CommandError(f'Import aborted: {len(exc.errors)} invalid entries, nothing was saved')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} questions into "{quiz.title}" (#{quiz.id}) in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def get_quiz(self, options):
+        if options['quiz']:
+            try:
+                return Quiz.objects.get(pk=options['quiz'])
+            except Quiz.DoesNotExist:
+                raise CommandError(f"Quiz {options['quiz']} does not exist")
+
+        User = get_user_model()
+        try:
+            owner = User.objects.get(username=options['created_by'])
+        except User.DoesNotExist:
+            raise CommandError('--created-by must name an existing user when creating a quiz')
+        return Quiz.objects.create(title=options['title'], duration=options['duration'], created_by=owner)
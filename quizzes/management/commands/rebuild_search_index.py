@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from quizzes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate missing full-text search indexes and reindex every quiz and question'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if not rebuild_index(options['database']):
+            raise CommandError('This database backend has no full-text index; search falls back to icontains')
+        self.stdout.write(self.style.SUCCESS('Rebuilt the quiz and question search indexes'))
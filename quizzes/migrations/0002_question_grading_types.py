@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='tolerance',
+            field=models.FloatField(default=0, help_text='Allowed difference for numeric questions'),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='correct_answer',
+            field=models.TextField(blank=True, help_text='For short answer, numeric and accepted-answer questions. List one accepted answer per line; wrap regular expressions in /slashes/.'),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='question_type',
+            field=models.CharField(choices=[('mcq', 'Multiple Choice'), ('true_false', 'True/False'), ('short_answer', 'Short Answer'), ('numeric', 'Numeric'), ('multi_answer', 'Accepted Answers')], default='mcq', max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quiz_catalogue_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='question',
+            options={'ordering': ['created_at', 'id']},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_question_bulk_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='questions_per_attempt',
+            field=models.PositiveIntegerField(blank=True, help_text='Ask a random sample of this many questions; leave blank to ask them all', null=True),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='shuffle_options',
+            field=models.BooleanField(default=False, help_text='Shuffle multiple choice options on every attempt'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='shuffle_questions',
+            field=models.BooleanField(default=False, help_text='Ask questions in a different order on every attempt'),
+        ),
+    ]
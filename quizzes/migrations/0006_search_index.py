@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    from quizzes.search import install
+    install(schema_editor.connection)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from quizzes.search import uninstall
+    uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_quiz_randomization'),
+    ]
+
+    operations = [
+        # FTS5 tables and triggers on SQLite, GIN expression indexes on PostgreSQL
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from .grading import compile_key
 
 User = get_user_model()
 
@@ -11,19 +13,33 @@ class Quiz(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    questions_per_attempt = models.PositiveIntegerField(null=True, blank=True, help_text="Ask a random sample of this many questions; leave blank to ask them all")
+    shuffle_questions = models.BooleanField(default=False, help_text="Ask questions in a different order on every attempt")
+    shuffle_options = models.BooleanField(default=False, help_text="Shuffle multiple choice options on every attempt")
     
     class Meta:
         verbose_name_plural = "Quizzes"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the active catalogue in quiz_list
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True), name='quiz_active_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
+    
+    @property
+    def is_randomized(self):
+        """Whether attempts draw their own question order instead of sharing the paper's"""
+        return bool(self.questions_per_attempt) or self.shuffle_questions or self.shuffle_options
 
 class Question(models.Model):
     QUESTION_TYPES = (
         ('mcq', 'Multiple Choice'),
         ('true_false', 'True/False'),
         ('short_answer', 'Short Answer'),
+        ('numeric', 'Numeric'),
+        ('multi_answer', 'Accepted Answers'),
     )
     
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='questions')
@@ -39,12 +55,37 @@ class Question(models.Model):
         ('c', 'C'),
         ('d', 'D'),
     ), blank=True)
-    correct_answer = models.TextField(blank=True, help_text="For short answer questions")
+    correct_answer = models.TextField(blank=True, help_text="For short answer, numeric and accepted-answer questions. List one accepted answer per line; wrap regular expressions in /slashes/.")
+    tolerance = models.FloatField(default=0, help_text="Allowed difference for numeric questions")
     points = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['created_at']
+        # id breaks ties between questions created in the same bulk insert
+        ordering = ['created_at', 'id']
     
     def __str__(self):
-        return f"{self.quiz.title} - {self.question_text[:50]}..."
\ No newline at end of file
+        return f"{self.quiz.title} - {self.question_text[:50]}..."
+    
+    def options(self):
+        """The filled-in MCQ options as ``(key, text)`` pairs"""
+        options = (('a', self.option_a), ('b', self.option_b), ('c', self.option_c), ('d', self.option_d))
+        return tuple((key, text) for key, text in options if text)
+    
+    def answer_choices(self):
+        """Choice tuples offered to the student for MCQ and True/False questions"""
+        if self.question_type == 'mcq':
+            return tuple((key, f"{key.upper()}) {text}") for key, text in self.options())
+        if self.question_type == 'true_false':
+            return (('a', 'True'), ('b', 'False'))
+        return ()
+    
+    def clean(self):
+        if self.question_type not in dict(self.QUESTION_TYPES):
+            return  # reported by the field's own choices validation
+        if self.question_type in ('mcq', 'true_false') and self.correct_option not in dict(self.answer_choices()):
+            raise ValidationError({'correct_option': 'Choose one of the options offered for this question.'})
+        try:
+            compile_key(self)
+        except ValueError as exc:
+            raise ValidationError({'correct_answer': str(exc)})
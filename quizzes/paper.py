@@ -0,0 +1,96 @@
+"""Per-quiz cache of the immutable "paper" served to students.
+
+A paper is the ordered question list plus prebuilt answer choices and the key-free JSON
+payload served by the quiz API. Entries are keyed by
+a per-quiz version number; saving or deleting a quiz or question bumps the version, so
+stale papers are never read again and simply expire.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Question
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+class QuizPaper:
+    def __init__(self, quiz_id, questions):
+        self.quiz_id = quiz_id
+        self.questions = questions
+        self.by_id = {question.id: question for question in questions}
+        self.choices = {question.id: question.answer_choices() for question in questions}
+        self.total_points = sum(question.points for question in questions)
+        # What students may see of each question; never includes correct_option/correct_answer
+        self.public_questions = [
+            {
+                'id': question.id,
+                'text': question.question_text,
+                'type': question.question_type,
+                'points': question.points,
+                'choices': [{'value': value, 'label': label} for value, label in self.choices[question.id]],
+            }
+            for question in questions
+        ]
+
+    def __len__(self):
+        return len(self.questions)
+
+
+def _cache():
+    return caches[getattr(settings, 'QUIZ_PAPER_CACHE', 'default')]
+
+
+def _version_key(quiz_id):
+    return f'quiz-paper-version:{quiz_id}'
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _current_version(cache, quiz_id):
+    version = cache.get(_version_key(quiz_id))
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(_version_key(quiz_id), time.time_ns(), None)
+        version = cache.get(_version_key(quiz_id))
+    return version
+
+
+def get_paper(quiz_id):
+    """Return the cached paper for a quiz, building it with one query on a miss"""
+    cache = _cache()
+    version = _current_version(cache, quiz_id)
+    key = f'quiz-paper:{quiz_id}:{version}'
+    paper = cache.get(key)
+    if paper is not None:
+        _count('hits')
+        return paper
+
+    _count('misses')
+    paper = QuizPaper(quiz_id, list(Question.objects.filter(quiz_id=quiz_id)))
+    cache.set(key, paper, getattr(settings, 'QUIZ_PAPER_CACHE_TIMEOUT', 3600))
+    return paper
+
+
+def invalidate_paper(quiz_id):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(quiz_id))
+    except ValueError:
+        cache.add(_version_key(quiz_id), time.time_ns(), None)
+    _count('invalidations')
+
+
+def cache_stats():
+    """Per-process hit/miss counters for the paper cache"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups * 100, 1) if lookups else 0
+    return stats
@@ -0,0 +1,193 @@
+"""Ranked full-text search over the quiz catalogue and the question bank.
+
+Each searchable model has a full-text index that the database keeps in sync by itself,
+so saves, deletes, cascades and ``bulk_create`` imports are all covered:
+
+* SQLite: an external-content FTS5 table (``quizzes_quiz_search``,
+  ``quizzes_question_search``) maintained by insert/update/delete triggers on the model
+  table, ranked with bm25. A migration that remakes the model table (most AlterField
+  and RemoveField operations on SQLite) silently drops the triggers, after which the
+  index goes stale; the ``quizzes.W001`` database check reports missing triggers, and
+  ``rebuild_index`` restores them;
+* PostgreSQL: a GIN index over a weighted ``tsvector`` expression of the same columns,
+  ranked with ``ts_rank_cd``.
+
+Other backends fall back to unranked ``icontains`` matching. ``search`` narrows a
+queryset to the matches and orders it best first (``search_rank`` ascending). Queries
+are reduced to plain words, all of which must match; the last one also matches as a
+prefix, so results keep up while a title is being typed.
+
+The indexes are created by the quizzes 0006 migration. ``rebuild_index`` (or
+``manage.py rebuild_search_index``) recreates whatever is missing and reindexes from
+the tables, e.g. after a migration remade a SQLite table and dropped its triggers.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q, Value
+
+MAX_TERMS = 10
+LANGUAGE = 'english'
+
+# Columns per model table; the first is weighted above the rest
+INDEXED = {
+    'quizzes_quiz': ('title', 'description'),
+    'quizzes_question': ('question_text', 'option_a', 'option_b', 'option_c', 'option_d'),
+}
+PRIMARY_WEIGHT = 4.0
+
+
+def _index_name(table):
+    return f'{table}_search'
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _fts_match(terms):
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def _tsquery(terms):
+    return ' & '.join(terms) + ':*'
+
+
+def _document(table):
+    """The weighted tsvector expression the PostgreSQL index is built on"""
+    primary, *rest = (f'"{table}"."{column}"' for column in INDEXED[table])
+    secondary = " || ' ' || ".join(rest)
+    return (
+        f"(setweight(to_tsvector('{LANGUAGE}'::regconfig, {primary}), 'A')"
+        f" || setweight(to_tsvector('{LANGUAGE}'::regconfig, {secondary}), 'B'))"
+    )
+
+
+def _sqlite_install(table):
+    index = _index_name(table)
+    columns = INDEXED[table]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    weights = ', '.join([str(PRIMARY_WEIGHT)] + ['1.0'] * (len(columns) - 1))
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='porter unicode61 remove_diacritics 2')",
+        # Persisted in the index, so the hidden rank column is the weighted bm25 score
+        f"INSERT INTO {index}({index}, rank) VALUES('rank', 'bm25({weights})')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {index}({index}) VALUES('rebuild')",
+    ]
+
+
+def _sqlite_uninstall(table):
+    index = _index_name(table)
+    return [f'DROP TRIGGER IF EXISTS {index}_{event}' for event in ('insert', 'delete', 'update')] + [
+        f'DROP TABLE IF EXISTS {index}',
+    ]
+
+
+def _postgresql_install(table):
+    return [f'CREATE INDEX IF NOT EXISTS {_index_name(table)} ON {table} USING GIN ({_document(table)})']
+
+
+def _postgresql_uninstall(table):
+    return [f'DROP INDEX IF EXISTS {_index_name(table)}']
+
+
+INSTALL = {'sqlite': _sqlite_install, 'postgresql': _postgresql_install}
+UNINSTALL = {'sqlite': _sqlite_uninstall, 'postgresql': _postgresql_uninstall}
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(connection):
+    """Create the search indexes (and SQLite triggers) that are missing and fill them"""
+    build = INSTALL.get(connection.vendor)
+    if build:
+        for table in INDEXED:
+            _execute(connection, build(table))
+
+
+def uninstall(connection):
+    drop = UNINSTALL.get(connection.vendor)
+    if drop:
+        for table in INDEXED:
+            _execute(connection, drop(table))
+
+
+def missing_triggers(connection):
+    """Names of SQLite sync triggers whose search table exists but which are gone"""
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+    return [
+        f'{_index_name(table)}_{event}'
+        for table in INDEXED
+        if ('table', _index_name(table)) in existing
+        for event in ('insert', 'delete', 'update')
+        if ('trigger', f'{_index_name(table)}_{event}') not in existing
+    ]
+
+
+def rebuild_index(using='default'):
+    """Recreate missing search indexes and reindex every row; returns False if the backend has none"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        install(connection)
+        _execute(connection, [f'REINDEX INDEX {_index_name(table)}' for table in INDEXED])
+        return True
+    if connection.vendor == 'sqlite':
+        # Installing ends with an FTS5 'rebuild' from the content table
+        install(connection)
+        return True
+    return False
+
+
+def search(queryset, query):
+    """Narrow a Quiz or Question queryset to ``query``'s matches, best first.
+
+    The result is annotated with ``search_rank`` (lower is better) and can be filtered,
+    counted and sliced like any other queryset.
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+
+    table = queryset.model._meta.db_table
+    index = _index_name(table)
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        queryset = queryset.extra(
+            select={'search_rank': f'{index}.rank'},
+            tables=[index],
+            where=[f'{index}.rowid = {table}.id', f'{index} MATCH %s'],
+            params=[_fts_match(terms)],
+        )
+    elif vendor == 'postgresql':
+        tsquery = f"to_tsquery('{LANGUAGE}'::regconfig, %s)"
+        queryset = queryset.extra(
+            # Negated so that lower is better, as with bm25
+            select={'search_rank': f'-ts_rank_cd({_document(table)}, {tsquery})'},
+            select_params=[_tsquery(terms)],
+            where=[f'{_document(table)} @@ {tsquery}'],
+            params=[_tsquery(terms)],
+        )
+    else:
+        matches = Q()
+        for term in terms:
+            matches &= Q(*(Q(**{f'{column}__icontains': term}) for column in INDEXED[table]), _connector=Q.OR)
+        queryset = queryset.filter(matches).annotate(search_rank=Value(0.0))
+    return queryset.order_by('search_rank', '-pk')
@@ -1,3 +1,656 @@
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+import csv
+import io
+import os
+import tempfile
+import threading
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from users.models import CustomUser
+from results.models import QuestionStats, QuizSubmission, QuizStats, UserAnswer
+from results.sweeper import finalize_expired
+from .models import Quiz, Question
+from . import bank, grading
+from .paper import cache_stats, get_paper
+from .checks import check_search_triggers
+from .search import search
 
-# Create your tests here.
+
+# Query counts here include the per-request user lookup, so keep it uncached
+@override_settings(USER_CACHE_TIMEOUT=0)
+class TakeQuizTests(TestCase):
+    # session + user + submission + SAVEPOINT/INSERT/UPDATE/RELEASE; the paper is cached
+    QUERIES_PER_ANSWER = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Algebra', duration=30, created_by=cls.user)
+        for i in range(5):
+            Question.objects.create(
+                quiz=cls.quiz,
+                question_text=f'Question {i}',
+                question_type='mcq',
+                option_a='Yes',
+                option_b='No',
+                correct_option='a',
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz, total_questions=5)
+        self.url = reverse('quizzes:take_quiz', args=[self.submission.id])
+        get_paper(self.quiz.id)
+
+    def test_answer_submission_query_count_is_constant(self):
+        for _ in range(4):
+            with self.assertNumQueries(self.QUERIES_PER_ANSWER):
+                response = self.client.post(self.url, {'answer': 'a'})
+            self.assertRedirects(response, self.url, fetch_redirect_response=False)
+
+        # The last answer also finalizes the submission and folds it into the stats rollups
+        # and (as the user's first completion) creates their leaderboard entries
+        with self.assertNumQueries(self.QUERIES_PER_ANSWER + 14):
+            self.client.post(self.url, {'answer': 'b'})
+
+        self.submission.refresh_from_db()
+        self.assertTrue(self.submission.is_completed)
+        self.assertEqual(self.submission.answered_count, 5)
+        self.assertEqual(self.submission.correct_answers, 4)
+        self.assertEqual(self.submission.score, 80)
+        self.assertEqual(self.submission.user_answers.count(), 5)
+
+    def test_progress_comes_from_counters(self):
+        self.client.post(self.url, {'answer': 'a'})
+        self.client.post(self.url, {'answer': 'a'})
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['current_question_number'], 3)
+        self.assertEqual(response.context['progress'], 40)
+        self.assertEqual(response.context['question'].question_text, 'Question 2')
+
+
+class ConcurrentSubmissionTests(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='clicker', password='pass12345')
+        self.quiz = Quiz.objects.create(title='Race', duration=30, created_by=self.user)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a')
+            for i in range(3)
+        ]
+
+    def hammer(self, action):
+        """Run ``action(client)`` from many threads released at the same moment"""
+        barrier = threading.Barrier(self.THREADS, timeout=10)
+        errors = []
+
+        def worker():
+            client = Client()
+            client.cookies = self.client.cookies
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    try:
+                        return action(client)
+                    except OperationalError:
+                        # SQLite's shared in-memory test database reports lock contention
+                        # instead of waiting; a real deployment would block instead
+                        continue
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_starts_and_answers(self):
+        self.client.force_login(self.user)
+        start_url = reverse('quizzes:start_quiz', args=[self.quiz.id])
+        self.hammer(lambda client: client.get(start_url))
+        self.assertEqual(QuizSubmission.objects.filter(user=self.user, quiz=self.quiz).count(), 1)
+        submission = QuizSubmission.objects.get(user=self.user, quiz=self.quiz)
+        take_url = reverse('quizzes:take_quiz', args=[submission.id])
+
+        for question in self.questions:
+            self.hammer(lambda client: client.post(take_url, {'answer': 'a', 'question_id': question.id}))
+
+        submission.refresh_from_db()
+        self.assertEqual(
+            sorted(UserAnswer.objects.filter(submission=submission).values_list('question_id', flat=True)),
+            [question.id for question in self.questions],
+        )
+        self.assertEqual(submission.answered_count, 3)
+        self.assertEqual(submission.correct_answers, 3)
+        self.assertTrue(submission.is_completed)
+        self.assertEqual(submission.score, 100)
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempts, stats.completions), (1, 1))
+
+    def test_stale_replay_does_not_answer_next_question(self):
+        submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        self.client.force_login(self.user)
+        url = reverse('quizzes:take_quiz', args=[submission.id])
+        first = self.questions[0].id
+
+        self.client.post(url, {'answer': 'a', 'question_id': first})
+        self.client.post(url, {'answer': 'b', 'question_id': first})
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.answered_question_ids, [first])
+        self.assertEqual(submission.user_answers.get().chosen_option, 'a')
+
+
+class QuizApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Physics', duration=30, created_by=cls.user)
+        cls.questions = [
+            Question.objects.create(
+                quiz=cls.quiz,
+                question_text=f'Question {i}',
+                question_type='mcq',
+                option_a='Yes',
+                option_b='No',
+                correct_option='a',
+            )
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def start(self):
+        response = self.client.post(reverse('quizzes_api:start', args=[self.quiz.id]))
+        self.assertIn(response.status_code, (200, 201))
+        return response.json()['submission_id']
+
+    def answer(self, submission_id, payload):
+        return self.client.post(
+            reverse('quizzes_api:answers', args=[submission_id]), payload, content_type='application/json'
+        )
+
+    def test_paper_hides_answer_keys(self):
+        response = self.client.get(reverse('quizzes_api:paper', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['quiz']['title'], 'Physics')
+        self.assertEqual(len(data['questions']), 4)
+        self.assertEqual([c['value'] for c in data['questions'][0]['choices']], ['a', 'b'])
+        self.assertNotIn('correct_option', response.content.decode())
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('quizzes_api:paper', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, 401)
+
+    def test_start_resumes_active_attempt(self):
+        self.assertEqual(self.start(), self.start())
+        self.assertEqual(QuizSubmission.objects.filter(user=self.user).count(), 1)
+
+    def test_batch_is_graded_with_one_insert(self):
+        submission_id = self.start()
+        answers = [{'question_id': q.id, 'answer': 'a' if i else 'b'} for i, q in enumerate(self.questions)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.answer(submission_id, {'answers': answers})
+        self.assertEqual(response.status_code, 200)
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "results_useranswer"')]
+        self.assertEqual(len(inserts), 1)
+
+        data = response.json()
+        self.assertTrue(data['is_completed'])
+        self.assertEqual(data['correct_answers'], 3)
+        self.assertEqual(data['score'], 75)
+        self.assertEqual(UserAnswer.objects.filter(submission_id=submission_id).count(), 4)
+
+    def test_single_answers_and_replays(self):
+        submission_id = self.start()
+        question = self.questions[0]
+        first = self.answer(submission_id, {'question_id': question.id, 'answer': 'a'}).json()
+        self.assertEqual(first['recorded_question_ids'], [question.id])
+        replay = self.answer(submission_id, {'question_id': question.id, 'answer': 'b'}).json()
+        self.assertEqual(replay['recorded_question_ids'], [])
+        self.assertEqual(replay['answered_count'], 1)
+        self.assertFalse(replay['is_completed'])
+
+    def test_invalid_batch_writes_nothing(self):
+        submission_id = self.start()
+        response = self.answer(submission_id, {'answers': [
+            {'question_id': self.questions[0].id, 'answer': 'a'},
+            {'question_id': self.questions[1].id, 'answer': 'z'},
+            {'question_id': 999999, 'answer': 'a'},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {str(self.questions[1].id), '999999'})
+        self.assertFalse(UserAnswer.objects.filter(submission_id=submission_id).exists())
+
+        self.assertEqual(self.answer(submission_id, {'answers': 'nope'}).status_code, 400)
+
+    def test_other_users_submission_is_hidden(self):
+        submission_id = self.start()
+        self.client.force_login(CustomUser.objects.create_user(username='other', password='pass12345'))
+        response = self.answer(submission_id, {'question_id': self.questions[0].id, 'answer': 'a'})
+        self.assertEqual(response.status_code, 404)
+
+
+class RandomizedQuizTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(
+            title='Bank', duration=30, created_by=cls.user,
+            questions_per_attempt=4, shuffle_questions=True, shuffle_options=True,
+        )
+        cls.questions = [
+            Question.objects.create(
+                quiz=cls.quiz, question_text=f'Q{i}', option_a='w', option_b='x', option_c='y', option_d='z',
+                correct_option='c', points=i + 1,
+            )
+            for i in range(10)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def start(self):
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+        return QuizSubmission.objects.get(user=self.user, quiz=self.quiz, is_completed=False)
+
+    def test_attempt_draws_a_stored_sample(self):
+        submission = self.start()
+        questions = submission.questions_for(get_paper(self.quiz.id))
+        self.assertEqual(len(questions), 4)
+        self.assertEqual(len(bytes(submission.question_order)), 4 * 8)
+        self.assertEqual(submission.total_questions, 4)
+        self.assertEqual(submission.total_points, sum(question.points for question in questions))
+
+        url = reverse('quizzes:take_quiz', args=[submission.id])
+        for question in questions:
+            response = self.client.get(url)
+            self.assertEqual(response.context['question'], question)
+            labels = [label for _, label in response.context['form'].fields['answer'].choices]
+            self.assertEqual([label[0] for label in labels], ['A', 'B', 'C', 'D'])
+            self.client.post(url, {'answer': 'c', 'question_id': question.id})
+
+        submission.refresh_from_db()
+        self.assertTrue(submission.is_completed)
+        self.assertEqual(submission.score, 100)
+
+    def test_order_is_deterministic_per_attempt(self):
+        submission = self.start()
+        paper = get_paper(self.quiz.id)
+        reloaded = QuizSubmission.objects.get(pk=submission.pk)
+        self.assertEqual(submission.questions_for(paper), reloaded.questions_for(paper))
+        question = submission.questions_for(paper)[0]
+        self.assertEqual(
+            submission.choices_for(question, paper.choices[question.id]),
+            reloaded.choices_for(question, paper.choices[question.id]),
+        )
+
+        orders = {tuple(q.id for q in submission.questions_for(paper))}
+        for _ in range(5):
+            submission.complete(submission.questions_for(paper))
+            submission = self.start()
+            orders.add(tuple(q.id for q in submission.questions_for(paper)))
+        self.assertGreater(len(orders), 1)
+
+    def test_api_serves_the_attempts_questions(self):
+        paper = self.client.get(reverse('quizzes_api:paper', args=[self.quiz.id])).json()
+        self.assertIsNone(paper['questions'])
+
+        attempt = self.client.post(reverse('quizzes_api:start', args=[self.quiz.id])).json()
+        drawn = [question['id'] for question in attempt['questions']]
+        self.assertEqual(len(drawn), 4)
+        left_out = next(question for question in self.questions if question.id not in drawn)
+        response = self.client.post(
+            reverse('quizzes_api:answers', args=[attempt['submission_id']]),
+            {'question_id': left_out.id, 'answer': 'c'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_sweeper_keeps_drawn_totals(self):
+        submission = self.start()
+        first = submission.questions_for(get_paper(self.quiz.id))[0]
+        submission.record_answer(first, 'c')
+        QuizSubmission.objects.filter(pk=submission.pk).update(deadline=timezone.now())
+        finalize_expired()
+
+        submission.refresh_from_db()
+        self.assertTrue(submission.is_completed)
+        self.assertEqual(submission.total_questions, 4)
+        self.assertAlmostEqual(submission.score, first.points / submission.total_points * 100)
+
+
+# Query counts here include the per-request user lookup, so keep it uncached
+@override_settings(USER_CACHE_TIMEOUT=0)
+class QuizListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='browser', password='pass12345')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def make_quizzes(self, count, title='Quiz'):
+        for i in range(count):
+            quiz = Quiz.objects.create(title=f'{title} {i}', description='General knowledge', duration=10, created_by=self.user)
+            Question.objects.create(quiz=quiz, question_text='Q1', correct_option='a', points=2)
+            Question.objects.create(quiz=quiz, question_text='Q2', correct_option='b', points=3)
+
+    def test_query_count_is_independent_of_catalogue_size(self):
+        url = reverse('quizzes:quiz_list')
+        self.make_quizzes(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self.make_quizzes(30)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(small), len(large))
+
+        quiz = response.context['quizzes'][0]
+        self.assertEqual((quiz.question_count, quiz.total_points), (2, 5))
+
+    def test_keyset_pagination_walks_every_quiz_once(self):
+        self.make_quizzes(45)
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(reverse('quizzes:quiz_list'), {'after': cursor} if cursor else {})
+            seen.extend(quiz.id for quiz in response.context['quizzes'])
+            cursor = response.context['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(seen, list(Quiz.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_search_matches_title(self):
+        self.make_quizzes(3, title='Biology')
+        self.make_quizzes(2, title='Physics')
+        response = self.client.get(reverse('quizzes:quiz_list'), {'q': 'physics'})
+        self.assertEqual([quiz.title for quiz in response.context['quizzes']], ['Physics 1', 'Physics 0'])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='searcher', password='pass12345', is_staff=True, is_superuser=True)
+        cls.optics = Quiz.objects.create(title='Light and optics', description='Lenses and mirrors', duration=10, created_by=cls.admin)
+        cls.plants = Quiz.objects.create(title='Plant biology', description='How plants use light', duration=10, created_by=cls.admin)
+        cls.question = Question.objects.create(
+            quiz=cls.plants, question_text='What do leaves absorb?', option_a='Sunlight', option_b='Gravel', correct_option='a',
+        )
+
+    def titles(self, query):
+        return [quiz.title for quiz in search(Quiz.objects.all(), query)]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.titles('light'), ['Light and optics', 'Plant biology'])
+
+    def test_every_term_must_match_and_the_last_is_a_prefix(self):
+        self.assertEqual(self.titles('light mirr'), ['Light and optics'])
+        self.assertEqual(self.titles('biol'), ['Plant biology'])
+        self.assertEqual(self.titles('"*) OR ('), [])
+
+    def test_index_follows_saves_deletes_and_bulk_inserts(self):
+        self.optics.title = 'Waves'
+        self.optics.save()
+        self.assertEqual(self.titles('optics'), [])
+        Question.objects.bulk_create([Question(quiz=self.optics, question_text='Speed of sound?', correct_option='a')])
+        self.assertEqual(search(Question.objects.all(), 'sound').count(), 1)
+        self.assertEqual(list(search(Question.objects.all(), 'sunlight')), [self.question])
+        self.plants.delete()
+        self.assertEqual(search(Question.objects.all(), 'sunlight').count(), 0)
+
+    def test_rebuild_restores_dropped_triggers(self):
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER quizzes_quiz_search_insert')
+        self.assertEqual([warning.id for warning in check_search_triggers(None, databases=['default'])], ['quizzes.W001'])
+        Quiz.objects.create(title='Astronomy', duration=10, created_by=self.admin)
+        self.assertEqual(self.titles('astronomy'), [])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(check_search_triggers(None, databases=['default']), [])
+        self.assertEqual(self.titles('astronomy'), ['Astronomy'])
+        Quiz.objects.create(title='Astronomy II', duration=10, created_by=self.admin)
+        self.assertEqual(len(self.titles('astronomy')), 2)
+
+    def test_quiz_list_pages_ranked_matches(self):
+        self.client.force_login(self.admin)
+        for i in range(25):
+            Quiz.objects.create(title=f'Light quiz {i}', duration=10, created_by=self.admin)
+        response = self.client.get(reverse('quizzes:quiz_list'), {'q': 'light'})
+        self.assertEqual(len(response.context['quizzes']), 20)
+        self.assertEqual(response.context['next_page'], 2)
+        response = self.client.get(reverse('quizzes:quiz_list'), {'q': 'light', 'page': 2})
+        titles = [quiz.title for quiz in response.context['quizzes']]
+        self.assertEqual(len(titles), 7)
+        self.assertEqual(titles[-1], 'Plant biology')
+        self.assertIsNone(response.context['next_page'])
+
+    def test_admin_search_is_ranked(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:quizzes_quiz_changelist'), {'q': 'light'})
+        self.assertEqual([quiz.title for quiz in response.context['cl'].result_list], ['Light and optics', 'Plant biology'])
+        response = self.client.get(reverse('admin:quizzes_quiz_changelist'), {'q': 'light', 'o': '-1'})
+        self.assertEqual([quiz.title for quiz in response.context['cl'].result_list], ['Plant biology', 'Light and optics'])
+        response = self.client.get(reverse('admin:quizzes_question_changelist'), {'q': 'sunlight'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.question])
+
+
+class QuizPaperTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='author', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='History', duration=10, created_by=cls.user)
+        cls.question = Question.objects.create(
+            quiz=cls.quiz, question_text='Year?', option_a='1066', option_b='1492', correct_option='a'
+        )
+
+    def test_paper_is_built_once(self):
+        get_paper(self.quiz.id)
+        misses = cache_stats()['misses']
+        with self.assertNumQueries(0):
+            paper = get_paper(self.quiz.id)
+        self.assertEqual(cache_stats()['misses'], misses)
+        self.assertEqual([question.id for question in paper.questions], [self.question.id])
+        self.assertEqual(paper.choices[self.question.id], (('a', 'A) 1066'), ('b', 'B) 1492')))
+
+    def test_question_changes_invalidate_paper(self):
+        get_paper(self.quiz.id)
+        Question.objects.create(quiz=self.quiz, question_text='Century?', question_type='short_answer')
+        self.assertEqual(len(get_paper(self.quiz.id)), 2)
+
+        self.question.option_b = '1215'
+        self.question.save()
+        self.assertEqual(get_paper(self.quiz.id).choices[self.question.id][1], ('b', 'B) 1215'))
+
+        self.question.delete()
+        self.assertEqual(len(get_paper(self.quiz.id)), 1)
+
+
+class QuestionBankTests(TestCase):
+    CSV = (
+        'question_text,question_type,option_a,option_b,correct_option,correct_answer,tolerance,points\n'
+        'Capital of France?,mcq,Paris,Lyon,a,,,2\n'
+        'Water is wet,true_false,,,a,,,\n'
+        'Pi to two places?,numeric,,,,3.14,0.005,\n'
+        'Name a primary colour,multi_answer,,,,"red\nblue\n/yel+ow/",,\n'
+    )
+    GIFT = """// A comment
+::Capital:: Capital of France? {
+=Paris#Correct
+~Lyon
+~Nice
+}
+
+The sky is green. {F}
+
+::Pi:: Pi to two places? {#3.14:0.005}
+
+Name a primary colour {=red =blue}
+
+Essay question {}
+"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='author', password='pass12345', is_staff=True,
+                                                  is_superuser=True)
+        cls.quiz = Quiz.objects.create(title='Imported', duration=10, created_by=cls.user)
+
+    def import_text(self, parser, text, quiz=None):
+        return bank.import_questions(quiz or self.quiz, parser(io.StringIO(text)))
+
+    def snapshot(self, quiz):
+        return list(Question.objects.filter(quiz=quiz).values_list(*bank.FIELDS))
+
+    def test_csv_import(self):
+        get_paper(self.quiz.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.import_text(bank.parse_csv, self.CSV), 4)
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "quizzes_question"')]
+        self.assertEqual(len(inserts), 1)
+
+        paper = get_paper(self.quiz.id)
+        self.assertEqual([q.question_text for q in paper.questions][:2], ['Capital of France?', 'Water is wet'])
+        self.assertEqual(paper.total_points, 5)
+        self.assertTrue(grading.grade(paper.questions[3], 'yellllow'))
+        self.assertEqual(QuestionStats.objects.filter(question__quiz=self.quiz).count(), 4)
+
+    def test_invalid_rows_abort_the_whole_import(self):
+        text = self.CSV + 'Broken,mcq,Paris,,c,,,\nNo type,essay,,,,,,\nBad number,numeric,,,,abc,,\n'
+        with self.assertRaises(bank.QuestionImportError) as cm:
+            self.import_text(bank.parse_csv, text)
+        self.assertEqual([error.split(':')[0] for error in cm.exception.errors], ['line 8', 'line 9', 'line 10'])
+        self.assertIn('correct_option', cm.exception.errors[0])
+        self.assertFalse(Question.objects.filter(quiz=self.quiz).exists())
+
+    def test_gift_import(self):
+        rows = list(bank.parse_gift(io.StringIO(self.GIFT)))
+        self.assertEqual([location for location, _ in rows], ['line 2', 'line 8', 'line 10', 'line 12', 'line 14'])
+        self.assertIsInstance(rows[4][1], ValidationError)
+
+        self.assertEqual(self.import_text(bank.parse_gift, self.GIFT.replace('Essay question {}', '')), 4)
+        mcq, true_false, numeric, accepted = Question.objects.filter(quiz=self.quiz)
+        self.assertEqual((mcq.option_a, mcq.option_c, mcq.correct_option), ('Paris', 'Nice', 'a'))
+        self.assertEqual((true_false.question_type, true_false.correct_option), ('true_false', 'b'))
+        self.assertEqual((numeric.correct_answer, numeric.tolerance), ('3.14', 0.005))
+        self.assertEqual((accepted.question_type, accepted.correct_answer), ('multi_answer', 'red\nblue'))
+
+    def test_export_round_trips(self):
+        self.import_text(bank.parse_csv, self.CSV)
+        original = self.snapshot(self.quiz)
+        for fmt, parser in bank.PARSERS.items():
+            stream, _ = bank.EXPORTERS[fmt]
+            exported = ''.join(stream(self.quiz.id))
+            copy = Quiz.objects.create(title=f'Copy {fmt}', duration=10, created_by=self.user)
+            # Small reads exercise the incremental JSON parser across chunk boundaries
+            with mock.patch.object(bank, 'JSON_READ_SIZE', 7):
+                self.import_text(parser, exported, quiz=copy)
+            copied = self.snapshot(copy)
+            if fmt == 'gift':
+                # GIFT has no points; everything else survives
+                self.assertEqual([row[:-1] for row in copied], [row[:-1] for row in original])
+            else:
+                self.assertEqual(copied, original)
+
+    def test_json_lines_import(self):
+        text = '{"question_text": "2+2?", "question_type": "numeric", "correct_answer": "4"}\n\n[1]\n'
+        with self.assertRaises(bank.QuestionImportError) as cm:
+            self.import_text(bank.parse_json, text)
+        self.assertEqual(cm.exception.errors, ['line 3: Expected a JSON object.'])
+
+    def test_import_command(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(self.CSV)
+        self.addCleanup(os.remove, path)
+
+        out = io.StringIO()
+        call_command('import_quiz', path, '--title', 'From CLI', '--created-by', 'author', stdout=out)
+        quiz = Quiz.objects.get(title='From CLI')
+        self.assertEqual(quiz.questions.count(), 4)
+
+        out = io.StringIO()
+        call_command('export_quiz', str(quiz.id), '--format', 'gift', stdout=out)
+        self.assertIn('{=Paris', out.getvalue().replace('\n', ''))
+
+    def test_admin_upload(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('bank.gift', self.GIFT.replace('Essay question {}', '').encode())
+        response = self.client.post(reverse('admin:quizzes_quiz_import'), {
+            'file': upload, 'format': '', 'title': 'Uploaded', 'duration': 15,
+        })
+        quiz = Quiz.objects.get(title='Uploaded')
+        self.assertRedirects(response, reverse('admin:quizzes_quiz_change', args=[quiz.id]))
+        self.assertEqual(quiz.questions.count(), 4)
+
+        response = self.client.post(reverse('admin:quizzes_quiz_import'), {
+            'file': SimpleUploadedFile('bank.gift', self.GIFT.encode()), 'quiz': quiz.id, 'duration': 15,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['errors'], ['line 14: Essay questions are not supported.'])
+        self.assertEqual(quiz.questions.count(), 4)
+
+        response = self.client.get(reverse('admin:quizzes_quiz_export', args=[quiz.id, 'csv']))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 5)
+
+
+class GradingTests(SimpleTestCase):
+    def question(self, question_type, correct_option='', correct_answer='', tolerance=0):
+        return Question(
+            question_type=question_type,
+            correct_option=correct_option,
+            correct_answer=correct_answer,
+            tolerance=tolerance,
+        )
+
+    def test_choice(self):
+        question = self.question('mcq', correct_option='c')
+        self.assertTrue(grading.grade(question, 'C'))
+        self.assertFalse(grading.grade(question, 'a'))
+
+    def test_short_answer_is_normalized(self):
+        question = self.question('short_answer', correct_answer='  Mount   Everest ')
+        self.assertTrue(grading.grade(question, 'mount everest'))
+        self.assertFalse(grading.grade(question, 'K2'))
+
+    def test_numeric_tolerance(self):
+        question = self.question('numeric', correct_answer='3.14', tolerance=0.01)
+        self.assertTrue(grading.grade(question, ' 3.145 '))
+        self.assertFalse(grading.grade(question, '3.2'))
+        self.assertFalse(grading.grade(question, 'pi'))
+
+    def test_accepted_answers_and_patterns(self):
+        question = self.question('multi_answer', correct_answer='colour\ncolor\n/gr[ae]y/')
+        self.assertTrue(grading.grade(question, 'Color'))
+        self.assertTrue(grading.grade(question, 'GREY'))
+        self.assertFalse(grading.grade(question, 'greyish'))
+
+    def test_answer_key_is_compiled_once(self):
+        question = self.question('short_answer', correct_answer='Paris')
+        grading.grade(question, 'paris')
+        hits = grading._compiled_key.cache_info().hits
+        grading.grade(question, 'Lyon')
+        self.assertEqual(grading._compiled_key.cache_info().hits, hits + 1)
+
+    def test_malformed_keys_fail_validation(self):
+        with self.assertRaises(ValidationError):
+            self.question('numeric', correct_answer='twelve').clean()
+        with self.assertRaises(ValidationError):
+            self.question('multi_answer', correct_answer='/([a-z]/').clean()
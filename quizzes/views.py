@@ -1,16 +1,48 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from core.pagination import keyset_page, offset_page
 from .models import Quiz, Question
 from .forms import QuizForm, QuestionForm
-from results.models import QuizSubmission, UserAnswer
+from .paper import get_paper
+from .search import search as search_quizzes
+from results.models import QuizSubmission
 from results.forms import QuizAnswerForm
 
+QUIZ_LIST_PAGE_SIZE = 20
+
 @login_required
 def quiz_list(request):
-    quizzes = Quiz.objects.filter(is_active=True)
-    context = {'quizzes': quizzes}
+    # Correlated subqueries only run for the rows on the page, unlike a JOIN + GROUP BY
+    questions = Question.objects.filter(quiz=OuterRef('pk')).order_by().values('quiz')
+    quizzes = Quiz.objects.filter(is_active=True).annotate(
+        question_count=Coalesce(Subquery(questions.annotate(count=Count('id')).values('count')), 0),
+        total_points=Coalesce(Subquery(questions.annotate(points=Sum('points')).values('points')), 0),
+    )
+    
+    search = request.GET.get('q', '').strip()
+    if search:
+        # Best matches first, so results are paged by position rather than by date
+        quizzes, page, has_next = offset_page(search_quizzes(quizzes, search), request.GET.get('page'), QUIZ_LIST_PAGE_SIZE)
+        context = {
+            'quizzes': quizzes,
+            'search': search,
+            'page': page,
+            'next_page': page + 1 if has_next else None,
+            'is_first_page': page == 1,
+        }
+        return render(request, 'quizzes/quiz_list.html', context)
+    
+    quizzes, next_cursor = keyset_page(quizzes, 'created_at', request.GET.get('after'), QUIZ_LIST_PAGE_SIZE)
+    
+    context = {
+        'quizzes': quizzes,
+        'search': search,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+    }
     return render(request, 'quizzes/quiz_list.html', context)
 
 @login_required
@@ -96,95 +128,69 @@ def quiz_delete(request, quiz_id):
 def start_quiz(request, quiz_id):
     quiz = get_object_or_404(Quiz, id=quiz_id, is_active=True)
     
-    # Check if user already has an active submission
-    active_submission = QuizSubmission.objects.filter(
-        user=request.user, 
-        quiz=quiz, 
-        is_completed=False
-    ).first()
-    
-    if active_submission:
-        # Resume existing quiz
-        return redirect('quizzes:take_quiz', submission_id=active_submission.id)
-    
-    # Create new submission
-    submission = QuizSubmission.objects.create(
-        user=request.user,
-        quiz=quiz,
-        total_questions=quiz.questions.count()
-    )
+    # Resume the active submission or create one; an attempt past its deadline is
+    # finalized rather than resumed
+    submission, created = QuizSubmission.resume_or_start(request.user, quiz)
     
     return redirect('quizzes:take_quiz', submission_id=submission.id)
 
 @login_required
 def take_quiz(request, submission_id):
-    submission = get_object_or_404(QuizSubmission, id=submission_id, user=request.user)
+    submission = get_object_or_404(
+        QuizSubmission.objects.select_related('quiz'),
+        id=submission_id,
+        user=request.user
+    )
     
     if submission.is_completed:
         return redirect('quizzes:quiz_result', submission_id=submission.id)
     
-    # Get all questions for this quiz
-    questions = submission.quiz.questions.all()
-    
-    # Get questions that haven't been answered yet
-    answered_questions = submission.user_answers.values_list('question_id', flat=True)
-    current_question = questions.exclude(id__in=answered_questions).first()
+    # The quiz paper is cached; progress comes from the submission's own counters and
+    # the current question is looked up by position in the attempt's question order
+    paper = get_paper(submission.quiz_id)
+    questions = submission.questions_for(paper)
+    total_questions = len(questions)
+    current_question = submission.next_question(questions)
     
     # If all questions answered, complete the quiz
     if not current_question:
-        submission.is_completed = True
-        submission.completed_at = timezone.now()
-        submission.calculate_score()
-        submission.save()
+        submission.complete(questions)
         return redirect('quizzes:quiz_result', submission_id=submission.id)
     
     # Calculate time remaining
-    time_limit = submission.quiz.duration
-    time_elapsed = (timezone.now() - submission.started_at).total_seconds() / 60
-    time_remaining = max(0, time_limit - time_elapsed)
+    time_remaining = submission.seconds_remaining() / 60
     
     # Check if time is up
     if time_remaining <= 0:
-        submission.is_completed = True
-        submission.completed_at = timezone.now()
-        submission.calculate_score()
-        submission.save()
+        submission.complete(questions)
         return redirect('quizzes:quiz_result', submission_id=submission.id)
     
-    form = QuizAnswerForm(question=current_question)
+    choices = submission.choices_for(current_question, paper.choices[current_question.id])
+    form = QuizAnswerForm(question=current_question, choices=choices)
     
     if request.method == 'POST':
-        form = QuizAnswerForm(request.POST, question=current_question)
+        # The posted question_id identifies which question the client answered; a replay
+        # for a question that is already answered is acknowledged without writing again
+        posted_question_id = request.POST.get('question_id')
+        if posted_question_id and posted_question_id != str(current_question.id):
+            return redirect('quizzes:take_quiz', submission_id=submission.id)
+        
+        form = QuizAnswerForm(request.POST, question=current_question, choices=choices)
         if form.is_valid():
-            answer_data = form.cleaned_data['answer']
-            
-            # Create user answer
-            user_answer = UserAnswer.objects.create(
-                submission=submission,
-                question=current_question
-            )
-            
-            if current_question.question_type in ['mcq', 'true_false']:
-                user_answer.chosen_option = answer_data
-            else: 
-                user_answer.answer_text = answer_data
-            
-            user_answer.check_answer()
-            user_answer.save()
+            if submission.record_answer(current_question, form.cleaned_data['answer']) is None:
+                # Lost a race with a concurrent submission of the same question
+                return redirect('quizzes:take_quiz', submission_id=submission.id)
             
             # Move to next question or complete quiz
-            next_question = questions.exclude(id__in=submission.user_answers.values_list('question_id', flat=True)).first()
-            if not next_question:
-                submission.is_completed = True
-                submission.completed_at = timezone.now()
-                submission.calculate_score()
-                submission.save()
+            if submission.next_question(questions) is None:
+                submission.complete(questions)
                 return redirect('quizzes:quiz_result', submission_id=submission.id)
             
             return redirect('quizzes:take_quiz', submission_id=submission.id)
     
     # Calculate progress
-    progress = (answered_questions.count() / questions.count() * 100) if questions.count() > 0 else 0
+    answered_count = submission.answered_count
+    progress = (answered_count / total_questions * 100) if total_questions > 0 else 0
     
     context = {
         'submission': submission,
@@ -192,8 +198,8 @@ def take_quiz(request, submission_id):
         'form': form,
         'time_remaining': int(time_remaining),
         'progress': int(progress),
-        'current_question_number': answered_questions.count() + 1,
-        'total_questions': questions.count(),
+        'current_question_number': answered_count + 1,
+        'total_questions': total_questions,
     }
     
     return render(request, 'quizzes/take_quiz.html', context)
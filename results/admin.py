@@ -1,3 +1,60 @@
 from django.contrib import admin
+from core.pagination import EstimatedCountPaginator
+from quizzes.admin import RecentQuizFilter
+from .models import LeaderboardEntry, QuestionStats, QuizStats, QuizSubmission, UserAnswer
 
-# Register your models here.
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow with every attempt"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # The primary key follows insertion order and is always indexed
+    ordering = ('-pk',)
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Rollups maintained by the receivers; editing them by hand would only let them drift"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(QuizSubmission)
+class QuizSubmissionAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'quiz', 'score', 'answered_count', 'total_questions', 'is_completed', 'started_at', 'completed_at')
+    list_filter = ('is_completed', RecentQuizFilter)
+    list_select_related = ('user', 'quiz')
+    raw_id_fields = ('user', 'quiz')
+    search_fields = ('=user__username',)
+    readonly_fields = ('started_at',)
+
+@admin.register(UserAnswer)
+class UserAnswerAdmin(LargeTableAdmin):
+    list_display = ('id', 'submission', 'question', 'chosen_option', 'is_correct', 'answered_at')
+    list_filter = ('is_correct',)
+    list_select_related = ('submission__user', 'submission__quiz', 'question__quiz')
+    raw_id_fields = ('submission', 'question')
+    readonly_fields = ('answered_at',)
+
+@admin.register(QuizStats)
+class QuizStatsAdmin(ReadOnlyAdmin):
+    list_display = ('quiz', 'attempts', 'completions', 'average_score', 'score_min', 'score_max', 'updated_at')
+    list_select_related = ('quiz',)
+    raw_id_fields = ('quiz',)
+
+@admin.register(QuestionStats)
+class QuestionStatsAdmin(ReadOnlyAdmin):
+    list_display = ('question', 'total_answers', 'correct_answers', 'accuracy')
+    list_select_related = ('question__quiz',)
+    raw_id_fields = ('question',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(ReadOnlyAdmin):
+    list_display = ('user', 'quiz', 'score', 'achieved_at')
+    list_filter = (RecentQuizFilter,)
+    list_select_related = ('user', 'quiz')
+    raw_id_fields = ('user', 'quiz', 'submission')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
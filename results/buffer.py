@@ -0,0 +1,221 @@
+"""Optional write-behind buffer for answer rows (enabled by setting ANSWER_BUFFER_DIR).
+
+With the buffer on, ``QuizSubmission.record_answers`` still applies its conditional
+progress UPDATE synchronously, but instead of inserting the graded ``UserAnswer`` rows
+it appends them to a local append-only log, fsyncs it and commits; ``flush`` (run by
+``manage.py flush_answer_buffer --interval N`` on each host) later writes the log to the
+database with batched ``bulk_create``. Only the single-row UPDATE stays on the request
+path; the inserts into the answer table and its indexes move off it and are amortized
+over a whole batch.
+
+Consistency: a student's progress (``answered_question_ids`` and the counters) lives on
+the submission row and is updated in the same transaction as the append, so take_quiz,
+the API and resumed attempts see every acknowledged answer. The answer rows themselves
+lag until flushed. ``complete`` writes its own attempt's entries first
+(``flush_submission``), and the expiry sweeper, counter rebuilds and regrades flush the
+whole log first, so they see every answer logged on the host they run on. Each host
+has its own log, so all of an attempt's answer requests must reach the same host
+(sticky routing) and the sweeper and maintenance commands must run there too;
+otherwise those readers can miss answers still buffered elsewhere.
+
+Exactly once: an entry is appended only after its progress UPDATE succeeded, inside that
+transaction, so each accepted answer is logged and a rejected one never is. An entry is
+written only if its question is in the submission's ``answered_question_ids``, the
+newest entry per (submission, question) wins, and rows that already exist are skipped
+(the unique answer constraint). Replaying a log after a crash, or after
+``flush_submission`` already wrote some of it, therefore writes each answer once.
+Entries whose transaction may still be in flight are kept for the next flush and
+dropped once they are older than STALE_SECONDS, by which time their transaction has
+rolled back.
+
+Appends go to ``answers.log`` under a shared lock; a flush takes the lock exclusively
+just long enough to rename it to ``flushing-<ns>.log``, so appends never wait for the
+database. Logs left over from an interrupted flush are picked up by the next one. The
+log directory must be on local disk and shared by all workers of a host.
+
+Each append costs an fsync of the log, so the buffer pays off where the answer INSERT is
+the expensive part (a busy server database with large answer indexes); on a single tuned
+SQLite file it is not faster (see benchmarks/sqlite_writers_benchmark.py).
+"""
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME = 'answers.log'
+FLUSHING_PREFIX = 'flushing-'
+STALE_SECONDS = 300
+FIELDS = ('chosen_option', 'answer_text', 'is_correct')
+
+
+def enabled():
+    return bool(getattr(settings, 'ANSWER_BUFFER_DIR', ''))
+
+
+def _directory():
+    path = Path(settings.ANSWER_BUFFER_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def _lock(directory, name, mode):
+    with open(directory / name, 'a') as fh:
+        fcntl.flock(fh, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _write(directory, lines):
+    data = ''.join(lines).encode()
+    path = directory / LOG_NAME
+    with _lock(directory, '.append.lock', fcntl.LOCK_SH):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            created = False
+        except FileNotFoundError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            created = True
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if created:
+            # Make the new file's directory entry durable too
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+def _encode(entry):
+    return json.dumps(entry, separators=(',', ':')) + '\n'
+
+
+def append(user_answers):
+    """Durably log graded, unsaved answers; called inside the transaction that records them"""
+    _write(_directory(), [
+        _encode({
+            'submission': user_answer.submission_id,
+            'question': user_answer.question_id,
+            'answered_at': user_answer.answered_at.isoformat(),
+            **{field: getattr(user_answer, field) for field in FIELDS},
+        })
+        for user_answer in user_answers
+    ])
+
+
+def _read(path, live=False):
+    """Entries of one log; ``live`` logs may end in an append that is still being written"""
+    entries = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            if live and not line.endswith('\n'):
+                break
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a crash mid-append; its transaction never committed
+                logger.warning('Skipping unreadable answer buffer line in %s', path.name)
+    return entries
+
+
+def _latest(entries):
+    """The newest entry per (submission, question); later lines win ties"""
+    latest = {}
+    for entry in entries:
+        key = (entry['submission'], entry['question'])
+        if key not in latest or entry['answered_at'] >= latest[key]['answered_at']:
+            latest[key] = entry
+    return latest
+
+
+def _write_answers(latest, batch_size):
+    """Insert the committed entries of ``latest``; returns them and the still undecided ones"""
+    from quizzes.models import Question
+    from .models import QuizSubmission, UserAnswer
+
+    answered = dict(
+        QuizSubmission.objects.filter(pk__in={submission for submission, _ in latest})
+        .values_list('pk', 'answered_question_ids')
+    )
+    questions = set(
+        Question.objects.filter(pk__in={question for _, question in latest}).values_list('pk', flat=True)
+    )
+    cutoff = time.time() - STALE_SECONDS
+    ready, undecided = [], []
+    for (submission_id, question_id), entry in latest.items():
+        if submission_id not in answered or question_id not in questions:
+            continue  # The attempt or question was deleted meanwhile
+        if question_id in answered[submission_id]:
+            ready.append(UserAnswer(
+                submission_id=submission_id, question_id=question_id,
+                answered_at=datetime.fromisoformat(entry['answered_at']),
+                **{field: entry[field] for field in FIELDS},
+            ))
+        elif datetime.fromisoformat(entry['answered_at']).timestamp() > cutoff:
+            undecided.append(entry)
+
+    with transaction.atomic():
+        UserAnswer.objects.bulk_create(ready, batch_size=batch_size, ignore_conflicts=True)
+    return ready, undecided
+
+
+def flush(batch_size=None):
+    """Write every buffered answer to the database; returns how many entries were written"""
+    if not enabled():
+        return 0
+    directory = _directory()
+    batch_size = batch_size or getattr(settings, 'ANSWER_BUFFER_BATCH_SIZE', 1000)
+    with _lock(directory, '.flush.lock', fcntl.LOCK_EX):
+        with _lock(directory, '.append.lock', fcntl.LOCK_EX):
+            if (directory / LOG_NAME).exists():
+                os.rename(directory / LOG_NAME, directory / f'{FLUSHING_PREFIX}{time.time_ns()}.log')
+        paths = sorted(directory.glob(f'{FLUSHING_PREFIX}*.log'))
+        if not paths:
+            return 0
+
+        ready, undecided = _write_answers(
+            _latest(entry for path in paths for entry in _read(path)), batch_size
+        )
+        if undecided:
+            _write(directory, [_encode(entry) for entry in undecided])
+        for path in paths:
+            path.unlink()
+    return len(ready)
+
+
+def flush_submission(submission_id):
+    """Write one attempt's buffered answers, leaving the log to ``flush``; returns how many were written.
+
+    Takes the flush lock shared, so completions only wait for a running ``flush``, not for
+    each other. The rows are written again by the next ``flush`` and skipped as duplicates.
+    """
+    if not enabled():
+        return 0
+    directory = _directory()
+    with _lock(directory, '.flush.lock', fcntl.LOCK_SH):
+        entries = [
+            entry
+            for path in [*sorted(directory.glob(f'{FLUSHING_PREFIX}*.log')), directory / LOG_NAME]
+            if path.exists()
+            for entry in _read(path, live=path.name == LOG_NAME)
+            if entry['submission'] == submission_id
+        ]
+        if not entries:
+            return 0
+        ready, _ = _write_answers(_latest(entries), batch_size=None)
+    return len(ready)
@@ -0,0 +1,161 @@
+"""Cached dashboard data, invalidated by version counters.
+
+Dashboards are keyed by version numbers that the receivers bump when something they show
+changes:
+
+* a per-user version, bumped when one of the user's submissions starts, completes or is
+  deleted (user dashboard);
+* an activity version, bumped on any of those and on sign-ups (admin dashboard);
+* a shared version that both include, bumped when a quiz changes or scores are rebuilt.
+
+The summaries below are cached under the current versions, and the templates cache
+their rendered fragments with ``{% cache %}`` varied on the same version string, so a
+repeat visit renders from the cache without running the aggregates at all. Stale
+entries are never read again and simply expire, as with the quiz paper cache.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from core.routers import use_replica
+from quizzes.models import Quiz
+from users.models import CustomUser
+from .models import QuizSubmission
+
+SHARED = 'shared'
+ACTIVITY = 'activity'
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def _version_key(scope):
+    return f'dashboard-version:{scope}'
+
+
+def _versions(cache, *scopes):
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed from the clock so an evicted counter never reuses an old version
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def _bump(*scopes):
+    cache = _cache()
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            cache.add(_version_key(scope), time.time_ns(), None)
+
+
+def _invalidate(*scopes):
+    # Bump now, and again once the change is visible to other connections, so nothing a
+    # concurrent request cached from the old rows in between survives
+    _bump(*scopes)
+    transaction.on_commit(lambda: _bump(*scopes))
+
+
+def invalidate_user(user_id):
+    """A submission of ``user_id`` started, completed or was removed"""
+    _invalidate(f'user:{user_id}', ACTIVITY)
+
+
+def invalidate_activity():
+    _invalidate(ACTIVITY)
+
+
+def invalidate_all():
+    """Quizzes or scores changed in a way that may show on any dashboard"""
+    _invalidate(SHARED)
+
+
+def user_version(user_id):
+    return _versions(_cache(), SHARED, f'user:{user_id}')
+
+
+def admin_version():
+    return _versions(_cache(), SHARED, ACTIVITY)
+
+
+def _cached(key, build):
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        # From the primary even inside a replica view: the key's version may have just been
+        # bumped by a write (e.g. start_quiz, a GET the replica pin doesn't see), and a
+        # summary built from a lagging replica would stay cached under it
+        with use_replica(False):
+            value = build()
+        cache.set(key, value, cache_timeout())
+    return value
+
+
+def user_summary(user_id):
+    """Counts, scores and recent attempts shown on a student's dashboard"""
+    return _cached(f'dashboard:user:{user_id}:{user_version(user_id)}', lambda: _build_user_summary(user_id))
+
+
+def _build_user_summary(user_id):
+    submissions = QuizSubmission.objects.filter(user_id=user_id).select_related('quiz').order_by('-started_at')
+    completed = Q(is_completed=True)
+    totals = submissions.aggregate(
+        taken=Count('id', filter=completed),
+        average=Avg('score', filter=completed),
+        best=Max('score', filter=completed),
+    )
+    return {
+        'total_quizzes_taken': totals['taken'],
+        'average_score': round(totals['average'] or 0, 1),
+        'best_score': round(totals['best'] or 0, 1),
+        'recent_submissions': list(submissions[:5]),
+        'quiz_performance': [
+            {'quiz': submission.quiz, 'score': submission.score, 'date': submission.completed_at}
+            for submission in submissions.filter(is_completed=True)[:5]
+        ],
+    }
+
+
+def admin_summary():
+    """Site-wide counts and recent activity shown on the admin dashboard"""
+    return _cached(f'dashboard:admin:{admin_version()}', _build_admin_summary)
+
+
+def _build_admin_summary():
+    seven_days_ago = timezone.now() - timedelta(days=7)
+    users = CustomUser.objects.aggregate(
+        total=Count('id'), recent=Count('id', filter=Q(date_joined__gte=seven_days_ago)),
+    )
+    submissions = QuizSubmission.objects.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True)),
+        recent=Count('id', filter=Q(started_at__gte=seven_days_ago)),
+    )
+    return {
+        'total_quizzes': Quiz.objects.filter(is_active=True).count(),
+        'total_users': users['total'],
+        'total_submissions': submissions['total'],
+        'completed_submissions': submissions['completed'],
+        'recent_submissions': list(
+            QuizSubmission.objects.select_related('user', 'quiz').order_by('-started_at')[:10]
+        ),
+        # Quiz statistics, read from the precomputed rollups
+        'quiz_stats': list(
+            Quiz.objects.filter(is_active=True).select_related('stats').order_by('-created_at')[:5]
+        ),
+        'recent_users': users['recent'],
+        'recent_submissions_count': submissions['recent'],
+    }
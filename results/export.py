@@ -0,0 +1,76 @@
+import csv
+import json
+from .models import QuizSubmission
+
+EXPORT_CHUNK_SIZE = 2000
+
+SUBMISSION_FIELDS = ['id', 'user__username', 'started_at', 'completed_at', 'is_completed', 'score',
+                     'correct_answers', 'points_earned', 'total_points']
+ANSWER_FIELDS = ['user_answers__id', 'user_answers__question_id', 'user_answers__chosen_option',
+                 'user_answers__answer_text', 'user_answers__is_correct', 'user_answers__answered_at']
+
+CSV_HEADER = ['submission_id', 'username', 'started_at', 'completed_at', 'is_completed', 'score',
+              'correct_answers', 'points_earned', 'total_points',
+              'answer_id', 'question_id', 'chosen_option', 'answer_text', 'is_correct', 'answered_at']
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+
+def _rows(quiz_id, using=None):
+    # One LEFT JOIN row per answer (or a single row for a submission with no answers),
+    # streamed from a server-side cursor so memory stays flat regardless of quiz size
+    return QuizSubmission.objects.using(using).filter(quiz_id=quiz_id).order_by('id', 'user_answers__id').values_list(
+        *SUBMISSION_FIELDS, *ANSWER_FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def stream_csv(quiz_id, using=None):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in _rows(quiz_id, using):
+        row = list(row)
+        for index in (2, 3, 14):
+            row[index] = _isoformat(row[index]) or ''
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def stream_jsonl(quiz_id, using=None):
+    """One JSON object per submission, with its answers nested"""
+    split = len(SUBMISSION_FIELDS)
+    current = None
+    for row in _rows(quiz_id, using):
+        submission, answer = row[:split], row[split:]
+        if current is None or current['submission_id'] != submission[0]:
+            if current is not None:
+                yield json.dumps(current) + '\n'
+            current = {
+                'submission_id': submission[0],
+                'username': submission[1],
+                'started_at': _isoformat(submission[2]),
+                'completed_at': _isoformat(submission[3]),
+                'is_completed': submission[4],
+                'score': submission[5],
+                'correct_answers': submission[6],
+                'points_earned': submission[7],
+                'total_points': submission[8],
+                'answers': [],
+            }
+        if answer[0] is not None:
+            current['answers'].append({
+                'answer_id': answer[0],
+                'question_id': answer[1],
+                'chosen_option': answer[2],
+                'answer_text': answer[3],
+                'is_correct': answer[4],
+                'answered_at': _isoformat(answer[5]),
+            })
+    if current is not None:
+        yield json.dumps(current) + '\n'
@@ -0,0 +1,187 @@
+"""Per-quiz and global leaderboards kept as precomputed ``LeaderboardEntry`` rows.
+
+A quiz board has one row per user with their best score on that quiz; the global board
+(``quiz`` null) has one row per user with the sum of their per-quiz bests. Ties go to
+whoever reached the score first. ``record_score`` folds each completed submission in
+with a couple of conditional UPDATEs, so nothing is sorted at read time: ``top`` is an
+index seek plus ``limit`` rows of ``leaderboard_rank_idx``, and ``rank_of`` counts the
+entries ahead of the user with three range seeks on that index, so it reads as many
+index entries as the user's rank rather than the whole board.
+
+Deleting a quiz takes its bests out of the global sums (``remove_quiz``), and deleting
+completed submissions rebuilds their quizzes' boards once the transaction commits.
+``rebuild_leaderboards`` (or ``manage.py rebuild_leaderboards``) recomputes boards from
+the stored submissions, e.g. after a regrade.
+"""
+from threading import local
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery, Sum
+from quizzes.models import Quiz
+from .models import LeaderboardEntry, QuizSubmission
+
+RANK_ORDER = ('-score', 'achieved_at', 'user_id')
+RETRIES = 5
+
+_pending = local()
+
+
+def _board(quiz_id):
+    if quiz_id is None:
+        return LeaderboardEntry.objects.filter(quiz__isnull=True)
+    return LeaderboardEntry.objects.filter(quiz_id=quiz_id)
+
+
+def _raise_best(submission):
+    """Raise the user's entry on the quiz board to this submission's score if it beats it.
+
+    Returns how much the entry went up (0 if the submission is not a new best).
+    """
+    entries = _board(submission.quiz_id).filter(user_id=submission.user_id)
+    for _ in range(RETRIES):
+        current = entries.values_list('score', flat=True).first()
+        if current is None:
+            try:
+                with transaction.atomic():
+                    LeaderboardEntry.objects.create(
+                        quiz_id=submission.quiz_id, user_id=submission.user_id, score=submission.score,
+                        achieved_at=submission.completed_at, submission_id=submission.pk,
+                    )
+                return submission.score
+            except IntegrityError:
+                # A concurrent completion created it first; compare against that
+                continue
+        if submission.score <= current:
+            return 0
+        # Only apply on top of the score just read, like record_answers does
+        if entries.filter(score=current).update(
+            score=submission.score, achieved_at=submission.completed_at, submission_id=submission.pk,
+        ):
+            return submission.score - current
+    raise RuntimeError(f'Could not update the leaderboard for submission {submission.pk}')
+
+
+def _add_to_global(user_id, delta, achieved_at):
+    entries = _board(None).filter(user_id=user_id)
+    for _ in range(RETRIES):
+        if entries.update(score=F('score') + delta, achieved_at=achieved_at):
+            return
+        try:
+            with transaction.atomic():
+                LeaderboardEntry.objects.create(user_id=user_id, score=delta, achieved_at=achieved_at)
+            return
+        except IntegrityError:
+            continue
+    raise RuntimeError(f'Could not update the global leaderboard for user {user_id}')
+
+
+def record_score(submission):
+    """Fold a completed submission into its quiz's board and the global board.
+    
+    Called from ``submission_completed``, inside the completing transaction, so both
+    boards move together with the submission. Costs one query when the score is not a new
+    best, three when it is, and eight (with savepoints) for a first completion of a quiz.
+    """
+    delta = _raise_best(submission)
+    if delta:
+        _add_to_global(submission.user_id, delta, submission.completed_at)
+
+
+def remove_quiz(quiz_id):
+    """Take a quiz's entries out of their users' global sums; called before the quiz is deleted"""
+    quiz_entries = _board(quiz_id)
+    affected = _board(None).filter(user_id__in=quiz_entries.values('user_id'))
+    # Users with no other quiz entry drop off the global board, as after a rebuild
+    affected.exclude(
+        user_id__in=LeaderboardEntry.objects.filter(quiz__isnull=False).exclude(quiz_id=quiz_id).values('user_id')
+    ).delete()
+    affected.update(score=F('score') - Subquery(quiz_entries.filter(user_id=OuterRef('user_id')).values('score')[:1]))
+
+
+def rebuild_on_commit(quiz_id):
+    """Rebuild a quiz's board once the current transaction commits, at most once per quiz"""
+    _pending.__dict__.setdefault('quiz_ids', set()).add(quiz_id)
+    transaction.on_commit(_rebuild_pending)
+
+
+def _rebuild_pending():
+    # The first callback of a transaction takes every quiz queued in it; the rest find none
+    quiz_ids = _pending.__dict__.pop('quiz_ids', set())
+    quiz_ids = list(Quiz.objects.filter(pk__in=quiz_ids).values_list('pk', flat=True))
+    if quiz_ids:
+        rebuild_leaderboards(quiz_ids)
+
+
+def top(quiz_id=None, limit=10):
+    """The first ``limit`` entries of a quiz's board (or the global one) in rank order"""
+    return list(_board(quiz_id).select_related('user').order_by(*RANK_ORDER)[:limit])
+
+
+def rank_of(quiz_id, user_id):
+    """``(rank, entry)`` for the user on a quiz's board (or the global one); ``(None, None)`` if absent"""
+    board = _board(quiz_id)
+    entry = board.filter(user_id=user_id).first()
+    if entry is None:
+        return None, None
+    # Separate counts, each a range the rank index can bound: the higher scores, then the
+    # ties reached earlier, then ties reached at the same time by a lower user id
+    ties = board.filter(score=entry.score)
+    ahead = (
+        board.filter(score__gt=entry.score).count()
+        + ties.filter(achieved_at__lt=entry.achieved_at).count()
+        + ties.filter(achieved_at=entry.achieved_at, user_id__lt=user_id).count()
+    )
+    return ahead + 1, entry
+
+
+def rebuild_leaderboards(quiz_ids=None, batch_size=1000):
+    """Recompute the boards of ``quiz_ids`` (all quizzes by default) and the affected global
+    entries from completed submissions; returns the number of per-quiz entries written.
+    """
+    completed = QuizSubmission.objects.filter(is_completed=True)
+    quiz_entries = LeaderboardEntry.objects.filter(quiz__isnull=False)
+    if quiz_ids is not None:
+        completed = completed.filter(quiz_id__in=quiz_ids)
+        quiz_entries = quiz_entries.filter(quiz_id__in=quiz_ids)
+
+    # Best first within each (quiz, user), so the first row of each group is the entry
+    rows = completed.order_by('quiz_id', 'user_id', '-score', 'completed_at', 'id').values_list(
+        'id', 'quiz_id', 'user_id', 'score', 'completed_at',
+    )
+    written = 0
+    with transaction.atomic():
+        # Global entries of everyone whose per-quiz entries are about to change are rebuilt too
+        _board(None).filter(
+            Q(user_id__in=quiz_entries.values('user_id')) | Q(user_id__in=completed.values('user_id'))
+        ).delete()
+        quiz_entries.delete()
+
+        batch = []
+        previous = None
+        for submission_id, quiz_id, user_id, score, completed_at in rows.iterator(chunk_size=batch_size):
+            if (quiz_id, user_id) == previous:
+                continue
+            previous = (quiz_id, user_id)
+            batch.append(LeaderboardEntry(
+                quiz_id=quiz_id, user_id=user_id, score=score, achieved_at=completed_at, submission_id=submission_id,
+            ))
+            if len(batch) >= batch_size:
+                written += len(LeaderboardEntry.objects.bulk_create(batch))
+                batch = []
+        written += len(LeaderboardEntry.objects.bulk_create(batch))
+
+        totals = LeaderboardEntry.objects.filter(quiz__isnull=False).exclude(
+            user_id__in=_board(None).values('user_id')
+        ).values('user_id').annotate(total=Sum('score'), reached=Max('achieved_at')).order_by('user_id')
+        # Read each batch completely before writing, since the query excludes what is written
+        last_user_id = 0
+        while True:
+            batch = list(totals.filter(user_id__gt=last_user_id)[:batch_size])
+            if not batch:
+                break
+            last_user_id = batch[-1]['user_id']
+            LeaderboardEntry.objects.bulk_create([
+                LeaderboardEntry(user_id=row['user_id'], score=row['total'], achieved_at=row['reached'])
+                for row in batch
+            ])
+    return written
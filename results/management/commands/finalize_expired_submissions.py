@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from results.sweeper import finalize_expired
+
+
+class Command(BaseCommand):
+    help = 'Finalize unfinished quiz submissions whose deadline has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and sweep every N seconds instead of exiting after one pass',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            finalized = finalize_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Finalized {finalized} expired submissions'))
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
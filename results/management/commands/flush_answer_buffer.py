@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from results import buffer
+
+
+class Command(BaseCommand):
+    help = 'Write answers from the write-behind answer buffer to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and flush every N seconds instead of exiting after one pass',
+        )
+
+    def handle(self, *args, **options):
+        if not buffer.enabled():
+            raise CommandError('The answer buffer is disabled; set ANSWER_BUFFER_DIR')
+        while True:
+            written = buffer.flush(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} buffered answers'))
+            if not options['interval']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
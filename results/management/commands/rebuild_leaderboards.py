@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from results.leaderboard import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-quiz and global leaderboards from completed submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Only rebuild this quiz id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_leaderboards(options['quiz'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leaderboards with {written} quiz entries'))
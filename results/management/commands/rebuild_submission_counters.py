@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from results.models import QuizSubmission
+from results.scoring import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the running score counters stored on quiz submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Report drifted counters without writing')
+        parser.add_argument('--quiz', type=int, help='Only process submissions for this quiz id')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        submissions = QuizSubmission.objects.all()
+        if options['quiz']:
+            submissions = submissions.filter(quiz_id=options['quiz'])
+
+        checked, drifted = rebuild_counters(
+            submissions, batch_size=options['batch_size'], commit=not options['verify']
+        )
+
+        if options['verify'] and drifted:
+            raise CommandError(f'{drifted} of {checked} submissions have drifted counters')
+        action = 'Found' if options['verify'] else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'{action} {drifted} drifted submissions out of {checked}'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from quizzes.models import Quiz
+from results.stats import refresh_quiz_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-quiz and per-question statistics rollups from stored submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', help='Only refresh this quiz id (repeatable)')
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz'] or Quiz.objects.order_by('pk').values_list('pk', flat=True).iterator()
+        refreshed = 0
+        for quiz_id in quiz_ids:
+            refresh_quiz_stats(quiz_id)
+            refreshed += 1
+            if refreshed % 100 == 0:
+                self.stdout.write(f'Refreshed {refreshed} quizzes...')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed statistics for {refreshed} quizzes'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from quizzes.models import Quiz
+from results.scoring import regrade_quiz
+
+
+class Command(BaseCommand):
+    help = "Re-grade all stored answers for a quiz after its answer key changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist")
+
+        changed = regrade_quiz(quiz, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Re-graded "{quiz.title}": {changed} answers changed'))
@@ -0,0 +1,50 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from results.synthetic import generate
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic users, quizzes, questions, submissions and answers for profiling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=20, help='Average number of questions per quiz')
+        parser.add_argument(
+            '--submissions', type=int, default=20000,
+            help='Completed attempts to generate; answers come to roughly this times --questions',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='The same seed and arguments produce the same data')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='student', help='Username prefix of the generated students')
+        parser.add_argument('--password', default='password', help='Password shared by every generated user')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day of generated activity (default today)')
+        parser.add_argument('--days', type=int, default=180, help='Days of activity before --end')
+
+    def handle(self, *args, **options):
+        if options['submissions'] and not (options['users'] and options['quizzes']):
+            raise CommandError('Submissions need at least one user and one quiz')
+        if CustomUser.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f'Users named {options["prefix"]}* already exist; pick another --prefix')
+
+        start = time.perf_counter()
+        reported = [start]
+
+        def progress(done, total):
+            now = time.perf_counter()
+            # At most one line every few seconds
+            if now - reported[0] >= 5 or done == total:
+                reported[0] = now
+                self.stdout.write(f'{done:,}/{total:,} submissions ({done / (now - start):,.0f}/s)')
+
+        counts = generate(
+            users=options['users'], quizzes=options['quizzes'], questions=options['questions'],
+            submissions=options['submissions'], seed=options['seed'], batch_size=options['batch_size'],
+            prefix=options['prefix'], password=options['password'], end=options['end'], days=options['days'],
+            progress=progress if options['verbosity'] else None,
+        )
+        summary = ', '.join(f'{count:,} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+def backfill_progress(apps, schema_editor):
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    UserAnswer = apps.get_model('results', 'UserAnswer')
+    answered = {}
+    for submission_id, question_id in UserAnswer.objects.order_by('answered_at').values_list('submission_id', 'question_id').iterator():
+        answered.setdefault(submission_id, []).append(question_id)
+    for submission_id, question_ids in answered.items():
+        QuizSubmission.objects.filter(pk=submission_id).update(
+            answered_question_ids=question_ids,
+            answered_count=len(question_ids),
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='answered_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='answered_question_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    # Attempts still open at deploy time are completed from these counters
+    from results.scoring import answer_totals
+
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    UserAnswer = apps.get_model('results', 'UserAnswer')
+    ids = list(QuizSubmission.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), 1000):
+        batch = ids[start:start + 1000]
+        for submission_id, row in answer_totals(UserAnswer.objects.filter(submission__in=batch)).items():
+            QuizSubmission.objects.filter(pk=submission_id).update(
+                correct_answers=row['correct'],
+                points_earned=row['earned'],
+                points_possible=row['possible'],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0002_submission_progress_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='points_earned',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='points_possible',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_points(apps, schema_editor):
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    Question = apps.get_model('quizzes', 'Question')
+    quiz_points = Question.objects.filter(quiz=OuterRef('quiz')).order_by().values('quiz').annotate(
+        total=Sum('points')
+    ).values('total')
+    QuizSubmission.objects.update(total_points=Coalesce(Subquery(quiz_points), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0003_submission_points_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='total_points',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_total_points, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0002_question_grading_types'),
+        ('results', '0004_submission_total_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.question')),
+                ('correct_answers', models.PositiveIntegerField(default=0)),
+                ('total_answers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Question stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizStats',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizzes.quiz')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_min', models.FloatField(blank=True, null=True)),
+                ('score_max', models.FloatField(blank=True, null=True)),
+                ('range_90', models.PositiveIntegerField(default=0)),
+                ('range_80', models.PositiveIntegerField(default=0)),
+                ('range_70', models.PositiveIntegerField(default=0)),
+                ('range_60', models.PositiveIntegerField(default=0)),
+                ('range_0', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz stats',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    # Keep the first answer per (submission, question) so the unique constraint can be added.
+    # Run rebuild_submission_counters afterwards if anything was removed.
+    UserAnswer = apps.get_model('results', 'UserAnswer')
+    duplicates = UserAnswer.objects.values('submission', 'question').annotate(
+        first_id=Min('id'), answers=Count('id')
+    ).filter(answers__gt=1).order_by()
+    for row in duplicates.iterator():
+        UserAnswer.objects.filter(submission=row['submission'], question=row['question']).exclude(
+            id=row['first_id']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0002_question_grading_types'),
+        ('results', '0005_quiz_stats_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='question',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='quizzes.question'),
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='submission',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='user_answers', to='results.quizsubmission'),
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['user', 'quiz'], name='submission_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(fields=['user', '-started_at'], name='submission_user_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['quiz', '-score'], name='submission_quiz_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useranswer',
+            index=models.Index(fields=['question', 'is_correct'], name='answer_question_correct_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('submission', 'question'), name='unique_answer_per_question'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quiz_catalogue_index'),
+        ('results', '0006_submission_answer_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quizsubmission',
+            name='submission_user_started_idx',
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(fields=['user', '-started_at', '-id'], name='submission_user_started_idx'),
+        ),
+    ]
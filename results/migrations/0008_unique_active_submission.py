@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+
+
+def close_duplicate_active_submissions(apps, schema_editor):
+    # Keep the newest unfinished attempt per (user, quiz) and close the rest, so the
+    # partial unique constraint can be added. Run refresh_quiz_stats afterwards.
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    duplicates = QuizSubmission.objects.filter(is_completed=False).values('user', 'quiz').annotate(
+        newest_id=Max('id'), attempts=Count('id')
+    ).filter(attempts__gt=1).order_by()
+    for row in duplicates.iterator():
+        QuizSubmission.objects.filter(user=row['user'], quiz=row['quiz'], is_completed=False).exclude(
+            id=row['newest_id']
+        ).update(is_completed=True, completed_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quiz_catalogue_index'),
+        ('results', '0007_submission_history_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_active_submissions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='quizsubmission',
+            name='submission_active_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='quizsubmission',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_completed', False)), fields=('user', 'quiz'), name='unique_active_submission'),
+        ),
+    ]
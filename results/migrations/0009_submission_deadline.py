@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:10
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_deadlines(apps, schema_editor):
+    # One UPDATE per quiz: deadline = started_at + the quiz's current duration
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    QuizSubmission = apps.get_model('results', 'QuizSubmission')
+    for quiz_id, duration in Quiz.objects.values_list('id', 'duration').iterator():
+        QuizSubmission.objects.filter(quiz_id=quiz_id, deadline__isnull=True).update(
+            deadline=models.F('started_at') + timedelta(minutes=duration)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quiz_catalogue_index'),
+        ('results', '0008_unique_active_submission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='deadline',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='quizsubmission',
+            name='deadline',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='quizsubmission',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['deadline'], name='submission_open_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0009_submission_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='question_order',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='quizsubmission',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_quiz_randomization'),
+        ('results', '0010_submission_question_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('achieved_at', models.DateTimeField()),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='quizzes.quiz')),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='results.quizsubmission')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Leaderboard entries',
+                'ordering': ['-score', 'achieved_at', 'user'],
+                'indexes': [models.Index(fields=['quiz', '-score', 'achieved_at', 'user'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('quiz__isnull', False)), fields=('quiz', 'user'), name='unique_quiz_leaderboard_entry'), models.UniqueConstraint(condition=models.Q(('quiz__isnull', True)), fields=('user',), name='unique_global_leaderboard_entry')],
+            },
+        ),
+    ]
@@ -1,63 +1,361 @@
-from django.db import models
+import random
+import struct
+from datetime import timedelta
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from quizzes.models import Quiz, Question
+from quizzes import grading
+from quizzes.paper import get_paper
+from . import buffer
+from .signals import submission_completed
 
 User = get_user_model()
 
+def pack_ids(ids):
+    """Pack question ids into little-endian 64-bit integers"""
+    return struct.pack(f'<{len(ids)}q', *ids)
+
+def unpack_ids(data):
+    data = bytes(data)
+    return struct.unpack(f'<{len(data) // 8}q', data)
+
 class QuizSubmission(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_submissions')
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='submissions')
     score = models.FloatField(default=0)
     total_questions = models.PositiveIntegerField(default=0)
+    total_points = models.PositiveIntegerField(default=0)
     correct_answers = models.PositiveIntegerField(default=0)
+    answered_count = models.PositiveIntegerField(default=0)
+    points_earned = models.PositiveIntegerField(default=0)
+    points_possible = models.PositiveIntegerField(default=0)
+    answered_question_ids = models.JSONField(default=list, blank=True)
+    # Randomized quizzes only: the attempt's seed and its drawn question order (see pack_ids)
+    seed = models.BigIntegerField(null=True, blank=True)
+    question_order = models.BinaryField(default=b'', blank=True)
     started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField()
     completed_at = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # submission_history / user_dashboard
+            models.Index(fields=['user', '-started_at', '-id'], name='submission_user_started_idx'),
+            # quiz_analytics leaderboard of completed attempts
+            models.Index(fields=['quiz', '-score'], condition=Q(is_completed=True), name='submission_quiz_score_idx'),
+            # Expiry sweeper: unfinished attempts past their deadline
+            models.Index(fields=['deadline'], condition=Q(is_completed=False), name='submission_open_deadline_idx'),
+        ]
+        constraints = [
+            # At most one unfinished attempt per user and quiz; also serves start_quiz's lookup
+            models.UniqueConstraint(fields=['user', 'quiz'], condition=Q(is_completed=False), name='unique_active_submission'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.quiz.title} - {self.score}%"
     
+    def save(self, *args, **kwargs):
+        if self.deadline is None:
+            # Fixed once when the attempt starts; later changes to Quiz.duration don't move it
+            self.deadline = timezone.now() + timedelta(minutes=self.quiz.duration)
+        if self._state.adding and self.seed is None and self.quiz.is_randomized:
+            self.draw_questions(get_paper(self.quiz_id))
+        super().save(*args, **kwargs)
+    
+    def draw_questions(self, paper):
+        """Sample and order this attempt's questions from the paper with a fresh seed"""
+        self.seed = random.SystemRandom().getrandbits(63)
+        rng = random.Random(self.seed)
+        question_ids = [question.id for question in paper.questions]
+        sample_size = self.quiz.questions_per_attempt
+        if sample_size and sample_size < len(question_ids):
+            # Without shuffling, the sample keeps the paper's order
+            sampled = set(rng.sample(question_ids, sample_size))
+            question_ids = [question_id for question_id in question_ids if question_id in sampled]
+        if self.quiz.shuffle_questions:
+            rng.shuffle(question_ids)
+        self.question_order = pack_ids(question_ids)
+        self.total_questions = len(question_ids)
+        self.total_points = sum(paper.by_id[question_id].points for question_id in question_ids)
+    
+    def questions_for(self, paper):
+        """This attempt's questions in the order they are asked"""
+        if self.seed is None:
+            return paper.questions
+        # Questions deleted since the attempt started are skipped
+        return [paper.by_id[question_id] for question_id in unpack_ids(self.question_order) if question_id in paper.by_id]
+    
+    def choices_for(self, question, choices):
+        """The question's answer choices as shown in this attempt, shuffled if the quiz asks for it"""
+        if self.seed is None or question.question_type != 'mcq' or not self.quiz.shuffle_options:
+            return choices
+        options = list(question.options())
+        # Seeded per question so a reload shows the same order
+        random.Random(f'{self.seed}:{question.id}').shuffle(options)
+        return tuple((key, f"{label}) {text}") for (key, text), label in zip(options, 'ABCD'))
+    
+    @classmethod
+    def resume_or_start(cls, user, quiz):
+        """Return ``(submission, created)`` for the user's unfinished attempt at ``quiz``.
+        
+        An attempt whose deadline has passed is finalized instead of being resumed.
+        """
+        # The partial unique constraint on unfinished attempts makes this safe against
+        # double-clicks and parallel tabs
+        lookup = {'user': user, 'quiz': quiz, 'is_completed': False}
+        defaults = {
+            'total_questions': lambda: len(get_paper(quiz.id)),
+            'total_points': lambda: get_paper(quiz.id).total_points,
+        }
+        submission, created = cls.objects.get_or_create(**lookup, defaults=defaults)
+        if not created and submission.seconds_remaining() <= 0:
+            submission.complete(submission.questions_for(get_paper(quiz.id)))
+            submission, created = cls.objects.get_or_create(**lookup, defaults=defaults)
+        return submission, created
+    
+    def seconds_remaining(self):
+        """Seconds left before the deadline (never negative)"""
+        return max(0, (self.deadline - timezone.now()).total_seconds())
+    
     def calculate_score(self):
-        """Calculate the score based on user answers"""
-        user_answers = self.user_answers.all()
-        correct_count = 0
-        total_questions = self.quiz.questions.count()
+        """Calculate the points-weighted score from the running counters"""
+        if self.total_points > 0:
+            return self.points_earned / self.total_points * 100
+        return 0
+    
+    def next_question(self, questions):
+        """Return the next unanswered question of ``questions`` (see ``questions_for``), without querying"""
+        answered = set(self.answered_question_ids)
+        # Answers normally arrive in order, so the next question sits at answered_count;
+        # only out-of-order API submissions fall back to scanning
+        if self.answered_count < len(questions) and questions[self.answered_count].id not in answered:
+            return questions[self.answered_count]
+        for question in questions:
+            if question.id not in answered:
+                return question
+        return None
+    
+    def record_answer(self, question, answer_data):
+        """Grade and store a single answer; see ``record_answers``"""
+        recorded = self.record_answers([(question, answer_data)])
+        return recorded[0] if recorded else None
+    
+    def record_answers(self, responses):
+        """Grade ``(question, answer_data)`` pairs in memory and store them with one bulk INSERT
+        plus one counter UPDATE.
+        
+        Questions that are already answered (double-submitted forms, parallel tabs, repeats
+        within the batch) are skipped. If a concurrent writer gets in first, or the deadline
+        has passed, the whole batch is rolled back and an empty list is returned.
+        
+        With the answer buffer enabled the answers are logged in the same transaction
+        instead of inserted, and returned unsaved; see ``results.buffer``.
+        """
+        answered = set(self.answered_question_ids)
+        user_answers = []
+        for question, answer_data in responses:
+            if question.id in answered:
+                continue
+            answered.add(question.id)
+            user_answer = UserAnswer(submission=self, question=question)
+            setattr(user_answer, grading.get_grader(question.question_type).answer_field, answer_data)
+            user_answer.check_answer()
+            user_answers.append(user_answer)
+        if not user_answers:
+            return []
+        
+        correct = sum(1 for user_answer in user_answers if user_answer.is_correct)
+        points = sum(user_answer.question.points for user_answer in user_answers if user_answer.is_correct)
+        possible = sum(user_answer.question.points for user_answer in user_answers)
+        answered_question_ids = self.answered_question_ids + [user_answer.question_id for user_answer in user_answers]
+        
+        buffered = buffer.enabled()
+        try:
+            with transaction.atomic():
+                if not buffered:
+                    # The unique (submission, question) constraint rejects a concurrent duplicate
+                    UserAnswer.objects.bulk_create(user_answers)
+                # Only apply on top of the progress this instance was loaded with; a concurrent
+                # writer moving it on first means this request is stale and must roll back.
+                # Answers arriving after the deadline are rejected by the same statement
+                updated = QuizSubmission.objects.filter(
+                    pk=self.pk, answered_count=self.answered_count, is_completed=False,
+                    deadline__gt=timezone.now(),
+                ).update(
+                    answered_question_ids=answered_question_ids,
+                    answered_count=F('answered_count') + len(user_answers),
+                    correct_answers=F('correct_answers') + correct,
+                    points_earned=F('points_earned') + points,
+                    points_possible=F('points_possible') + possible,
+                )
+                if not updated:
+                    raise IntegrityError('Submission progress changed concurrently or deadline passed')
+                if buffered:
+                    # Durable before the progress UPDATE commits; a crash in between leaves
+                    # an entry the flusher discards, never an acknowledged answer without one
+                    buffer.append(user_answers)
+        except IntegrityError:
+            return []
         
-        for answer in user_answers:
-            if answer.is_correct:
-                correct_count += 1
+        # Mirror the database-side increments on this instance
+        self.answered_question_ids = answered_question_ids
+        self.answered_count += len(user_answers)
+        self.correct_answers += correct
+        self.points_earned += points
+        self.points_possible += possible
         
-        self.correct_answers = correct_count
-        self.total_questions = total_questions
-        self.score = (correct_count / total_questions * 100) if total_questions > 0 else 0
-        self.save()
+        return user_answers
+    
+    def complete(self, questions):
+        """Mark the submission finished and score it from the running counters.
+        
+        Only the first caller to complete a submission saves it and sends
+        ``submission_completed``; concurrent or repeated calls are no-ops.
+        """
+        self.is_completed = True
+        self.completed_at = timezone.now()
+        self.total_questions = len(questions)
+        self.total_points = sum(question.points for question in questions)
+        self.score = self.calculate_score()
+        if buffer.enabled():
+            # The completion receivers read this attempt's answer rows
+            buffer.flush_submission(self.pk)
+        with transaction.atomic():
+            updated = QuizSubmission.objects.filter(pk=self.pk, is_completed=False).update(
+                is_completed=True,
+                completed_at=self.completed_at,
+                total_questions=self.total_questions,
+                total_points=self.total_points,
+                score=self.score,
+            )
+            if updated:
+                submission_completed.send(sender=QuizSubmission, submission=self)
         
         return self.score
 
 class UserAnswer(models.Model):
-    submission = models.ForeignKey(QuizSubmission, on_delete=models.CASCADE, related_name='user_answers')
-    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    # Both foreign keys are covered by the composite constraint/index below
+    submission = models.ForeignKey(QuizSubmission, on_delete=models.CASCADE, related_name='user_answers', db_index=False)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, db_index=False)
     chosen_option = models.CharField(max_length=1, blank=True)  # For MCQ/TrueFalse
     answer_text = models.TextField(blank=True)  # For short answers
     is_correct = models.BooleanField(default=False)
-    answered_at = models.DateTimeField(auto_now_add=True)
+    # Set on creation rather than on save, so rows written later by the answer buffer
+    # keep the time the answer was given
+    answered_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['answered_at']
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'question'], name='unique_answer_per_question'),
+        ]
+        indexes = [
+            models.Index(fields=['question', 'is_correct'], name='answer_question_correct_idx'),
+        ]
     
     def __str__(self):
         return f"{self.submission.user.username} - {self.question.question_text[:50]}"
     
+    @property
+    def response(self):
+        return getattr(self, grading.get_grader(self.question.question_type).answer_field)
+    
     def check_answer(self):
         """Check if the user's answer is correct"""
-        if self.question.question_type in ['mcq', 'true_false']:
-            self.is_correct = (self.chosen_option.lower() == self.question.correct_option.lower())
-        elif self.question.question_type == 'short_answer':
-            # Simple case-insensitive comparison for short answers
-            self.is_correct = (self.answer_text.strip().lower() == self.question.correct_answer.strip().lower())
-        
-        self.save()
-        return self.is_correct
\ No newline at end of file
+        self.is_correct = grading.grade(self.question, self.response)
+        
+        return self.is_correct
+
+class QuizStats(models.Model):
+    """Per-quiz rollup maintained incrementally as submissions start and complete"""
+    # (label, field, lower bound) for the score distribution shown in analytics
+    SCORE_RANGES = (
+        ('90-100', 'range_90', 90),
+        ('80-89', 'range_80', 80),
+        ('70-79', 'range_70', 70),
+        ('60-69', 'range_60', 60),
+        ('0-59', 'range_0', 0),
+    )
+    
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    range_90 = models.PositiveIntegerField(default=0)
+    range_80 = models.PositiveIntegerField(default=0)
+    range_70 = models.PositiveIntegerField(default=0)
+    range_60 = models.PositiveIntegerField(default=0)
+    range_0 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Quiz stats"
+    
+    def __str__(self):
+        return f"Stats for quiz {self.quiz_id}"
+    
+    @classmethod
+    def range_field(cls, score):
+        for label, field, lower in cls.SCORE_RANGES:
+            if score >= lower:
+                return field
+        return cls.SCORE_RANGES[-1][1]
+    
+    @property
+    def average_score(self):
+        return (self.score_sum / self.completions) if self.completions > 0 else 0
+    
+    @property
+    def score_ranges(self):
+        return {label: getattr(self, field) for label, field, lower in self.SCORE_RANGES}
+
+class QuestionStats(models.Model):
+    """Per-question answer counts over completed submissions"""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    correct_answers = models.PositiveIntegerField(default=0)
+    total_answers = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = "Question stats"
+    
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+    
+    @property
+    def accuracy(self):
+        return (self.correct_answers / self.total_answers * 100) if self.total_answers > 0 else 0
+
+class LeaderboardEntry(models.Model):
+    """A user's standing on a quiz's leaderboard, or on the global one when ``quiz`` is null.
+    
+    Per-quiz entries hold the user's best score on that quiz; global entries hold the sum
+    of a user's per-quiz bests. Ties go to whoever reached the score first.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, null=True, blank=True, related_name='leaderboard')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    score = models.FloatField()
+    achieved_at = models.DateTimeField()
+    # The attempt behind a per-quiz best
+    submission = models.ForeignKey(QuizSubmission, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    class Meta:
+        verbose_name_plural = "Leaderboard entries"
+        ordering = ['-score', 'achieved_at', 'user']
+        indexes = [
+            # Top-K reads and rank counts walk this index in board order
+            models.Index(fields=['quiz', '-score', 'achieved_at', 'user'], name='leaderboard_rank_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['quiz', 'user'], condition=Q(quiz__isnull=False), name='unique_quiz_leaderboard_entry'),
+            models.UniqueConstraint(fields=['user'], condition=Q(quiz__isnull=True), name='unique_global_leaderboard_entry'),
+        ]
+    
+    def __str__(self):
+        board = self.quiz_id if self.quiz_id is not None else 'global'
+        return f"{board}: {self.user_id} - {self.score}"
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from quizzes.models import Quiz, Question
+from .dashboard import invalidate_activity, invalidate_all, invalidate_user
+from .leaderboard import rebuild_on_commit, record_score, remove_quiz
+from .models import QuestionStats, QuizStats, QuizSubmission
+from .signals import submission_completed
+from .stats import record_attempt, record_completion
+
+
+@receiver(post_save, sender=Quiz)
+def create_quiz_stats(sender, instance, created, **kwargs):
+    if created:
+        QuizStats.objects.get_or_create(quiz=instance)
+
+
+@receiver(post_save, sender=Question)
+def create_question_stats(sender, instance, created, **kwargs):
+    if created:
+        QuestionStats.objects.get_or_create(question=instance)
+
+
+@receiver(post_save, sender=QuizSubmission)
+def submission_started(sender, instance, created, **kwargs):
+    if created:
+        record_attempt(instance.quiz_id)
+
+
+@receiver(submission_completed)
+def submission_finished(sender, submission, **kwargs):
+    record_completion(submission)
+
+
+@receiver(submission_completed)
+def update_leaderboards(sender, submission, **kwargs):
+    record_score(submission)
+
+
+@receiver(pre_delete, sender=Quiz)
+def quiz_leaving_leaderboards(sender, instance, **kwargs):
+    remove_quiz(instance.pk)
+
+
+@receiver(post_delete, sender=QuizSubmission)
+def submission_leaving_leaderboards(sender, instance, **kwargs):
+    if instance.is_completed:
+        rebuild_on_commit(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=QuizSubmission)
+def submission_dashboards_changed(sender, instance, created=False, **kwargs):
+    # Answers don't show on dashboards; only starting, completing and deleting attempts do
+    if created or kwargs['signal'] is post_delete:
+        invalidate_user(instance.user_id)
+
+
+@receiver(submission_completed)
+def completion_dashboards_changed(sender, submission, **kwargs):
+    invalidate_user(submission.user_id)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_dashboards_changed(sender, instance, **kwargs):
+    invalidate_all()
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_dashboards_changed(sender, instance, created=False, **kwargs):
+    if created or kwargs['signal'] is post_delete:
+        invalidate_activity()
@@ -0,0 +1,130 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from . import buffer
+from .dashboard import invalidate_all
+from .leaderboard import rebuild_leaderboards
+from .models import QuizSubmission, UserAnswer
+from .stats import refresh_quiz_stats
+
+COUNTER_FIELDS = ['answered_question_ids', 'answered_count', 'correct_answers', 'points_earned', 'points_possible']
+
+
+def rebuild_counters(submissions, batch_size=1000, commit=True):
+    """Recompute the running counters for ``submissions`` from their stored answers.
+
+    Works through the queryset in primary-key batches with one grouped aggregate per
+    batch. Returns ``(checked, drifted)``; drifted rows are only written when ``commit``.
+    """
+    if buffer.enabled():
+        # Counters of answers still in the buffer would otherwise be reset to the rows
+        buffer.flush()
+    submissions = submissions.order_by('pk').only('id', 'is_completed', 'score', 'total_points', *COUNTER_FIELDS)
+    checked = drifted = 0
+    last_pk = 0
+    while True:
+        batch = list(submissions.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        changed = _rebuild_batch(batch)
+        checked += len(batch)
+        drifted += len(changed)
+        if changed and commit:
+            with transaction.atomic():
+                QuizSubmission.objects.bulk_update(changed, COUNTER_FIELDS + ['score'], batch_size=batch_size)
+
+    if drifted and commit:
+        invalidate_all()
+    return checked, drifted
+
+
+def answer_totals(answers):
+    """Per-submission answered/correct/earned/possible totals of a UserAnswer queryset.
+
+    Takes the queryset rather than the model so migrations can pass historical models.
+    """
+    return {
+        row['submission']: row
+        for row in answers.values('submission').annotate(
+            answered=Count('id'),
+            correct=Count('id', filter=Q(is_correct=True)),
+            earned=Sum('question__points', filter=Q(is_correct=True), default=0),
+            possible=Sum('question__points', default=0),
+        ).order_by()
+    }
+
+
+def _rebuild_batch(batch):
+    ids = [submission.pk for submission in batch]
+    totals = answer_totals(UserAnswer.objects.filter(submission__in=ids))
+    answered_ids = {}
+    for submission_id, question_id in UserAnswer.objects.filter(submission__in=ids).order_by(
+        'answered_at', 'id'
+    ).values_list('submission_id', 'question_id'):
+        answered_ids.setdefault(submission_id, []).append(question_id)
+
+    changed = []
+    for submission in batch:
+        row = totals.get(submission.pk, {})
+        expected = {
+            'answered_question_ids': answered_ids.get(submission.pk, []),
+            'answered_count': row.get('answered', 0),
+            'correct_answers': row.get('correct', 0),
+            'points_earned': row.get('earned', 0),
+            'points_possible': row.get('possible', 0),
+        }
+        current = {field: getattr(submission, field) for field in expected}
+        for field, value in expected.items():
+            setattr(submission, field, value)
+        if submission.is_completed:
+            current['score'] = submission.score
+            expected['score'] = submission.score = submission.calculate_score()
+        if current != expected:
+            changed.append(submission)
+    return changed
+
+
+def regrade_quiz(quiz, batch_size=1000):
+    """Re-grade every stored answer for ``quiz`` against the current answer keys.
+
+    Answers whose verdict flips are rewritten with one UPDATE per verdict per batch,
+    then the quiz's submission counters, scores, stats and leaderboards are rebuilt. Returns the number
+    of answers that changed.
+    """
+    if buffer.enabled():
+        buffer.flush()
+    questions = {question.pk: question for question in quiz.questions.all()}
+    answers = UserAnswer.objects.filter(question__quiz=quiz).only(
+        'id', 'question_id', 'chosen_option', 'answer_text', 'is_correct'
+    ).order_by()
+
+    changed = 0
+    now_correct, now_wrong = [], []
+
+    def flush():
+        if now_correct:
+            UserAnswer.objects.filter(pk__in=now_correct).update(is_correct=True)
+        if now_wrong:
+            UserAnswer.objects.filter(pk__in=now_wrong).update(is_correct=False)
+        now_correct.clear()
+        now_wrong.clear()
+
+    with transaction.atomic():
+        for answer in answers.iterator(chunk_size=batch_size):
+            answer.question = questions[answer.question_id]
+            was_correct = answer.is_correct
+            if answer.check_answer() == was_correct:
+                continue
+            changed += 1
+            (now_correct if answer.is_correct else now_wrong).append(answer.pk)
+            if len(now_correct) + len(now_wrong) >= batch_size:
+                flush()
+        flush()
+
+        if changed:
+            rebuild_counters(QuizSubmission.objects.filter(quiz=quiz), batch_size=batch_size)
+            rebuild_leaderboards([quiz.pk], batch_size=batch_size)
+            refresh_quiz_stats(quiz.pk)
+
+    return changed
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with ``submission=`` once a QuizSubmission has been scored and saved as completed,
+# inside the same transaction as the completing UPDATE.
+submission_completed = Signal()
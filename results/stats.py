@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from quizzes.models import Question
+from .models import QuestionStats, QuizStats, QuizSubmission
+
+
+def record_attempt(quiz_id):
+    """Count a newly started submission against its quiz's rollup"""
+    if not QuizStats.objects.filter(quiz_id=quiz_id).update(attempts=F('attempts') + 1):
+        refresh_quiz_stats(quiz_id)
+
+
+def record_completion(submission):
+    """Fold a completed submission into the quiz and question rollups with a few UPDATEs"""
+    score = submission.score
+    range_field = QuizStats.range_field(score)
+    updated = QuizStats.objects.filter(quiz_id=submission.quiz_id).update(
+        completions=F('completions') + 1,
+        score_sum=F('score_sum') + score,
+        score_min=Least(Coalesce('score_min', Value(score)), Value(score)),
+        score_max=Greatest(Coalesce('score_max', Value(score)), Value(score)),
+        **{range_field: F(range_field) + 1},
+    )
+    if not updated:
+        # No rollup yet (e.g. before the first backfill); build it from scratch instead
+        refresh_quiz_stats(submission.quiz_id)
+        return
+
+    answered = submission.answered_question_ids
+    if not answered:
+        return
+    touched = QuestionStats.objects.filter(question_id__in=answered).update(total_answers=F('total_answers') + 1)
+    if submission.correct_answers:
+        correct = submission.user_answers.filter(is_correct=True).values('question_id')
+        QuestionStats.objects.filter(question_id__in=correct).update(correct_answers=F('correct_answers') + 1)
+    if touched != len(answered):
+        refresh_quiz_stats(submission.quiz_id)
+
+
+def refresh_quiz_stats(quiz_id):
+    """Recompute a quiz's rollups from its submissions and answers"""
+    submissions = QuizSubmission.objects.filter(quiz_id=quiz_id)
+    completed = Q(is_completed=True)
+    aggregates = {
+        'attempts': Count('id'),
+        'completions': Count('id', filter=completed),
+        'score_sum': Coalesce(Sum('score', filter=completed), 0.0),
+        'score_min': Min('score', filter=completed),
+        'score_max': Max('score', filter=completed),
+    }
+    previous = None
+    for label, field, lower in QuizStats.SCORE_RANGES:
+        bucket = completed & Q(score__gte=lower)
+        if previous is not None:
+            bucket &= Q(score__lt=previous)
+        aggregates[field] = Count('id', filter=bucket)
+        previous = lower
+
+    questions = Question.objects.filter(quiz_id=quiz_id).annotate(
+        total=Count('useranswer', filter=Q(useranswer__submission__is_completed=True)),
+        correct=Count('useranswer', filter=Q(useranswer__submission__is_completed=True, useranswer__is_correct=True)),
+    ).order_by()
+
+    with transaction.atomic():
+        QuizStats.objects.update_or_create(quiz_id=quiz_id, defaults=submissions.aggregate(**aggregates))
+        QuestionStats.objects.bulk_create(
+            [
+                QuestionStats(question_id=question.id, total_answers=question.total, correct_answers=question.correct)
+                for question in questions
+            ],
+            update_conflicts=True,
+            unique_fields=['question'],
+            update_fields=['total_answers', 'correct_answers'],
+        )
@@ -0,0 +1,75 @@
+"""Finalize attempts whose deadline has passed.
+
+Abandoned attempts would otherwise stay unfinished forever. ``finalize_expired`` closes
+them in batches: one UPDATE scores a whole batch from the running counters, then each
+finalized submission is announced through ``submission_completed`` so the rollups see it.
+Run it with ``manage.py finalize_expired_submissions``, from cron or with ``--interval``
+as a sidecar process.
+"""
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.utils import timezone
+from quizzes.paper import get_paper
+from . import buffer
+from .models import QuizSubmission
+from .signals import submission_completed
+
+
+def _per_attempt(papers, drawn, from_paper, output_field):
+    # Randomized attempts keep the totals they drew at start; others use their quiz's paper
+    return Case(
+        When(seed__isnull=False, then=drawn),
+        *[When(quiz_id=quiz_id, then=from_paper(paper)) for quiz_id, paper in papers.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def _score(paper):
+    if not paper.total_points:
+        return Value(0.0)
+    return F('points_earned') * 100.0 / paper.total_points
+
+
+DRAWN_SCORE = Case(
+    When(total_points=0, then=Value(0.0)),
+    default=F('points_earned') * 100.0 / F('total_points'),
+    output_field=FloatField(),
+)
+
+
+def finalize_expired(batch_size=500, now=None):
+    """Complete every unfinished submission past its deadline; returns how many were finalized"""
+    now = now or timezone.now()
+    finalized = 0
+    if buffer.enabled():
+        buffer.flush()
+    while True:
+        batch = list(
+            QuizSubmission.objects.filter(is_completed=False, deadline__lte=now)
+            .order_by('deadline')
+            .values_list('pk', 'quiz_id')[:batch_size]
+        )
+        if not batch:
+            return finalized
+
+        ids = [pk for pk, _ in batch]
+        papers = {quiz_id: get_paper(quiz_id) for quiz_id in {quiz_id for _, quiz_id in batch}}
+        with transaction.atomic():
+            # completed_at=now marks the rows this sweep closed, as opposed to ones a
+            # student finished concurrently between the SELECT and this UPDATE
+            QuizSubmission.objects.filter(pk__in=ids, is_completed=False).update(
+                is_completed=True,
+                completed_at=now,
+                total_questions=_per_attempt(
+                    papers, F('total_questions'), lambda paper: Value(len(paper)), IntegerField()
+                ),
+                total_points=_per_attempt(
+                    papers, F('total_points'), lambda paper: Value(paper.total_points), IntegerField()
+                ),
+                score=_per_attempt(papers, DRAWN_SCORE, _score, FloatField()),
+            )
+            for submission in QuizSubmission.objects.filter(pk__in=ids, completed_at=now):
+                submission_completed.send(sender=QuizSubmission, submission=submission)
+                finalized += 1
+
@@ -0,0 +1,252 @@
+"""Deterministic synthetic data for profiling at production scale.
+
+``generate`` creates users, quizzes, questions, completed submissions and their answers
+with batched ``bulk_create``. Everything is drawn from one ``random.Random(seed)``, so
+the same arguments always produce the same rows. Only per-user and per-question
+parameters are held in memory; submissions and answers are generated and written one
+batch at a time.
+
+Scores follow a simple item-response model: every student has an ability, every question
+a difficulty, and an answer is correct with probability ``1 / (1 + exp(difficulty -
+ability))``. This gives a skewed score distribution, questions that range from easy to
+hard, and students whose results are consistent across quizzes. Activity is heavy-tailed
+as well: a few students and quizzes account for most of the attempts.
+
+``bulk_create`` skips signals, so the rollups that the receivers would normally keep up
+to date are computed while generating and written at the end, leaderboards are rebuilt
+and cached dashboards are invalidated explicitly.
+"""
+import math
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from quizzes.models import Quiz, Question
+from users.models import CustomUser
+from .dashboard import invalidate_all
+from .leaderboard import rebuild_leaderboards
+from .models import QuestionStats, QuizStats, QuizSubmission, UserAnswer
+
+TOPICS = ('Algebra', 'Biology', 'Chemistry', 'Geography', 'History', 'Literature', 'Music', 'Physics',
+          'Programming', 'Statistics')
+# (question type, weight)
+QUESTION_TYPES = (('mcq', 70), ('true_false', 15), ('short_answer', 8), ('numeric', 7))
+DURATIONS = (10, 15, 20, 30, 45, 60)
+# Share of attempts where the student ran out of time before answering everything
+TIMED_OUT = 0.08
+# Shifts the average share of correct answers to roughly 70%
+EASE = 1.2
+
+
+def _timestamp_fields():
+    return [
+        CustomUser._meta.get_field('created_at'), CustomUser._meta.get_field('updated_at'),
+        Quiz._meta.get_field('created_at'), Quiz._meta.get_field('updated_at'),
+        Question._meta.get_field('created_at'),
+        QuizSubmission._meta.get_field('started_at'),
+    ]
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let ``bulk_create`` keep the generated values of auto_now/auto_now_add fields"""
+    fields = [(field, field.auto_now, field.auto_now_add) for field in _timestamp_fields()]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _skewed_weights(rng, count, alpha=2):
+    return list(accumulate(rng.paretovariate(alpha) for _ in range(count)))
+
+
+def _make_question(rng, quiz, number, created_at):
+    question_type = rng.choices([kind for kind, _ in QUESTION_TYPES], [weight for _, weight in QUESTION_TYPES])[0]
+    question = Question(
+        quiz=quiz, question_text=f'{quiz.title} question {number}: {rng.getrandbits(32):08x}?',
+        question_type=question_type, points=rng.choices((1, 2, 3), (80, 15, 5))[0], created_at=created_at,
+    )
+    if question_type == 'mcq':
+        for letter in 'abcd':
+            setattr(question, f'option_{letter}', f'Option {letter.upper()}{number}')
+        question.correct_option = rng.choice('abcd')
+    elif question_type == 'true_false':
+        question.correct_option = rng.choice('ab')
+    elif question_type == 'numeric':
+        question.correct_answer = str(rng.randint(0, 1000))
+    else:
+        question.correct_answer = f'answer {number}'
+    return question
+
+
+def _response(rng, question, correct):
+    """``(chosen_option, answer_text)`` for a right or wrong answer to ``question``"""
+    if question.question_type in ('mcq', 'true_false'):
+        letters = 'abcd' if question.question_type == 'mcq' else 'ab'
+        if correct:
+            return question.correct_option, ''
+        return rng.choice([letter for letter in letters if letter != question.correct_option]), ''
+    if question.question_type == 'numeric':
+        value = int(question.correct_answer)
+        return '', str(value if correct else value + rng.randint(1, 50))
+    return '', question.correct_answer if correct else 'not sure'
+
+
+def generate(users=1000, quizzes=50, questions=20, submissions=20000, seed=0, batch_size=5000,
+             prefix='student', password='password', end=None, days=180, progress=None):
+    """Create the synthetic dataset; returns a dict of row counts per model.
+
+    ``questions`` is the average per quiz, ``submissions`` the number of completed attempts.
+    Timestamps fall in the ``days`` before ``end`` (a date, today by default).
+    ``progress(done, total)`` is called after every written batch of submissions.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now(dt_timezone.utc).date()
+    until = datetime.combine(end, time.min, tzinfo=dt_timezone.utc)
+    since = until - timedelta(days=days)
+    span = (until - since).total_seconds()
+
+    def moment(after=since):
+        return after + timedelta(seconds=rng.uniform(0, (until - after).total_seconds()))
+
+    counts = {}
+    with explicit_timestamps():
+        # One hash for everyone; hashing per user would dominate the run
+        password_hash = make_password(password)
+        authors = max(1, quizzes // 25)
+        user_ids = []
+        joined_at = []
+        for start in range(0, users + authors, batch_size):
+            batch = []
+            for n in range(start, min(start + batch_size, users + authors)):
+                author = n >= users
+                joined = since + timedelta(seconds=rng.uniform(0, span / 2))
+                joined_at.append(joined)
+                batch.append(CustomUser(
+                    username=f'{prefix}-author{n - users}' if author else f'{prefix}{n}',
+                    email=f'{prefix}{n}@example.com', password=password_hash,
+                    role='admin' if author else 'user', date_joined=joined, created_at=joined, updated_at=joined,
+                ))
+            with transaction.atomic():
+                user_ids.extend(user.id for user in CustomUser.objects.bulk_create(batch))
+        author_ids = user_ids[users:]
+        user_ids = user_ids[:users]
+        joined_at = joined_at[:users]
+        ability = [rng.gauss(0, 1) for _ in user_ids]
+        counts['users'] = len(user_ids) + len(author_ids)
+
+        # Quizzes and their questions are small enough to keep in memory
+        papers = []
+        difficulty = {}
+        stats = {}
+        for start in range(0, quizzes, batch_size):
+            batch = []
+            for n in range(start, min(start + batch_size, quizzes)):
+                created = since + timedelta(seconds=rng.uniform(0, span / 3))
+                batch.append(Quiz(
+                    title=f'{rng.choice(TOPICS)} {n}', description=f'Synthetic quiz number {n}.',
+                    duration=rng.choice(DURATIONS), created_by_id=rng.choice(author_ids),
+                    is_active=rng.random() < 0.95, created_at=created, updated_at=created,
+                ))
+            with transaction.atomic():
+                Quiz.objects.bulk_create(batch)
+                quiz_questions = []
+                for quiz in batch:
+                    count = rng.randint(max(1, questions // 2), max(1, questions * 3 // 2))
+                    quiz_questions.append([_make_question(rng, quiz, number, quiz.created_at) for number in range(count)])
+                Question.objects.bulk_create(
+                    [question for paper in quiz_questions for question in paper], batch_size=batch_size
+                )
+            for quiz, paper in zip(batch, quiz_questions):
+                papers.append((quiz, paper, sum(question.points for question in paper)))
+                stats[quiz.id] = QuizStats(quiz=quiz)
+                for question in paper:
+                    difficulty[question.id] = rng.gauss(0, 1)
+        question_stats = {question_id: [0, 0] for question_id in difficulty}
+        counts['quizzes'] = len(papers)
+        counts['questions'] = len(difficulty)
+
+        user_weights = _skewed_weights(rng, len(user_ids))
+        quiz_weights = _skewed_weights(rng, len(papers))
+        written = answers = 0
+        while written < submissions:
+            batch = []
+            pending = []
+            # Size batches by answers so memory stays flat however long the quizzes are
+            while written + len(batch) < submissions and len(pending) < batch_size:
+                user_index = rng.choices(range(len(user_ids)), cum_weights=user_weights)[0]
+                quiz, paper, total_points = rng.choices(papers, cum_weights=quiz_weights)[0]
+                started = moment(max(joined_at[user_index], quiz.created_at))
+                deadline = started + timedelta(minutes=quiz.duration)
+                answered = paper
+                if rng.random() < TIMED_OUT:
+                    answered = paper[:rng.randrange(len(paper))]
+                # Attempts vary around the student's ability
+                skill = ability[user_index] + EASE + rng.gauss(0, 0.3)
+                submission = QuizSubmission(
+                    user_id=user_ids[user_index], quiz=quiz, total_questions=len(paper), total_points=total_points,
+                    answered_count=len(answered), answered_question_ids=[question.id for question in answered],
+                    started_at=started, deadline=deadline, is_completed=True,
+                )
+                elapsed = started
+                step = quiz.duration * 60 / (len(paper) + 1)
+                for question in answered:
+                    correct = rng.random() < 1 / (1 + math.exp(difficulty[question.id] - skill))
+                    elapsed += timedelta(seconds=rng.uniform(0.2, 1) * step)
+                    pending.append((submission, question, correct, _response(rng, question, correct), elapsed))
+                    submission.points_possible += question.points
+                    if correct:
+                        submission.correct_answers += 1
+                        submission.points_earned += question.points
+                submission.completed_at = deadline if len(answered) < len(paper) else elapsed
+                submission.score = submission.calculate_score()
+                batch.append(submission)
+
+            with transaction.atomic():
+                QuizSubmission.objects.bulk_create(batch)
+                UserAnswer.objects.bulk_create([
+                    UserAnswer(
+                        submission_id=submission.id, question_id=question.id, chosen_option=chosen_option,
+                        answer_text=answer_text, is_correct=correct, answered_at=answered_at,
+                    )
+                    for submission, question, correct, (chosen_option, answer_text), answered_at in pending
+                ], batch_size=batch_size)
+
+            for submission in batch:
+                rollup = stats[submission.quiz_id]
+                rollup.attempts += 1
+                rollup.completions += 1
+                rollup.score_sum += submission.score
+                rollup.score_min = min(submission.score, rollup.score_min if rollup.score_min is not None else 100)
+                rollup.score_max = max(submission.score, rollup.score_max or 0)
+                field = QuizStats.range_field(submission.score)
+                setattr(rollup, field, getattr(rollup, field) + 1)
+            for _, question, correct, _, _ in pending:
+                question_stats[question.id][0] += correct
+                question_stats[question.id][1] += 1
+            written += len(batch)
+            answers += len(pending)
+            if progress:
+                progress(written, submissions)
+        counts['submissions'] = written
+        counts['answers'] = answers
+
+    with transaction.atomic():
+        QuizStats.objects.bulk_create(stats.values(), batch_size=batch_size)
+        QuestionStats.objects.bulk_create(
+            [
+                QuestionStats(question_id=question_id, correct_answers=correct, total_answers=total)
+                for question_id, (correct, total) in question_stats.items()
+            ],
+            batch_size=batch_size,
+        )
+    rebuild_leaderboards(batch_size=batch_size)
+    invalidate_all()
+    return counts
@@ -1,3 +1,681 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core.pagination import EstimatedCountPaginator
+from users.models import CustomUser
+from quizzes.models import Quiz, Question
+from . import buffer
+from .models import QuestionStats, QuizStats, QuizSubmission, UserAnswer
+from .leaderboard import rank_of, rebuild_leaderboards, top
+from .scoring import regrade_quiz
+from .sweeper import finalize_expired
+from .stats import refresh_quiz_stats
 
-# Create your tests here.
+
+class SubmissionCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Geography', duration=30, created_by=cls.user)
+        cls.questions = [
+            Question.objects.create(
+                quiz=cls.quiz,
+                question_text=f'Question {i}',
+                question_type='true_false',
+                correct_option='a',
+                points=i + 1,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+
+    def test_record_answer_updates_counters(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        self.submission.record_answer(self.questions[1], 'b')
+        self.submission.record_answer(self.questions[2], 'a')
+        self.submission.complete(self.questions)
+
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answered_count, 3)
+        self.assertEqual(self.submission.correct_answers, 2)
+        self.assertEqual(self.submission.points_earned, 4)
+        self.assertEqual(self.submission.points_possible, 6)
+        self.assertAlmostEqual(self.submission.score, 200 / 3)
+
+    def test_complete_does_not_rescan_answers(self):
+        for question in self.questions:
+            self.submission.record_answer(question, 'a')
+        # SAVEPOINT, the completing UPDATE, three rollup UPDATEs, RELEASE, plus the
+        # leaderboards: lookup, quiz and global entry INSERTs in savepoints, global UPDATE
+        with self.assertNumQueries(14):
+            self.submission.complete(self.questions)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        self.submission.record_answer(self.questions[1], 'a')
+        QuizSubmission.objects.filter(pk=self.submission.pk).update(
+            correct_answers=0, points_earned=0, answered_count=7
+        )
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_submission_counters', '--verify', stdout=StringIO())
+
+        call_command('rebuild_submission_counters', stdout=StringIO())
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answered_count, 2)
+        self.assertEqual(self.submission.correct_answers, 2)
+        self.assertEqual(self.submission.points_earned, 3)
+        self.assertEqual(self.submission.answered_question_ids, [self.questions[0].id, self.questions[1].id])
+
+        call_command('rebuild_submission_counters', '--verify', stdout=StringIO())
+
+    def test_regrade_quiz_rescores_after_key_change(self):
+        for question in self.questions:
+            self.submission.record_answer(question, 'b')
+        self.submission.complete(self.questions)
+        self.assertEqual(self.submission.score, 0)
+
+        question = self.questions[2]
+        question.correct_option = 'b'
+        question.save()
+
+        self.assertEqual(regrade_quiz(self.quiz), 1)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.correct_answers, 1)
+        self.assertEqual(self.submission.points_earned, 3)
+        self.assertEqual(self.submission.score, 50)
+        self.assertEqual(regrade_quiz(self.quiz), 0)
+
+    def test_regrade_quiz_refreshes_stats(self):
+        for question in self.questions:
+            self.submission.record_answer(question, 'b')
+        self.submission.complete(self.questions)
+        question = self.questions[2]
+        question.correct_option = 'b'
+        question.save()
+
+        regrade_quiz(self.quiz)
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.score_sum, stats.score_max, stats.range_0), (50, 50, 1))
+        self.assertEqual(QuestionStats.objects.get(question=question).correct_answers, 1)
+        self.assertEqual(QuestionStats.objects.get(question=self.questions[0]).correct_answers, 0)
+
+
+class QuizStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Chemistry', duration=30, created_by=cls.user)
+        cls.questions = [
+            Question.objects.create(quiz=cls.quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a')
+            for i in range(4)
+        ]
+
+    def take(self, answers):
+        submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        for question, answer in zip(self.questions, answers):
+            submission.record_answer(question, answer)
+        if len(answers) == len(self.questions):
+            submission.complete(self.questions)
+
+    def snapshot(self):
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        fields = ['attempts', 'completions', 'score_sum', 'score_min', 'score_max', 'range_90', 'range_70', 'range_0']
+        questions = QuestionStats.objects.filter(question__quiz=self.quiz).order_by('question')
+        return (
+            {field: getattr(stats, field) for field in fields},
+            list(questions.values_list('correct_answers', 'total_answers')),
+        )
+
+    def test_incremental_rollups_match_refresh(self):
+        self.take('aaaa')
+        self.take('aaab')
+        self.take('bbbb')
+        self.take('aa')
+
+        incremental = self.snapshot()
+        self.assertEqual(incremental[0]['attempts'], 4)
+        self.assertEqual(incremental[0]['completions'], 3)
+        self.assertEqual(incremental[0]['score_max'], 100)
+        self.assertEqual(incremental[0]['score_min'], 0)
+        self.assertEqual(incremental[1], [(2, 3), (2, 3), (2, 3), (1, 3)])
+
+        QuizStats.objects.filter(quiz=self.quiz).delete()
+        QuestionStats.objects.filter(question__quiz=self.quiz).delete()
+        refresh_quiz_stats(self.quiz.id)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_missing_rollup_is_rebuilt_on_completion(self):
+        QuizStats.objects.filter(quiz=self.quiz).delete()
+        self.take('aaaa')
+        self.assertEqual(self.snapshot()[0]['completions'], 1)
+
+
+# Query counts here include the per-request user lookup, so keep it uncached
+@override_settings(USER_CACHE_TIMEOUT=0)
+class QuizAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='teacher', password='pass12345', is_staff=True)
+        cls.students = [
+            CustomUser.objects.create_user(username=f'student{i}', password='pass12345') for i in range(3)
+        ]
+
+    def make_quiz(self, question_count):
+        quiz = Quiz.objects.create(title=f'{question_count} questions', duration=30, created_by=self.admin)
+        questions = [
+            Question.objects.create(quiz=quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a')
+            for i in range(question_count)
+        ]
+        for i, student in enumerate(self.students):
+            submission = QuizSubmission.objects.create(user=student, quiz=quiz)
+            for j, question in enumerate(questions):
+                submission.record_answer(question, 'a' if j % (i + 2) else 'b')
+            submission.complete(questions)
+        return quiz
+
+    def get_analytics(self, quiz):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('results:quiz_analytics', args=[quiz.id]))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_is_independent_of_question_count(self):
+        self.client.force_login(self.admin)
+        _, small = self.get_analytics(self.make_quiz(2))
+        response, large = self.get_analytics(self.make_quiz(25))
+        self.assertEqual(small, large)
+
+        self.assertEqual(response.context['total_attempts'], 3)
+        self.assertEqual(sum(response.context['score_ranges'].values()), 3)
+        first = response.context['question_stats'][0]
+        self.assertEqual((first['correct_answers'], first['total_answers']), (0, 3))
+        second = response.context['question_stats'][1]
+        self.assertEqual((second['correct_answers'], second['total_answers']), (3, 3))
+
+
+class SubmissionHistoryExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='teacher', password='pass12345', is_staff=True)
+        cls.student = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Music', duration=10, created_by=cls.admin)
+        cls.questions = [
+            Question.objects.create(quiz=cls.quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a')
+            for i in range(2)
+        ]
+        cls.finished = QuizSubmission.objects.create(user=cls.student, quiz=cls.quiz)
+        cls.finished.record_answer(cls.questions[0], 'a')
+        cls.finished.record_answer(cls.questions[1], 'b')
+        cls.finished.complete(cls.questions)
+        cls.empty = QuizSubmission.objects.create(user=cls.student, quiz=cls.quiz)
+
+    def test_history_is_keyset_paginated(self):
+        for _ in range(30):
+            QuizSubmission.objects.create(user=self.student, quiz=self.quiz, is_completed=True)
+        self.client.force_login(self.student)
+        url = reverse('results:submission_history')
+
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['submissions']), 25)
+        second = self.client.get(url, {'after': first.context['next_cursor']})
+        self.assertEqual(len(second.context['submissions']), 7)
+        self.assertIsNone(second.context['next_cursor'])
+        ids = [s.id for s in first.context['submissions']] + [s.id for s in second.context['submissions']]
+        self.assertEqual(len(set(ids)), 32)
+
+    def export(self, fmt):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('results:quiz_export', args=[self.quiz.id]), {'format': fmt})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        rows = list(csv.DictReader(StringIO(self.export('csv'))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row['is_correct'] for row in rows[:2]], ['True', 'False'])
+        self.assertEqual(rows[2]['submission_id'], str(self.empty.id))
+        self.assertEqual(rows[2]['answer_id'], '')
+
+    def test_jsonl_export_nests_answers(self):
+        lines = [json.loads(line) for line in self.export('jsonl').splitlines()]
+        self.assertEqual([line['submission_id'] for line in lines], [self.finished.id, self.empty.id])
+        self.assertEqual(len(lines[0]['answers']), 2)
+        self.assertEqual(lines[1]['answers'], [])
+
+    def test_export_requires_staff(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('results:quiz_export', args=[self.quiz.id]))
+        self.assertEqual(response.status_code, 403)
+
+
+class DeadlineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='History', duration=20, created_by=cls.user)
+        cls.questions = [
+            Question.objects.create(
+                quiz=cls.quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a', points=i + 1
+            )
+            for i in range(2)
+        ]
+
+    def expire(self, submission):
+        QuizSubmission.objects.filter(pk=submission.pk).update(deadline=timezone.now() - timedelta(seconds=1))
+        submission.refresh_from_db()
+
+    def test_deadline_is_stored_on_start(self):
+        submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        self.assertAlmostEqual(
+            (submission.deadline - submission.started_at).total_seconds(), 20 * 60, delta=1
+        )
+
+    def test_late_answer_is_rejected(self):
+        submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        self.expire(submission)
+        self.assertIsNone(submission.record_answer(self.questions[0], 'a'))
+        self.assertFalse(submission.user_answers.exists())
+        self.assertEqual(submission.answered_count, 0)
+
+    def test_sweeper_finalizes_expired_submissions(self):
+        other = CustomUser.objects.create_user(username='other', password='pass12345')
+        latecomer = CustomUser.objects.create_user(username='latecomer', password='pass12345')
+        expired = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        expired.record_answer(self.questions[1], 'a')
+        self.expire(expired)
+        empty = QuizSubmission.objects.create(user=other, quiz=self.quiz)
+        self.expire(empty)
+        running = QuizSubmission.objects.create(user=latecomer, quiz=self.quiz)
+
+        out = StringIO()
+        call_command('finalize_expired_submissions', '--batch-size', '1', stdout=out)
+        self.assertIn('Finalized 2', out.getvalue())
+
+        expired.refresh_from_db()
+        self.assertTrue(expired.is_completed)
+        self.assertEqual((expired.total_questions, expired.total_points), (2, 3))
+        self.assertAlmostEqual(expired.score, 200 / 3)
+        empty.refresh_from_db()
+        self.assertTrue(empty.is_completed)
+        self.assertEqual(empty.score, 0)
+        running.refresh_from_db()
+        self.assertFalse(running.is_completed)
+
+        stats = QuizStats.objects.get(quiz=self.quiz)
+        self.assertEqual((stats.attempts, stats.completions), (3, 2))
+        self.assertEqual(finalize_expired(), 0)
+
+    def test_start_quiz_does_not_resume_expired_attempt(self):
+        stale = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+        self.expire(stale)
+        self.client.force_login(self.user)
+        self.client.get(reverse('quizzes:start_quiz', args=[self.quiz.id]))
+
+        stale.refresh_from_db()
+        self.assertTrue(stale.is_completed)
+        fresh = QuizSubmission.objects.get(user=self.user, quiz=self.quiz, is_completed=False)
+        self.assertNotEqual(fresh.pk, stale.pk)
+
+
+class SyntheticDataTests(TestCase):
+    def seed(self, **options):
+        out = StringIO()
+        call_command(
+            'seed_quizdata', '--users', '30', '--quizzes', '4', '--questions', '6', '--submissions', '120',
+            '--batch-size', '25', '--end', '2025-01-31', *options.get('args', []), stdout=out,
+        )
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(QuizSubmission.objects.order_by('started_at', 'user__username').values_list(
+            'user__username', 'quiz__title', 'score', 'started_at', 'answered_count',
+        ))
+
+    def test_generates_consistent_data(self):
+        self.assertIn('120 submissions', self.seed())
+        self.assertEqual(QuizSubmission.objects.count(), 120)
+        self.assertEqual(Quiz.objects.count(), 4)
+        self.assertGreater(UserAnswer.objects.count(), 120)
+
+        out = StringIO()
+        call_command('rebuild_submission_counters', '--verify', stdout=out)
+        self.assertIn('Found 0 drifted', out.getvalue())
+
+        def rollups():
+            return (
+                list(QuizStats.objects.order_by('quiz').values_list(
+                    'attempts', 'completions', 'score_min', 'score_max', 'range_0',
+                )),
+                list(QuestionStats.objects.order_by('question').values_list('correct_answers', 'total_answers')),
+            )
+        generated = rollups()
+        for quiz_id in Quiz.objects.values_list('id', flat=True):
+            refresh_quiz_stats(quiz_id)
+        self.assertEqual(rollups(), generated)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        CustomUser.objects.filter(username__startswith='student').delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+        CustomUser.objects.filter(username__startswith='student').delete()
+        self.seed(args=['--seed', '1'])
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_refuses_existing_prefix(self):
+        CustomUser.objects.create_user(username='student1', password='pass12345')
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+# Query counts here include the per-request user lookup, so keep it uncached
+@override_settings(USER_CACHE_TIMEOUT=0)
+class DashboardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.admin = CustomUser.objects.create_user(username='boss', password='pass12345', role='admin')
+        cls.quiz = Quiz.objects.create(title='Astronomy', duration=30, created_by=cls.admin)
+        cls.question = Question.objects.create(
+            quiz=cls.quiz, question_text='Q', question_type='true_false', correct_option='a'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def take(self, answer):
+        submission = QuizSubmission.objects.create(user=self.student, quiz=self.quiz)
+        submission.record_answer(self.question, answer)
+        submission.complete([self.question])
+
+    def test_repeat_user_dashboard_runs_no_aggregates(self):
+        self.take('a')
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('results:dashboard'))
+        self.assertEqual(response.context['summary']['total_quizzes_taken'], 1)
+
+        # Only the session and user lookups remain
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('results:dashboard'))
+        self.assertContains(response, 'Astronomy')
+
+        self.take('b')
+        response = self.client.get(reverse('results:dashboard'))
+        self.assertContains(response, '<h3 class="card-title">2</h3>', html=True)
+        self.assertContains(response, '<h3 class="card-title">50.0%</h3>', html=True)
+
+    def test_admin_dashboard_is_invalidated_by_quiz_changes(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('results:dashboard'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('results:dashboard'))
+
+        Quiz.objects.create(title='Botany', duration=10, created_by=self.admin)
+        response = self.client.get(reverse('results:dashboard'))
+        self.assertContains(response, 'Botany')
+        self.assertEqual(response.context['summary']['total_quizzes'], 2)
+
+        self.take('a')
+        response = self.client.get(reverse('results:dashboard'))
+        self.assertEqual(response.context['summary']['completed_submissions'], 1)
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [CustomUser.objects.create_user(username=name, password='pass12345') for name in ('ann', 'bob', 'cy')]
+        cls.quizzes = [Quiz.objects.create(title=f'Quiz {i}', duration=30, created_by=cls.users[0]) for i in range(2)]
+        cls.questions = {
+            quiz.id: [
+                Question.objects.create(quiz=quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a')
+                for i in range(4)
+            ]
+            for quiz in cls.quizzes
+        }
+
+    def take(self, user, quiz, correct):
+        questions = self.questions[quiz.id]
+        submission = QuizSubmission.objects.create(user=user, quiz=quiz)
+        submission.record_answers([(question, 'a' if i < correct else 'b') for i, question in enumerate(questions)])
+        submission.complete(questions)
+        return submission
+
+    def board(self, quiz=None):
+        return [(entry.user.username, entry.score) for entry in top(quiz.id if quiz else None, 10)]
+
+    def test_boards_keep_best_score_per_user(self):
+        ann, bob, cy = self.users
+        first, second = self.quizzes
+        self.take(ann, first, 2)
+        self.take(bob, first, 3)
+        self.take(ann, first, 4)
+        self.take(ann, first, 1)
+        self.take(cy, first, 3)
+        self.take(cy, second, 4)
+
+        # Bob reached 75% before Cy did
+        self.assertEqual(self.board(first), [('ann', 100), ('bob', 75), ('cy', 75)])
+        self.assertEqual(self.board(), [('cy', 175), ('ann', 100), ('bob', 75)])
+        self.assertEqual(rank_of(first.id, cy.id)[0], 3)
+        self.assertEqual(rank_of(None, ann.id)[0], 2)
+        self.assertEqual(rank_of(second.id, bob.id), (None, None))
+
+        incremental = (self.board(first), self.board(second), self.board())
+        out = StringIO()
+        call_command('rebuild_leaderboards', stdout=out)
+        self.assertIn('4 quiz entries', out.getvalue())
+        self.assertEqual((self.board(first), self.board(second), self.board()), incremental)
+
+    def test_deleting_a_submission_rebuilds_its_board(self):
+        ann, bob, _ = self.users
+        first, second = self.quizzes
+        best = self.take(ann, first, 4)
+        self.take(ann, first, 2)
+        self.take(ann, second, 1)
+        self.take(bob, first, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            best.delete()
+
+        self.assertEqual(self.board(first), [('bob', 75), ('ann', 50)])
+        # Ann reached 75 points overall before Bob did
+        self.assertEqual(self.board(), [('ann', 75), ('bob', 75)])
+        incremental = (self.board(first), self.board())
+        rebuild_leaderboards([first.id])
+        self.assertEqual((self.board(first), self.board()), incremental)
+
+    def test_deleting_a_quiz_updates_the_global_board(self):
+        ann, bob, cy = self.users
+        first, second = self.quizzes
+        self.take(ann, first, 4)
+        self.take(ann, second, 1)
+        self.take(bob, first, 3)
+        self.take(cy, second, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertEqual(self.board(), [('cy', 50), ('ann', 25)])
+        rebuild_leaderboards()
+        self.assertEqual(self.board(), [('cy', 50), ('ann', 25)])
+
+    def test_leaderboard_view_and_json(self):
+        ann, bob, _ = self.users
+        quiz = self.quizzes[0]
+        self.take(ann, quiz, 1)
+        self.take(bob, quiz, 4)
+        self.client.force_login(ann)
+
+        response = self.client.get(reverse('results:quiz_leaderboard', args=[quiz.id]))
+        self.assertContains(response, 'ranked <strong>#2</strong>', html=False)
+
+        data = self.client.get(reverse('results:quiz_leaderboard', args=[quiz.id]), {'format': 'json', 'limit': 1}).json()
+        self.assertEqual([entry['user'] for entry in data['entries']], ['bob'])
+        self.assertEqual(data['me']['rank'], 2)
+        self.assertEqual(self.client.get(reverse('results:leaderboard'), {'format': 'json'}).json()['me']['score'], 25)
+
+
+
+# Query counts here include the per-request user lookup, so keep it uncached
+@override_settings(USER_CACHE_TIMEOUT=0)
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(username='root', password='pass12345', email='root@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_attempts(self, count):
+        quiz = Quiz.objects.create(title='Admin quiz', duration=10, created_by=self.admin)
+        question = Question.objects.create(quiz=quiz, question_text='Q?', option_a='Yes', option_b='No', correct_option='a')
+        for i in range(count):
+            user = CustomUser.objects.create_user(username=f'taker-{quiz.id}-{i}')
+            submission = QuizSubmission.objects.create(user=user, quiz=quiz, is_completed=True, score=100)
+            UserAnswer.objects.create(submission=submission, question=question, chosen_option='a', is_correct=True)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for name in ('results_quizsubmission', 'results_useranswer', 'quizzes_question', 'results_leaderboardentry'):
+            with self.subTest(name):
+                url = reverse(f'admin:{name}_changelist')
+                self.add_attempts(2)
+                with CaptureQueriesContext(connection) as small:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                self.add_attempts(10)
+                with CaptureQueriesContext(connection) as large:
+                    self.client.get(url)
+                self.assertEqual(len(small), len(large))
+
+    def test_quiz_filter_lists_only_recent_quizzes(self):
+        quizzes = [Quiz.objects.create(title=f'Quiz {i}', duration=10, created_by=self.admin) for i in range(25)]
+        response = self.client.get(reverse('admin:quizzes_question_changelist'), {'quiz': quizzes[0].id})
+        quiz_filter = next(spec for spec in response.context['cl'].filter_specs if spec.title == 'quiz')
+        self.assertEqual(len(quiz_filter.lookup_choices), 21)
+        self.assertIn(quizzes[0].id, dict(quiz_filter.lookup_choices))
+
+        response = self.client.get(reverse('admin:quizzes_question_changelist'), {'quiz': 'abc'})
+        self.assertRedirects(response, reverse('admin:quizzes_question_changelist') + '?e=1', fetch_redirect_response=False)
+
+    def test_large_tables_are_not_counted(self):
+        self.add_attempts(5)
+        with mock.patch.object(EstimatedCountPaginator, 'exact_count_limit', 3):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('admin:results_useranswer_changelist'))
+            self.assertEqual(response.context['cl'].result_count, 5)
+            self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+            # Filtered listings are counted, but only up to the limit
+            response = self.client.get(reverse('admin:results_useranswer_changelist'), {'is_correct__exact': 1})
+            self.assertEqual(response.context['cl'].result_count, 3)
+
+
+class AnswerBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+        cls.quiz = Quiz.objects.create(title='Chemistry', duration=30, created_by=cls.user)
+        cls.questions = [
+            Question.objects.create(
+                quiz=cls.quiz, question_text=f'Q{i}', question_type='true_false', correct_option='a', points=i + 1
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        override = override_settings(ANSWER_BUFFER_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.submission = QuizSubmission.objects.create(user=self.user, quiz=self.quiz)
+
+    def test_progress_is_current_before_flush(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        self.submission.record_answer(self.questions[1], 'b')
+        self.assertFalse(self.submission.user_answers.exists())
+
+        fresh = QuizSubmission.objects.get(pk=self.submission.pk)
+        self.assertEqual(fresh.answered_question_ids, [self.questions[0].id, self.questions[1].id])
+        self.assertEqual((fresh.answered_count, fresh.correct_answers, fresh.points_earned), (2, 1, 1))
+        # A stale copy still can't answer again
+        self.assertIsNone(QuizSubmission.objects.get(pk=self.submission.pk).record_answer(self.questions[0], 'b'))
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(
+            list(self.submission.user_answers.order_by('question_id').values_list('question_id', 'is_correct')),
+            [(self.questions[0].id, True), (self.questions[1].id, False)],
+        )
+
+    def test_replaying_a_log_writes_each_answer_once(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        log = (self.directory / buffer.LOG_NAME).read_bytes()
+        self.assertEqual(buffer.flush(), 1)
+        answered_at = self.submission.user_answers.get().answered_at
+
+        # A crash after the INSERT committed but before the log was removed
+        (self.directory / 'flushing-1.log').write_bytes(log + b'{"submission": 1, "quest')
+        with self.assertLogs('results.buffer', 'WARNING'):
+            buffer.flush()
+        self.assertEqual(self.submission.user_answers.get().answered_at, answered_at)
+        self.assertEqual(list(self.directory.glob('*.log')), [])
+
+    def test_unconfirmed_entries_are_dropped(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        # Logged, but the progress UPDATE never committed
+        answer = UserAnswer(submission=self.submission, question=self.questions[1], chosen_option='a')
+        buffer.append([answer])
+        self.assertEqual(buffer.flush(), 1)
+        self.assertTrue((self.directory / buffer.LOG_NAME).exists())
+
+        with mock.patch.object(buffer, 'STALE_SECONDS', -1):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertFalse((self.directory / buffer.LOG_NAME).exists())
+        self.assertEqual(self.submission.user_answers.count(), 1)
+
+    def test_complete_writes_only_its_own_answers(self):
+        other_user = CustomUser.objects.create_user(username='other', password='pass12345')
+        other = QuizSubmission.objects.create(user=other_user, quiz=self.quiz)
+        other.record_answer(self.questions[0], 'a')
+        for question in self.questions:
+            self.submission.record_answer(question, 'a')
+        self.submission.complete(self.questions)
+
+        self.assertEqual(self.submission.user_answers.count(), 3)
+        self.assertFalse(other.user_answers.exists())
+        stats = QuestionStats.objects.get(question=self.questions[0])
+        self.assertEqual((stats.correct_answers, stats.total_answers), (1, 1))
+        # The log still holds everything; rows written at completion are skipped
+        buffer.flush()
+        self.assertEqual(UserAnswer.objects.filter(question=self.questions[0]).count(), 2)
+        self.assertEqual(self.submission.user_answers.count(), 3)
+
+    def test_counter_rebuild_flushes_first(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        call_command('rebuild_submission_counters', '--verify', stdout=StringIO())
+
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answered_question_ids, [self.questions[0].id])
+        self.assertEqual(self.submission.user_answers.count(), 1)
+
+    def test_flush_command(self):
+        self.submission.record_answer(self.questions[0], 'a')
+        out = StringIO()
+        call_command('flush_answer_buffer', stdout=out)
+        self.assertIn('Wrote 1', out.getvalue())
+        with override_settings(ANSWER_BUFFER_DIR=''), self.assertRaises(CommandError):
+            call_command('flush_answer_buffer', stdout=StringIO())
@@ -8,4 +8,7 @@ urlpatterns = [
     path('submissions/', views.submission_history, name='submission_history'),
     path('submissions/<int:submission_id>/', views.submission_detail, name='submission_detail'),
     path('quiz/<int:quiz_id>/analytics/', views.quiz_analytics, name='quiz_analytics'),
+    path('quiz/<int:quiz_id>/export/', views.quiz_export, name='quiz_export'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('quiz/<int:quiz_id>/leaderboard/', views.leaderboard, name='quiz_leaderboard'),
 ]
\ No newline at end of file
@@ -1,13 +1,20 @@
 from django.shortcuts import render, get_object_or_404
+from django.db import router
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Max, Min
-from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import SimpleLazyObject
 from quizzes.models import Quiz  # Only import Quiz from quizzes
-from results.models import QuizSubmission  # Import QuizSubmission from results
-from users.models import CustomUser
+from quizzes.paper import cache_stats
+from results.models import QuizSubmission, QuizStats, QuestionStats
+from results.stats import refresh_quiz_stats
+from results.dashboard import admin_summary, admin_version, cache_timeout, user_summary, user_version
+from results.leaderboard import rank_of, top
+from results.export import stream_csv, stream_jsonl
+from core.pagination import keyset_page
+from core.routers import replica_view, use_replica
 
 @login_required
+@replica_view
 def dashboard(request):
     """Main dashboard for users and admins"""
     if request.user.is_staff or getattr(request.user, 'role', None) == 'admin':
@@ -17,84 +24,51 @@ def dashboard(request):
 
 def user_dashboard(request):
     """Dashboard for regular users"""
-    # Get user's quiz submissions
-    user_submissions = QuizSubmission.objects.filter(user=request.user).select_related('quiz')
-    
-    # Calculate statistics
-    total_quizzes_taken = user_submissions.filter(is_completed=True).count()
-    average_score = user_submissions.filter(is_completed=True).aggregate(Avg('score'))['score__avg'] or 0
-    best_score = user_submissions.filter(is_completed=True).aggregate(Max('score'))['score__max'] or 0
-    
-    # Recent activity (last 5 submissions)
-    recent_submissions = user_submissions.order_by('-started_at')[:5]
-    
-    # Quiz performance by category (you can extend this later)
-    quiz_performance = []
-    for submission in user_submissions.filter(is_completed=True):
-        quiz_performance.append({
-            'quiz': submission.quiz,
-            'score': submission.score,
-            'date': submission.completed_at
-        })
+    # Loaded only if a fragment has to be rendered; cached fragments skip the queries
+    summary = SimpleLazyObject(lambda: user_summary(request.user.id))
     
     context = {
-        'total_quizzes_taken': total_quizzes_taken,
-        'average_score': round(average_score, 1),
-        'best_score': round(best_score, 1),
-        'recent_submissions': recent_submissions,
-        'quiz_performance': quiz_performance[:5],  # Last 5 quizzes
+        'summary': summary,
+        'dashboard_version': user_version(request.user.id),
+        'dashboard_timeout': cache_timeout(),
     }
     
     return render(request, 'results/dashboard.html', context)
 
 def admin_dashboard(request):
     """Dashboard for administrators"""
-    # Overall statistics
-    total_quizzes = Quiz.objects.filter(is_active=True).count()
-    total_users = CustomUser.objects.count()
-    total_submissions = QuizSubmission.objects.count()
-    completed_submissions = QuizSubmission.objects.filter(is_completed=True).count()
-    
-    # Recent activity
-    recent_submissions = QuizSubmission.objects.select_related('user', 'quiz').order_by('-started_at')[:10]
-    
-    # Quiz statistics
-    quiz_stats = Quiz.objects.filter(is_active=True).annotate(
-        submission_count=Count('submissions'),
-        avg_score=Avg('submissions__score'),
-        best_score=Max('submissions__score')
-    ).order_by('-created_at')[:5]
-    
-    # User activity (last 7 days)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_users = CustomUser.objects.filter(date_joined__gte=seven_days_ago).count()
-    recent_submissions_count = QuizSubmission.objects.filter(started_at__gte=seven_days_ago).count()
-    
     context = {
-        'total_quizzes': total_quizzes,
-        'total_users': total_users,
-        'total_submissions': total_submissions,
-        'completed_submissions': completed_submissions,
-        'recent_submissions': recent_submissions,
-        'quiz_stats': quiz_stats,
-        'recent_users': recent_users,
-        'recent_submissions_count': recent_submissions_count,
+        'summary': SimpleLazyObject(admin_summary),
+        'dashboard_version': admin_version(),
+        'dashboard_timeout': cache_timeout(),
+        'paper_cache': cache_stats(),
     }
     
     return render(request, 'results/admin_dashboard.html', context)
 
+HISTORY_PAGE_SIZE = 25
+
 @login_required
+@replica_view
 def submission_history(request):
     """User's submission history"""
-    submissions = QuizSubmission.objects.filter(user=request.user).select_related('quiz').order_by('-started_at')
+    submissions, next_cursor = keyset_page(
+        QuizSubmission.objects.filter(user=request.user).select_related('quiz'),
+        'started_at',
+        request.GET.get('after'),
+        HISTORY_PAGE_SIZE,
+    )
     
     context = {
-        'submissions': submissions
+        'submissions': submissions,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
     }
     
     return render(request, 'results/submission_history.html', context)
 
 @login_required
+@replica_view
 def submission_detail(request, submission_id):
     """Detailed view of a specific submission"""
     submission = get_object_or_404(QuizSubmission, id=submission_id, user=request.user)
@@ -108,42 +82,37 @@ def submission_detail(request, submission_id):
     return render(request, 'results/submission_detail.html', context)
 
 @login_required
+@replica_view
 def quiz_analytics(request, quiz_id):
     """Detailed analytics for a specific quiz (admin only)"""
     if not request.user.is_staff and getattr(request.user, 'role', None) != 'admin':
-        from django.http import HttpResponseForbidden
         return HttpResponseForbidden("You don't have permission to view this page.")
     
-    quiz = get_object_or_404(Quiz, id=quiz_id)
-    submissions = QuizSubmission.objects.filter(quiz=quiz, is_completed=True)
-    
-    # Basic statistics
-    total_attempts = submissions.count()
-    average_score = submissions.aggregate(Avg('score'))['score__avg'] or 0
-    best_score = submissions.aggregate(Max('score'))['score__max'] or 0
-    worst_score = submissions.aggregate(Min('score'))['score__min'] or 0
-    
-    # Score distribution
-    score_ranges = {
-        '90-100': submissions.filter(score__gte=90).count(),
-        '80-89': submissions.filter(score__gte=80, score__lt=90).count(),
-        '70-79': submissions.filter(score__gte=70, score__lt=80).count(),
-        '60-69': submissions.filter(score__gte=60, score__lt=70).count(),
-        '0-59': submissions.filter(score__lt=60).count(),
-    }
-    
-    # Question analysis
+    quiz = get_object_or_404(Quiz.objects.select_related('stats'), id=quiz_id)
+    
+    # Score statistics and distribution from the precomputed rollup
+    try:
+        stats = quiz.stats
+    except QuizStats.DoesNotExist:
+        # Just written, so read it back from the primary
+        with use_replica(False):
+            refresh_quiz_stats(quiz.id)
+            stats = QuizStats.objects.get(quiz=quiz)
+    total_attempts = stats.completions
+    average_score = stats.average_score
+    best_score = stats.score_max or 0
+    worst_score = stats.score_min or 0
+    score_ranges = stats.score_ranges
+    
+    # Question analysis from the per-question rollups
     question_stats = []
-    for question in quiz.questions.all():
-        correct_answers = question.useranswer_set.filter(is_correct=True).count()
-        total_answers = question.useranswer_set.count()
-        accuracy = (correct_answers / total_answers * 100) if total_answers > 0 else 0
-        
+    for question in quiz.questions.select_related('stats'):
+        question_stat = getattr(question, 'stats', None) or QuestionStats(question=question)
         question_stats.append({
             'question': question,
-            'correct_answers': correct_answers,
-            'total_answers': total_answers,
-            'accuracy': round(accuracy, 1)
+            'correct_answers': question_stat.correct_answers,
+            'total_answers': question_stat.total_answers,
+            'accuracy': round(question_stat.accuracy, 1)
         })
     
     context = {
@@ -154,7 +123,61 @@ def quiz_analytics(request, quiz_id):
         'worst_score': round(worst_score, 1),
         'score_ranges': score_ranges,
         'question_stats': question_stats,
-        'submissions': submissions.order_by('-score')[:10]  # Top 10 performances
+        'leaders': top(quiz.id, 10),  # Best attempt of each of the top 10 users
+    }
+    
+    return render(request, 'results/quiz_analytics.html', context)
+
+@login_required
+@replica_view
+def quiz_export(request, quiz_id):
+    """Stream every submission and answer for a quiz as CSV or JSONL (admin only)"""
+    if not request.user.is_staff and getattr(request.user, 'role', None) != 'admin':
+        return HttpResponseForbidden("You don't have permission to export results.")
+    
+    quiz = get_object_or_404(Quiz, id=quiz_id)
+    # The rows are streamed after the view returns, so pin the database now
+    using = router.db_for_read(QuizSubmission)
+    if request.GET.get('format') == 'jsonl':
+        response = StreamingHttpResponse(stream_jsonl(quiz.id, using), content_type='application/x-ndjson')
+        extension = 'jsonl'
+    else:
+        response = StreamingHttpResponse(stream_csv(quiz.id, using), content_type='text/csv')
+        extension = 'csv'
+    response['Content-Disposition'] = f'attachment; filename="quiz-{quiz.id}-results.{extension}"'
+    return response
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+@login_required
+@replica_view
+def leaderboard(request, quiz_id=None):
+    """Top scorers of a quiz, or overall, plus the current user's rank; ?format=json for JSON"""
+    quiz = get_object_or_404(Quiz, id=quiz_id) if quiz_id is not None else None
+    try:
+        limit = min(max(int(request.GET.get('limit', LEADERBOARD_SIZE)), 1), LEADERBOARD_MAX_SIZE)
+    except ValueError:
+        limit = LEADERBOARD_SIZE
+    
+    entries = top(quiz_id, limit)
+    my_rank, my_entry = rank_of(quiz_id, request.user.id)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'quiz': quiz_id,
+            'entries': [
+                {'rank': rank, 'user': entry.user.username, 'score': entry.score, 'achieved_at': entry.achieved_at}
+                for rank, entry in enumerate(entries, 1)
+            ],
+            'me': my_entry and {'rank': my_rank, 'score': my_entry.score, 'achieved_at': my_entry.achieved_at},
+        })
+    
+    context = {
+        'quiz': quiz,
+        'entries': entries,
+        'my_rank': my_rank,
+        'my_entry': my_entry,
     }
     
-    return render(request, 'results/quiz_analytics.html', context)
\ No newline at end of file
+    return render(request, 'results/leaderboard.html', context)
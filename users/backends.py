@@ -0,0 +1,49 @@
+"""Authentication backend that caches the logged-in user between requests.
+
+``AuthenticationMiddleware`` looks the session's user up again on every request. This
+backend serves that lookup from the cache (``USER_CACHE`` for ``USER_CACHE_TIMEOUT``
+seconds; 0 turns caching off, and is the default unless that cache is shared between
+processes). Saving or deleting a user drops their entry from the cache, so with a shared
+cache, deactivation, role changes and password changes (which also end the user's other
+sessions through the session auth hash) take effect on the next request. A per-process
+cache such as locmem is only cleared in the process that saved the user; every other
+worker keeps serving the old row, deactivated or not, for up to USER_CACHE_TIMEOUT.
+Note that the cached user includes the password hash.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _cache():
+    return caches[getattr(settings, 'USER_CACHE', 'default')]
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    # Drop now, and again after commit in case a concurrent request re-cached the old row
+    _cache().delete(_key(user_id))
+    transaction.on_commit(lambda: _cache().delete(_key(user_id)))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+        if not timeout:
+            return super().get_user(user_id)
+        cache = _cache()
+        user = cache.get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(_key(user_id), user, timeout)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
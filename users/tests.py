@@ -1,3 +1,53 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .models import CustomUser
 
-# Create your tests here.
+
+# One process, so the local-memory test cache behaves like a shared one
+@override_settings(USER_CACHE_TIMEOUT=300)
+class AuthHotPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='student', password='pass12345')
+
+    def log_in(self):
+        response = self.client.post(reverse('users:login'), {'username': 'student', 'password': 'pass12345'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_user_is_cached_between_requests(self):
+        self.log_in()
+        self.client.get(reverse('users:profile'))
+        # Only the session row is read
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_deactivated_user_is_logged_out(self):
+        self.log_in()
+        self.client.get(reverse('users:profile'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_password_change_ends_other_sessions(self):
+        self.log_in()
+        self.client.get(reverse('users:profile'))
+        self.user.set_password('another-pass-987')
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('users:profile')).status_code, 302)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions_skip_the_database(self):
+        self.log_in()
+        self.client.get(reverse('users:profile'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:profile'))
+        self.assertEqual(response.context['user'], self.user)
+
+    @override_settings(USER_CACHE_TIMEOUT=0)
+    def test_cache_can_be_turned_off(self):
+        self.log_in()
+        self.client.get(reverse('users:profile'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('users:profile'))